@@ -0,0 +1,187 @@
+"""
+Public read endpoints under WSGI (gunicorn, threads) vs. ASGI (uvicorn, async views).
+
+    pip install gunicorn uvicorn
+    python -m benchmarks.bench_asgi --concurrency 64 256 --duration 10
+
+Both servers run one worker process against the same seeded scratch
+database; the WSGI side gets --threads threads. The load generator is a
+plain asyncio HTTP/1.1 keep-alive client, so nothing else needs installing.
+
+Django runs every MiddlewareMixin middleware under ASGI through two
+sync_to_async hops per request, so with the project's (all built-in, sync)
+middleware stack that cost shows up on the ASGI side; --no-middleware
+takes it out to compare the views themselves.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.common import ROOT, percentile, print_table, setup_django
+
+ENDPOINTS = {
+    'public_profile': lambda name: f'/api/profile/{name}/',
+    'lookup_best': lambda name: f'/api/public/lookup/{name}/?al=zh',
+    'lookup_ranked': lambda name: f'/api/public/lookup/{name}/?mode=ranked&al=en,zh;q=0.5',
+    'search': lambda name: f'/api/users/search/?q={name[:6]}',
+}
+
+
+def seed(users, per_user):
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from core.models import Identity
+    from core.serializers import ClaimsTokenObtainPairSerializer
+
+    names = []
+    for n in range(users):
+        user = User.objects.create_user(username=f'bench{n:04d}', password='x')
+        Identity.objects.bulk_create(
+            Identity(user=user, display_name=f'bench {n} name {i}', context=['Legal', 'Work', 'Social'][i % 3],
+                     language=['en', 'zh', 'ms'][i % 3], language_key=['en', 'zh', 'ms'][i % 3])
+            for i in range(per_user)
+        )
+        names.append(user.username)
+    # bulk_create skips the search receivers
+    call_command('rebuild_search_index', stdout=io.StringIO())
+    token = str(ClaimsTokenObtainPairSerializer.get_token(User.objects.get(username=names[0])).access_token)
+    return names, token
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, db_path, threads, no_middleware=False):
+    env = dict(os.environ, BENCH_DB=db_path, DJANGO_SETTINGS_MODULE='benchmarks.server_settings')
+    if no_middleware:
+        env['BENCH_NO_MIDDLEWARE'] = '1'
+    if kind == 'wsgi':
+        env['DJANGO_ASYNC_READ_VIEWS'] = '0'
+        cmd = [sys.executable, '-m', 'gunicorn', 'c3070_final.wsgi:application', '--bind', f'127.0.0.1:{port}',
+               '--workers', '1', '--worker-class', 'gthread', '--threads', str(threads),
+               '--keep-alive', '30', '--log-level', 'warning']
+    else:
+        env['DJANGO_ASYNC_READ_VIEWS'] = '1'
+        cmd = [sys.executable, '-m', 'uvicorn', 'c3070_final.asgi:application', '--host', '127.0.0.1',
+               '--port', str(port), '--workers', '1', '--log-level', 'warning', '--no-access-log']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+async def _request(reader, writer, path, token):
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n\r\n'.encode('latin-1')
+    )
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    headers = {}
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip()
+    if b'content-length' in headers:
+        await reader.readexactly(int(headers[b'content-length']))
+    elif headers.get(b'transfer-encoding', b'').lower() == b'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+
+async def _client(port, paths, token, stop_at, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < stop_at:
+            path = random.choice(paths)
+            t0 = time.perf_counter()
+            try:
+                status = await _request(reader, writer, path, token)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                errors.append(1)
+                writer.close()
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                continue
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(port, paths, token, concurrency, duration):
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + duration
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _client(port, paths, token, stop_at, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - t0
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[64, 256])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--threads', type=int, default=32, help='gunicorn gthread threads')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--identities', type=int, default=20, help='identities per user')
+    parser.add_argument('--endpoints', nargs='+', default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument('--no-middleware', action='store_true',
+                        help='run both servers with MIDDLEWARE = [] to compare the view layer alone')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    names, token = seed(args.users, args.identities)
+
+    results = []
+    for kind in ('wsgi', 'asgi'):
+        port = free_port()
+        proc = start_server(kind, port, db_path, args.threads, args.no_middleware)
+        try:
+            for endpoint in args.endpoints:
+                paths = [ENDPOINTS[endpoint](name) for name in names]
+                asyncio.run(load(port, paths, token, 8, 1.0))  # warm up
+                for concurrency in args.concurrency:
+                    row = {'server': kind, 'endpoint': endpoint, 'concurrency': concurrency}
+                    row.update(asyncio.run(load(port, paths, token, concurrency, args.duration)))
+                    results.append(row)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    results.sort(key=lambda r: (r['endpoint'], r['concurrency'], r['server']))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['endpoint', 'concurrency', 'server', 'rps', 'p50_ms', 'p99_ms', 'errors'])
+
+
+if __name__ == '__main__':
+    main()
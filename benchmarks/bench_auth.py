@@ -0,0 +1,110 @@
+"""
+Authenticated read throughput: simplejwt's JWTAuthentication vs. ClaimsJWTAuthentication.
+
+    python -m benchmarks.bench_auth --requests 2000 --threads 1 4
+
+Both variants serve the same bearer token (issued by the claims serializer);
+the baseline loads the User row on every request, the claims variant builds
+the user from the token and only consults the cached role version.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import print_table, setup_django
+
+ENDPOINTS = ['user_info', 'identity_list']
+
+
+def run(view, factory, token, path, total, threads):
+    from django.db import connection
+
+    def one(_):
+        resp = view(factory.get(path, HTTP_AUTHORIZATION=f'Bearer {token}'))
+        assert resp.status_code == 200, resp.status_code
+        if hasattr(resp, 'render'):
+            resp.render()
+
+    def worker(n):
+        try:
+            for i in range(n):
+                one(i)
+        finally:
+            connection.close()
+
+    per_thread = total // threads
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, [per_thread] * threads))
+    return per_thread * threads / (time.perf_counter() - t0)
+
+
+def queries_per_request(view, factory, token, path):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = view(factory.get(path, HTTP_AUTHORIZATION=f'Bearer {token}'))
+        if hasattr(resp, 'render'):
+            resp.render()
+    return len(ctx.captured_queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--identities', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    from core.authentication import ClaimsJWTAuthentication
+    from core.models import Identity
+    from core.serializers import ClaimsTokenObtainPairSerializer
+    from core.views import IdentityViewSet, user_info
+
+    user = User.objects.create_user(username='bench', password='x')
+    Identity.objects.bulk_create(
+        Identity(user=user, display_name=f'bench {i}', context='Work', language='en', language_key='en')
+        for i in range(args.identities)
+    )
+    token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+    factory = APIRequestFactory()
+
+    views = {
+        'user_info': (user_info.cls, user_info, '/api/user-info/'),
+        'identity_list': (IdentityViewSet, IdentityViewSet.as_view({'get': 'list'}), '/api/identities/'),
+    }
+    results = []
+    for name in ENDPOINTS:
+        cls, view, path = views[name]
+        original = cls.authentication_classes
+        for label, auth in (('jwt', JWTAuthentication), ('claims', ClaimsJWTAuthentication)):
+            cls.authentication_classes = [auth]
+            try:
+                run(view, factory, token, path, 50, 1)  # warm caches
+                row = {
+                    'endpoint': name,
+                    'auth': label,
+                    'queries': queries_per_request(view, factory, token, path),
+                }
+                for threads in args.threads:
+                    row[f'rps_{threads}t'] = run(view, factory, token, path, args.requests, threads)
+                results.append(row)
+            finally:
+                cls.authentication_classes = original
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['endpoint', 'auth', 'queries'] + [f'rps_{t}t' for t in args.threads])
+
+
+if __name__ == '__main__':
+    main()
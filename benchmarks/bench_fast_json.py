@@ -0,0 +1,172 @@
+"""
+Hot JSON reads: IdentitySerializer + stdlib json vs. .values() rows + dumps_compact.
+
+    python -m benchmarks.bench_fast_json --sizes 200 2000 20000
+
+For each endpoint the old serializer path (kept here as the comparison
+point) and the current view answer the same request; the bodies are
+checked for byte equality and the CPU time per request is reported.
+`fast_stdlib` is the current path with orjson hidden, i.e. what an install
+without orjson gets.
+"""
+import argparse
+import json
+import time
+from unittest import mock
+
+from benchmarks.common import print_table, setup_django
+
+ENDPOINTS = ['identity_list', 'export_json', 'export_ndjson', 'lookup_list']
+
+
+def legacy_views():
+    """The serializer-based implementations the fast paths replaced."""
+    from rest_framework import viewsets
+
+    from core import views
+    from core.renderers import NDJSONRenderer
+    from core.serializers import IdentitySerializer
+    from core.views import IdentityViewSet
+
+    class LegacyIdentityViewSet(IdentityViewSet):
+        def _list_rows(self, request):
+            return viewsets.ModelViewSet.list(self, request)
+
+    def stream(qs, ndjson, chunk_size):
+        serializer = IdentitySerializer()
+        qs = qs.select_related('user__profile')
+        if not ndjson:
+            yield '{"items": ['
+        first = True
+        for obj in qs.iterator(chunk_size=chunk_size):
+            row = serializer.to_representation(obj)
+            if ndjson:
+                yield NDJSONRenderer.dumps_line(row)
+            else:
+                yield ('' if first else ', ') + json.dumps(row, ensure_ascii=False)
+                first = False
+        if not ndjson:
+            yield ']}'
+
+    def lookup_identities(username, ctx, requested_primary, mode_out):
+        qs = views.Identity.objects.filter(user__username=username).select_related('user__profile')
+        items = list(qs.order_by('-updated_at', 'id'))
+        return items[0].user.username, list(IdentitySerializer(items, many=True).data)
+
+    return {
+        'list': LegacyIdentityViewSet.as_view({'get': 'list'}),
+        'stream': stream,
+        'lookup': lookup_identities,
+    }
+
+
+def seed(username, n):
+    from django.contrib.auth.models import User
+    from core.models import Identity
+
+    user = User.objects.create_user(username=username, password='x')
+    Identity.objects.bulk_create(
+        (Identity(user=user, display_name=f'{username} 名前 {i}', context=('Legal', 'Work', 'School')[i % 3],
+                  language='zh' if i % 2 else 'en', language_key='zh' if i % 2 else 'en') for i in range(n)),
+        batch_size=2000,
+    )
+    return user
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    if hasattr(response, 'render'):
+        response.render()
+    return response.content
+
+
+def cpu_ms(fn, repeat):
+    fn()  # warm up
+    t0 = time.process_time()
+    for _ in range(repeat):
+        out = fn()
+    return (time.process_time() - t0) * 1000 / repeat, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 2000, 20000])
+    parser.add_argument('--repeat', type=int, default=0, help='requests per measurement (default scales with size)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from core import renderers, views
+
+    legacy = legacy_views()
+    factory = APIRequestFactory()
+    fast_list = views.IdentityViewSet.as_view({'get': 'list'})
+
+    def request(path, user=None):
+        req = factory.get(path)
+        if user is not None:
+            force_authenticate(req, user=user)
+        return req
+
+    results = []
+    for n in args.sizes:
+        user = seed(f'fast{n}', n)
+        repeat = args.repeat or max(3, 20000 // n)
+        list_path = '/api/identities/?page_size=200'
+
+        def export(query=''):
+            return body(views.export_identities(request('/api/identities/export/' + query, user)))
+
+        def export_ndjson():
+            return export('?format=ndjson')
+
+        def lookup():
+            cache.clear()  # the miss path is the one that builds rows
+            return body(views.public_identity_lookup(
+                request(f'/api/public/lookup/{user.username}/?mode=list'), user.username,
+            ))
+
+        calls = {
+            'identity_list': (
+                lambda: body(legacy['list'](request(list_path, user))),
+                lambda: body(fast_list(request(list_path, user))),
+            ),
+            'export_json': (_patched(views, '_stream_identities', legacy['stream'], export), export),
+            'export_ndjson': (_patched(views, '_stream_identities', legacy['stream'], export_ndjson), export_ndjson),
+            'lookup_list': (_patched(views, '_lookup_identities', legacy['lookup'], lookup), lookup),
+        }
+        for name in ENDPOINTS:
+            old, new = calls[name]
+            old_ms, old_body = cpu_ms(old, repeat)
+            new_ms, new_body = cpu_ms(new, repeat)
+            with mock.patch.object(renderers, 'orjson', None):
+                stdlib_ms, stdlib_body = cpu_ms(new, repeat)
+            results.append({
+                'endpoint': name,
+                'rows': n,
+                'serializer_ms': old_ms,
+                'fast_ms': new_ms,
+                'fast_stdlib_ms': stdlib_ms,
+                'speedup': old_ms / new_ms if new_ms else None,
+                'identical': old_body == new_body == stdlib_body,
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['endpoint', 'rows', 'serializer_ms', 'fast_ms', 'fast_stdlib_ms', 'speedup', 'identical'])
+
+
+def _patched(module, name, replacement, fn):
+    def run():
+        with mock.patch.object(module, name, replacement):
+            return fn()
+    return run
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Non-auth latency during a login burst: PBKDF2 on the request threads vs. the hashing pool.
+
+    python -m benchmarks.bench_hash_pool --login-threads 8 --workers 1 --duration 10
+
+A probe thread requests a public profile every --probe-interval ms while
+--login-threads threads post logins back to back with the project's real
+PBKDF2 settings. Scenarios:
+
+  idle    no logins; the probe's baseline
+  inline  PASSWORD_HASH_WORKERS = 0: hashing on the login threads
+  pool    PASSWORD_HASH_WORKERS = --workers: hashing on the niced process pool
+
+Views are called directly, so rate limiting and load shedding stay out of
+the numbers. Refused logins (503 from the pool's queue limit) are counted.
+"""
+import argparse
+import json
+import threading
+import time
+
+from benchmarks.common import percentile, print_table, setup_django
+
+SCENARIOS = ['idle', 'inline', 'pool']
+
+
+def run(scenario, args, views, factory):
+    from django.db import connection
+
+    token_view, profile_view = views
+    stop = threading.Event()
+    probe, logins, refused = [], [], [0]
+
+    def probe_loop():
+        try:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                resp = profile_view(factory.get('/api/profile/bench0/'), username='bench0')
+                assert resp.status_code == 200, resp.status_code
+                probe.append((time.perf_counter() - t0) * 1000)
+                stop.wait(args.probe_interval / 1000)
+        finally:
+            connection.close()
+
+    def login_loop(n):
+        try:
+            while not stop.is_set():
+                name = f'bench{n % args.users}'
+                t0 = time.perf_counter()
+                resp = token_view(factory.post('/api/token/', {'username': name, 'password': 'x'}, format='json'))
+                if resp.status_code == 200:
+                    logins.append((time.perf_counter() - t0) * 1000)
+                elif resp.status_code == 503:
+                    refused[0] += 1
+                else:
+                    raise AssertionError(resp.status_code)
+                n += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=probe_loop)]
+    if scenario != 'idle':
+        threads += [threading.Thread(target=login_loop, args=(i,)) for i in range(args.login_threads)]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return {
+        'scenario': scenario,
+        'probe_p50_ms': percentile(probe, 50),
+        'probe_p95_ms': percentile(probe, 95),
+        'probe_p99_ms': percentile(probe, 99),
+        'logins_per_s': len(logins) / args.duration,
+        'login_p50_ms': percentile(logins, 50),
+        'refused': refused[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--probe-interval', type=float, default=10.0, help='ms between probe requests')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.urls import resolve
+    from rest_framework.test import APIRequestFactory
+
+    from core import hashers
+
+    settings.LAST_LOGIN_UPDATE = 'off'
+    encoded = make_password('x')  # one real PBKDF2 hash shared by every user
+    for i in range(args.users):
+        User.objects.create(username=f'bench{i}', password=encoded)  # post_save adds the profile
+    views = (resolve('/api/token/').func, resolve('/api/profile/bench0/').func)
+    factory = APIRequestFactory()
+
+    results = []
+    for scenario in SCENARIOS:
+        settings.PASSWORD_HASH_WORKERS = args.workers if scenario == 'pool' else 0
+        if scenario == 'pool':
+            hashers.pbkdf2('warm', 'up', 1, 'sha256')  # start the workers outside the timing
+        results.append(run(scenario, args, views, factory))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['scenario', 'probe_p50_ms', 'probe_p95_ms', 'probe_p99_ms',
+                              'logins_per_s', 'login_p50_ms', 'refused'])
+
+
+if __name__ == '__main__':
+    main()
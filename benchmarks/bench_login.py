@@ -0,0 +1,112 @@
+"""
+Concurrent token-login throughput: write path before and after dirty tracking.
+
+    python -m benchmarks.bench_login --users 50 --logins 400 --threads 1 4 8
+
+Scenarios:
+  legacy    last_login written on the request and core_profile re-saved on every User save
+  sync      last_login written on the request, profile left alone
+  deferred  last_login queued and flushed in one bulk UPDATE
+
+Password hashing dominates a real login, so by default the users are given
+a cheap hasher to make the database write path visible; pass --real-hasher
+to keep the project's PBKDF2 settings.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import percentile, print_table, setup_django
+
+SCENARIOS = ['legacy', 'sync', 'deferred']
+
+
+def legacy_profile_receiver(sender, instance, created, **kwargs):
+    """The old create_or_update_user_profile update branch."""
+    if not created:
+        instance.profile.save()
+
+
+def run(view, factory, usernames, total, threads):
+    from django.db import connection
+
+    def worker(n, offset):
+        latencies = []
+        errors = 0
+        try:
+            for i in range(n):
+                name = usernames[(offset + i) % len(usernames)]
+                t0 = time.perf_counter()
+                resp = view(factory.post('/api/token/', {'username': name, 'password': 'x'}, format='json'))
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if resp.status_code != 200:
+                    errors += 1
+        finally:
+            connection.close()
+        return latencies, errors
+
+    per_thread = total // threads
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(worker, [per_thread] * threads, range(0, threads * 7, 7)))
+    elapsed = time.perf_counter() - t0
+    latencies = [ms for lat, _ in results for ms in lat]
+    return {
+        'logins_per_s': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'errors': sum(e for _, e in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--real-hasher', action='store_true')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db.models.signals import post_save
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.views import TokenObtainPairView
+
+    from core import logins
+
+    if not args.real_hasher:
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    usernames = [f'bench{i}' for i in range(args.users)]
+    for name in usernames:
+        User.objects.create_user(username=name, password='x')
+
+    view = TokenObtainPairView.as_view()
+    factory = APIRequestFactory()
+    results = []
+    for scenario in SCENARIOS:
+        mode = 'deferred' if scenario == 'deferred' else 'sync'
+        if scenario == 'legacy':
+            post_save.connect(legacy_profile_receiver, sender=User)
+        try:
+            with override_settings(LAST_LOGIN_UPDATE=mode, LAST_LOGIN_FLUSH_INTERVAL=1.0):
+                for threads in args.threads:
+                    row = {'scenario': scenario, 'threads': threads}
+                    row.update(run(view, factory, usernames, args.logins, threads))
+                    logins.get_queue().flush()
+                    results.append(row)
+        finally:
+            post_save.disconnect(legacy_profile_receiver, sender=User)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['scenario', 'threads', 'logins_per_s', 'p50_ms', 'p95_ms', 'errors'])
+
+
+if __name__ == '__main__':
+    main()
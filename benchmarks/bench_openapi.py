@@ -0,0 +1,92 @@
+"""
+API docs: worker startup and per-request cost, live drf_yasg vs. the generated document.
+
+    python -m benchmarks.bench_openapi --requests 200 --starts 5
+
+Startup is a fresh interpreter running django.setup() and importing the
+URLconf; the "live" variant also imports drf_yasg and builds its SchemaView,
+as the URLconf used to. Requests compare drf_yasg's SchemaView with
+cache_timeout=0 (introspects every view per request) against core.openapi.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import ROOT, measure, print_table, setup_django
+
+STARTUP = """
+import resource, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+import c3070_final.urls
+if sys.argv[1] == 'live':
+    from drf_yasg import openapi
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+    get_schema_view(openapi.Info(title='Identity API', default_version='v1'), public=True,
+                    permission_classes=(permissions.AllowAny,))
+print((time.perf_counter() - t0) * 1000, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def startup(variant, starts):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='c3070_final.settings')
+    times, rss = [], []
+    for _ in range(starts):
+        out = subprocess.run([sys.executable, '-c', STARTUP, variant], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+        rss.append(float(out[1]))
+    return min(times), min(rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--starts', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    rows = []
+    for variant in ('live', 'generated'):
+        ms, rss = startup(variant, args.starts)
+        rows.append({'variant': variant, 'startup_ms': ms, 'max_rss_mib': rss})
+
+    setup_django(migrate=False)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import RequestFactory
+    from drf_yasg import openapi as yasg
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    from core import openapi
+
+    settings.OPENAPI_SCHEMA_PATH = Path(tempfile.mkdtemp(prefix='c3070-bench-')) / 'openapi.json'
+    call_command('generate_openapi', verbosity=0, stdout=open(os.devnull, 'w'))
+    live = get_schema_view(yasg.Info(**openapi.INFO), public=True, authentication_classes=[],
+                           permission_classes=(permissions.AllowAny,)).without_ui(cache_timeout=0)
+    factory = RequestFactory()
+
+    def live_schema():
+        live(factory.get('/swagger/', {'format': 'openapi'})).render()
+
+    def generated_schema():
+        openapi.openapi_schema(factory.get('/openapi.json'))
+
+    for row, fn in zip(rows, (live_schema, generated_schema)):
+        row.update({f'schema_{k}': v for k, v in measure(fn, repeat=args.requests).items() if k != 'n'})
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows, ['variant', 'startup_ms', 'max_rss_mib', 'schema_mean_ms', 'schema_p50_ms', 'schema_p95_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+public_identity_lookup: indexed SQL gate vs. the old load-all-then-filter path.
+
+    python -m benchmarks.bench_public_lookup --sizes 1000 5000 20000
+"""
+import argparse
+import json
+
+from benchmarks.common import measure, print_table, setup_django
+
+CONTEXTS = ['Legal', 'Work', 'School', 'Social', 'Gaming', 'Religious']
+LANGUAGES = ['en', 'en-GB', 'zh', 'zh-Hant', 'ms', 'ta', 'Mandarin', 'Tamil']
+
+SCENARIOS = [
+    ('best, al=zh', {'al': 'zh'}),
+    ('best, ctx+al', {'context': 'legal', 'al': 'ta'}),
+    ('list, al=ms', {'al': 'ms', 'mode': 'all'}),
+]
+
+
+def legacy_lookup_view():
+    """The pre-index implementation, kept here as the comparison point."""
+    from django.contrib.auth.models import User
+    from django.http import JsonResponse
+    from django.shortcuts import get_object_or_404
+    from rest_framework.decorators import api_view, permission_classes
+    from rest_framework.permissions import AllowAny
+
+    from core.models import Identity
+    from core.serializers import IdentitySerializer
+
+    @api_view(['GET'])
+    @permission_classes([AllowAny])
+    def legacy(request, username):
+        user = get_object_or_404(User, username=username)
+        qs = Identity.objects.filter(user=user).select_related('user__profile')
+        ctx = (request.GET.get('context') or '').strip()
+        if ctx:
+            qs = qs.filter(context__icontains=ctx)
+        raw_lang = (request.GET.get('accept_language') or '').strip() or (request.GET.get('al') or '').strip()
+
+        def norm_lang(s):
+            if not s:
+                return ''
+            s = s.strip().lower()
+            word_alias = {'english': 'en', 'chinese': 'zh', 'mandarin': 'zh', 'malay': 'ms', 'tamil': 'ta'}
+            if s in word_alias:
+                return word_alias[s]
+            if '-' in s:
+                s = s.split('-', 1)[0]
+            return s if len(s) in (2, 3) else ''
+
+        requested_langs = [p.split(';', 1)[0].strip() for p in raw_lang.split(',') if p.strip()]
+        requested_primary = [p for p in (norm_lang(x) for x in requested_langs) if p]
+        items = list(qs)
+        if requested_primary:
+            items = [i for i in items if norm_lang(i.language or '') in requested_primary]
+        items.sort(key=lambda x: x.updated_at or x.created_at, reverse=True)
+        mode = (request.GET.get('mode') or 'best').strip().lower()
+        if mode == 'best':
+            items = items[:1]
+        data = IdentitySerializer(items, many=True, context={'request': request}).data
+        return JsonResponse({'username': user.username, 'count': len(data), 'results': data})
+
+    return legacy
+
+
+def seed(username, n):
+    from django.contrib.auth.models import User
+    from core.languages import norm_lang
+    from core.models import Identity
+
+    user = User.objects.create_user(username=username, password='x')
+    rows = []
+    for i in range(n):
+        lang = LANGUAGES[i % len(LANGUAGES)]
+        rows.append(Identity(
+            user=user,
+            display_name=f'{username} name {i}',
+            context=CONTEXTS[(i * 7) % len(CONTEXTS)],
+            language=lang,
+            language_key=norm_lang(lang),
+        ))
+    Identity.objects.bulk_create(rows, batch_size=2000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.test import APIRequestFactory
+    from core.views import public_identity_lookup
+
+    legacy = legacy_lookup_view()
+    factory = APIRequestFactory()
+    results = []
+    for size in args.sizes:
+        username = f'bench{size}'
+        seed(username, size)
+        for label, params in SCENARIOS:
+            def call(view, params=params):
+                resp = view(factory.get('/', params), username=username)
+                assert resp.status_code == 200, resp.status_code
+
+            old = measure(lambda: call(legacy), repeat=args.repeat)
+            new = measure(lambda: call(public_identity_lookup), repeat=args.repeat)
+            results.append({
+                'identities': size,
+                'scenario': label,
+                'legacy_p50_ms': old['p50_ms'],
+                'indexed_p50_ms': new['p50_ms'],
+                'speedup': old['p50_ms'] / new['p50_ms'] if new['p50_ms'] else None,
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['identities', 'scenario', 'legacy_p50_ms', 'indexed_p50_ms', 'speedup'])
+
+
+if __name__ == '__main__':
+    main()
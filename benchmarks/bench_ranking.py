@@ -0,0 +1,98 @@
+"""
+Micro-benchmark for the mode=ranked scoring engine (no database involved).
+
+Compares the compiled, memoised, single-pass top-k ranker with a naive
+version that re-parses the header and fully sorts every candidate.
+
+    python -m benchmarks.bench_ranking --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import measure, print_table
+from core.ranking import compile_accept_language, rank_candidates
+
+HEADER = 'en-GB,en;q=0.9,zh-Hant;q=0.7,ms;q=0.5,*;q=0.1'
+LANGS = ['en', 'en-GB', 'en-US', 'zh', 'zh-Hant', 'ms', 'ta', 'fr', 'Mandarin', 'Tamil']
+CONTEXTS = ['Legal', 'Work', 'School', 'Social', 'Gaming', 'Religious']
+
+
+def make_candidates(n, seed=7):
+    from core.languages import norm_lang
+
+    rnd = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for pk in range(1, n + 1):
+        lang = rnd.choice(LANGS)
+        rows.append((pk, lang, norm_lang(lang), rnd.choice(CONTEXTS), base + timedelta(seconds=rnd.randrange(10**7))))
+    return rows
+
+
+def naive_rank(rows, header, ctx, limit):
+    """Parse per call, loop every preference per candidate, sort everything."""
+    langs = []
+    for part in header.split(','):
+        item = part.strip()
+        lang, _, q = item.partition(';q=')
+        langs.append((lang.strip().lower(), float(q) if q else 1.0))
+    langs.sort(key=lambda x: x[1], reverse=True)
+    scored = []
+    for pk, language, _key, context, updated_at in rows:
+        score = 0.0
+        if ctx and context.lower() == ctx.lower():
+            score += 100
+        id_lang = language.lower()
+        for idx, (al, q) in enumerate(langs):
+            if id_lang == al:
+                score += 20 * q / (1 + idx * 0.1)
+                break
+            if id_lang.split('-')[0] == al.split('-')[0]:
+                score += 8 * q / (1 + idx * 0.1)
+        scored.append((score, updated_at, -pk))
+    scored.sort(reverse=True)
+    return [(-neg, s) for s, _, neg in scored[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    parse_cold = measure(lambda: compile_accept_language.__wrapped__(HEADER), repeat=2000)
+    parse_warm = measure(lambda: compile_accept_language(HEADER), repeat=2000)
+    results.append({
+        'case': 'parse header', 'candidates': 0,
+        'naive_ms': parse_cold['mean_ms'], 'ranked_ms': parse_warm['mean_ms'],
+    })
+
+    for size in args.sizes:
+        rows = make_candidates(size)
+        naive = measure(lambda: naive_rank(rows, HEADER, 'work', args.limit), repeat=args.repeat, warmup=1)
+        fast = measure(
+            lambda: rank_candidates(rows, compile_accept_language(HEADER), 'work', args.limit),
+            repeat=args.repeat, warmup=1,
+        )
+        results.append({
+            'case': f'top-{args.limit}', 'candidates': size,
+            'naive_ms': naive['p50_ms'], 'ranked_ms': fast['p50_ms'],
+        })
+
+    for r in results:
+        r['speedup'] = r['naive_ms'] / r['ranked_ms'] if r['ranked_ms'] else None
+        r['candidates_per_s'] = int(r['candidates'] / (r['ranked_ms'] / 1000)) if r['candidates'] else None
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['case', 'candidates', 'naive_ms', 'ranked_ms', 'speedup', 'candidates_per_s'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Concurrent reads and writes on SQLite: stock settings vs. the 'wal' profile.
+
+    python -m benchmarks.bench_sqlite --readers 4 --writers 2 --duration 10
+
+Reader and writer processes (separate processes, like separate server
+workers, so they contend for the database file rather than for the GIL) hit
+the full Django stack with the test client for --duration seconds:
+
+  readers  GET /api/identities/?page_size=50 and GET /api/profile/<name>/
+  writers  POST /api/identities/ and a 20-row POST /api/identities/import/
+
+Profiles:
+  default  rollback journal, no pragmas, a new connection per request
+  wal      SQLITE_PROFILE='wal' (core/sqlite.py): WAL, synchronous=NORMAL,
+           mmap, cache, busy_timeout, BEGIN IMMEDIATE, persistent connections
+
+Both profiles start from a copy of the same seeded database. "locked"
+counts requests that failed with "database is locked".
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+
+from benchmarks.common import percentile, print_table, setup_django
+
+PROFILES = {
+    'default': {'DJANGO_SQLITE_PROFILE': 'default', 'DJANGO_CONN_MAX_AGE': '0'},
+    'wal': {'DJANGO_SQLITE_PROFILE': 'wal', 'DJANGO_CONN_MAX_AGE': '600'},
+}
+IMPORT_ROWS = 20
+
+
+def seed(readers, writers, identities):
+    from django.contrib.auth.models import User
+    from core.models import Identity
+
+    users = []
+    for i in range(readers + writers):
+        user = User.objects.create_user(username=f'sqlite{i}', password='x')
+        Identity.objects.bulk_create(
+            Identity(user=user, display_name=f'sqlite{i} name {n}', context=('Legal', 'Work', 'School')[n % 3],
+                     language='en', language_key='en')
+            for n in range(identities)
+        )
+        users.append(user.pk)
+    return users
+
+
+def worker(role, profile, db_path, user_id, start_at, stop_at, results):
+    os.environ.update(PROFILES[profile])
+    setup_django(db_path, migrate=False)
+    from django.contrib.auth.models import User
+    from django.db import OperationalError
+    from rest_framework.test import APIClient
+
+    user = User.objects.get(pk=user_id)
+    client = APIClient()
+    client.force_authenticate(user)
+    if role == 'reader':
+        requests = [
+            lambda: client.get('/api/identities/?page_size=50'),
+            lambda: client.get(f'/api/profile/{user.username}/'),
+        ]
+    else:
+        rows = [{'display_name': f'import {n}', 'context': 'Work', 'language': 'en'} for n in range(IMPORT_ROWS)]
+        requests = [
+            lambda: client.post('/api/identities/', {'display_name': 'new', 'context': 'Work'}, format='json'),
+            lambda: client.post('/api/identities/import/', rows, format='json'),
+        ]
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    latencies, locked, failed, i = [], 0, 0, 0
+    while time.time() < stop_at:
+        t0 = time.perf_counter()
+        try:
+            response = requests[i % len(requests)]()
+            if response.status_code >= 300:
+                failed += 1
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+        else:
+            latencies.append((time.perf_counter() - t0) * 1000)
+        i += 1
+    results.put((role, latencies, locked, failed))
+
+
+def run(profile, db_path, users, readers, duration):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    start_at = time.time() + 5  # let every process finish importing Django
+    stop_at = start_at + duration
+    procs = [
+        ctx.Process(target=worker, args=('reader' if n < readers else 'writer', profile, db_path,
+                                         user_id, start_at, stop_at, results))
+        for n, user_id in enumerate(users)
+    ]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    out = []
+    for role in ('reader', 'writer'):
+        mine = [r for r in rows if r[0] == role]
+        latencies = [ms for r in mine for ms in r[1]]
+        out.append({
+            'profile': profile,
+            'role': role,
+            'processes': len(mine),
+            'req_per_s': len(latencies) / duration,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'locked': sum(r[2] for r in mine),
+            'failed': sum(r[3] for r in mine),
+        })
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--identities', type=int, default=200, help='seeded identities per user')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per profile')
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    # seed with stock settings: journal_mode=WAL would stick to the file
+    os.environ.update(PROFILES['default'])
+    seeded = setup_django()
+    users = seed(args.readers, args.writers, args.identities)
+    from django.db import connection
+    connection.close()
+
+    results = []
+    for profile in args.profiles:
+        db_path = os.path.join(os.path.dirname(seeded), f'{profile}.sqlite3')
+        shutil.copyfile(seeded, db_path)
+        results += run(profile, db_path, users, args.readers, args.duration)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, ['profile', 'role', 'processes', 'req_per_s', 'p50_ms', 'p95_ms', 'p99_ms',
+                              'locked', 'failed'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+"""
+Endpoint benchmark suite on seeded 10k / 100k / 1M identity datasets.
+
+    python -m benchmarks.bench_suite --sizes 10000 100000 --output results.json
+    python -m benchmarks.bench_suite --compare benchmarks/baseline.json
+
+Each size tier grows one scratch database (direct bulk inserts; no hashing,
+no signals) and then drives every endpoint through the full Django stack
+(URL routing, middleware, JWT auth) with the test client. Per endpoint it
+records latency (p50/p95/mean), query count, Python heap peak (tracemalloc)
+and response size.
+
+--output writes the results as JSON; --compare checks them against a stored
+run and exits 1 on a regression:
+
+  * latency: p50 more than --latency-tolerance above the baseline, and by
+    more than a 1 ms noise floor (latency baselines are machine-specific)
+  * queries: any increase
+  * memory:  peak more than --memory-tolerance above, and by over 64 KiB
+
+Refresh the stored baseline with `--output benchmarks/baseline.json` on the
+machine the comparisons run on. --keep-db DIR reuses a seeded database
+between runs, which matters for the 1M tier.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import ROOT, print_table, setup_django
+
+GIVEN = ['Wei', 'Jon', 'Aisyah', 'Kumar', 'Mei Ling', 'Ravi', 'Siti', 'Daniel', '志明', 'கவிதா']
+FAMILY = ['Tan', 'Lim', 'Rahman', 'Pillai', 'Wong', 'Abdullah', '陈', '李', 'முருகன்', 'Ng']
+CONTEXTS = ['Legal', 'Work', 'School', 'Social', 'Gaming', 'Religious']
+LANGUAGES = ['en', 'en-GB', 'zh', 'zh-Hant', 'ms', 'ta', 'Mandarin', 'Tamil']
+
+HEAVY_SHARE = 10           # the "heavy" user owns 1/10 of all identities
+PER_USER = 50              # everyone else owns this many
+IMPORT_ROWS = 1000
+BATCH_USERS = 50
+
+DEFAULT_BASELINE = ROOT / 'benchmarks' / 'baseline.json'
+LATENCY_FLOOR_MS = 1.0
+MEMORY_FLOOR_KB = 64
+
+
+# ---- seeding ----
+
+def _name(i):
+    return f'{GIVEN[i % len(GIVEN)]} {FAMILY[(i // len(GIVEN)) % len(FAMILY)]} {i}'
+
+
+def seed(target):
+    """Grow the dataset to `target` identities; returns seconds spent."""
+    from django.contrib.auth.models import User
+    from django.db import connection, transaction
+    from core.languages import norm_lang
+    from core.models import Identity, Profile
+
+    t0 = time.perf_counter()
+    with transaction.atomic():
+        if not User.objects.filter(username='heavy').exists():
+            for username, superuser in (('heavy', False), ('admin', True)):
+                user = User.objects.create(username=username, is_superuser=superuser, is_staff=superuser)
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+
+        heavy = User.objects.get(username='heavy')
+        have_heavy = Identity.objects.filter(user=heavy).count()
+        have_users = User.objects.filter(username__startswith='user').count()
+        start_id = (Identity.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+
+        def identity(user_id, i):
+            lang = LANGUAGES[i % len(LANGUAGES)]
+            return Identity(
+                user_id=user_id, display_name=_name(i), context=CONTEXTS[(i * 7) % len(CONTEXTS)],
+                language=lang, language_key=norm_lang(lang),
+            )
+
+        rows = [identity(heavy.pk, have_heavy + i) for i in range(max(target // HEAVY_SHARE - have_heavy, 0))]
+        Identity.objects.bulk_create(rows, batch_size=2000)
+
+        missing = target - Identity.objects.count()
+        new_users = max((missing + PER_USER - 1) // PER_USER, 0)
+        users = User.objects.bulk_create(
+            [User(username=f'user{have_users + n:07d}', password='!') for n in range(new_users)], batch_size=2000,
+        )
+        Profile.objects.bulk_create(
+            [Profile(user=u, display_label=_name(have_users + n)) for n, u in enumerate(users)], batch_size=2000,
+        )
+        batch = []
+        for n, user in enumerate(users):
+            for k in range(min(PER_USER, missing - n * PER_USER)):
+                batch.append(identity(user.pk, (have_users + n) * PER_USER + k))
+            if len(batch) >= 20000:
+                Identity.objects.bulk_create(batch, batch_size=2000)
+                batch = []
+        Identity.objects.bulk_create(batch, batch_size=2000)
+
+        # auto_now stamps every row alike; spread them so recency ordering means something
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE core_identity SET updated_at = datetime(updated_at, '-' || (id * 37 % 1000003) || ' seconds') "
+                "WHERE id >= %s", [start_id],
+            )
+
+    from django.core.management import call_command
+    from io import StringIO
+    call_command('rebuild_search_index', stdout=StringIO())
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return time.perf_counter() - t0
+
+
+# ---- endpoints ----
+
+def endpoints(client_for):
+    """(name, repeat scale, call, before) per endpoint; `before` runs untimed ahead of each call."""
+    from django.core.cache import cache
+    from django.contrib.auth.models import User
+    from core.models import Identity
+    from core.pagination import IdentityCursorPagination
+
+    heavy = User.objects.get(username='heavy')
+    typical = User.objects.filter(username__startswith='user').order_by('id').values_list('username', flat=True)
+    typical_name = typical.first()
+    batch_names = ','.join(typical[:BATCH_USERS])
+    deep = (
+        Identity.objects.filter(user=heavy).order_by('-updated_at', '-id')
+        .values_list('updated_at', 'id')[Identity.objects.filter(user=heavy).count() * 2 // 3]
+    )
+    deep_cursor = IdentityCursorPagination.encode_cursor(*deep)
+    as_heavy, as_admin, anonymous = client_for('heavy'), client_for('admin'), client_for(None)
+    import_body = json.dumps([
+        {'display_name': _name(i), 'context': 'Work', 'language': 'en'} for i in range(IMPORT_ROWS)
+    ])
+
+    def uncached():
+        cache.clear()
+
+    def rolled_back(fn):
+        # keep the dataset the same size from run to run
+        from django.db import transaction
+
+        def call():
+            with transaction.atomic():
+                response = fn()
+                transaction.set_rollback(True)
+            return response
+        return call
+
+    return [
+        ('identity_list', 1.0, lambda: as_heavy.get('/api/identities/'), None),
+        ('identity_list_deep', 1.0, lambda: as_heavy.get(f'/api/identities/?cursor={deep_cursor}'), None),
+        ('identity_list_admin', 1.0, lambda: as_admin.get('/api/identities/?page_size=200'), None),
+        ('export_json', 0.1, lambda: as_heavy.get('/api/identities/export/'), None),
+        ('export_ndjson', 0.1, lambda: as_heavy.get('/api/identities/export/?format=ndjson'), None),
+        ('import', 0.2, rolled_back(lambda: as_heavy.post(
+            '/api/identities/import/', import_body, content_type='application/json')), None),
+        ('lookup_best', 1.0, lambda: anonymous.get('/api/public/lookup/heavy/?al=zh&context=work'), uncached),
+        ('lookup_best_cached', 1.0, lambda: anonymous.get('/api/public/lookup/heavy/?al=zh&context=work'), None),
+        ('lookup_list', 1.0, lambda: anonymous.get(f'/api/public/lookup/{typical_name}/?mode=list'), uncached),
+        ('lookup_ranked', 0.2, lambda: anonymous.get('/api/public/lookup/heavy/?mode=ranked&al=ms,en;q=0.5'),
+         uncached),
+        ('public_batch', 1.0, lambda: anonymous.get(f'/api/public/batch/?usernames={batch_names}'), uncached),
+        ('public_profile', 1.0, lambda: anonymous.get(f'/api/profile/{typical_name}/'), uncached),
+        ('search_users', 1.0, lambda: as_heavy.get('/api/users/search/?q=aisyah'), None),
+    ]
+
+
+def body_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def run_endpoint(call, before, repeat):
+    from django.db import connection
+
+    def once():
+        if before:
+            before()
+        t0 = time.perf_counter()
+        response = call()
+        body_size(response)  # streamed bodies are produced while being read
+        elapsed = (time.perf_counter() - t0) * 1000
+        assert response.status_code < 300, response.status_code
+        return elapsed
+
+    once()  # warm up
+    samples = [once() for _ in range(repeat)]
+    samples.sort()
+
+    # counted at the cursor: the test client's request_started resets
+    # connection.queries_log mid-request, which CaptureQueriesContext can't see past
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    if before:
+        before()
+    with connection.execute_wrapper(count):
+        size = body_size(call())
+
+    if before:
+        before()
+    tracemalloc.start()
+    try:
+        body_size(call())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'mean_ms': statistics.fmean(samples),
+        'queries': queries,
+        'peak_kb': peak / 1024,
+        'bytes': size,
+    }
+
+
+# ---- baseline comparison ----
+
+def compare(results, baseline, latency_tolerance, memory_tolerance):
+    """Regression messages for results that got worse than the baseline."""
+    base = {(r['size'], r['endpoint']): r for r in baseline['results']}
+    problems = []
+    for r in results:
+        b = base.get((r['size'], r['endpoint']))
+        if b is None:
+            continue
+        label = f"{r['endpoint']} @ {r['size']}"
+        if r['p50_ms'] > b['p50_ms'] * (1 + latency_tolerance) and r['p50_ms'] - b['p50_ms'] > LATENCY_FLOOR_MS:
+            problems.append(f"{label}: p50 {b['p50_ms']:.2f} -> {r['p50_ms']:.2f} ms")
+        if r['queries'] > b['queries']:
+            problems.append(f"{label}: queries {b['queries']} -> {r['queries']}")
+        if r['peak_kb'] > b['peak_kb'] * (1 + memory_tolerance) and r['peak_kb'] - b['peak_kb'] > MEMORY_FLOOR_KB:
+            problems.append(f"{label}: peak memory {b['peak_kb']:.0f} -> {r['peak_kb']:.0f} KiB")
+    return problems
+
+
+def environment():
+    import django
+    try:
+        import orjson
+        orjson_version = orjson.__version__
+    except ImportError:
+        orjson_version = None
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'orjson': orjson_version,
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=20, help='timed calls per endpoint (scaled down for heavy ones)')
+    parser.add_argument('--only', nargs='+', metavar='ENDPOINT', help='run only these endpoints')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', nargs='?', const=str(DEFAULT_BASELINE), metavar='BASELINE',
+                        help=f'compare against a stored run (default {DEFAULT_BASELINE.relative_to(ROOT)})')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25)
+    parser.add_argument('--memory-tolerance', type=float, default=0.25)
+    parser.add_argument('--keep-db', metavar='DIR', help='keep (and reuse) the seeded database in DIR')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    db_path = None
+    if args.keep_db:
+        os.makedirs(args.keep_db, exist_ok=True)
+        db_path = os.path.join(args.keep_db, 'bench-suite.sqlite3')
+    setup_django(db_path)
+
+    from django.test import Client
+    from core.models import Identity
+    from core.serializers import ClaimsTokenObtainPairSerializer
+    from django.contrib.auth.models import User
+
+    def client_for(username):
+        if username is None:
+            return Client()
+        token = ClaimsTokenObtainPairSerializer.get_token(User.objects.get(username=username)).access_token
+        return Client(headers={'Authorization': f'Bearer {token}'})
+
+    results = []
+    for size in sorted(args.sizes):
+        if Identity.objects.count() > size:
+            print(f'skipping {size}: the database already holds more identities', file=sys.stderr)
+            continue
+        seconds = seed(size)
+        print(f'seeded {size} identities in {seconds:.1f}s', file=sys.stderr)
+        for name, scale, call, before in endpoints(client_for):
+            if args.only and name not in args.only:
+                continue
+            stats = run_endpoint(call, before, max(3, int(args.repeat * scale)))
+            results.append({'size': size, 'endpoint': name, **stats})
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+            fh.write('\n')
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(results, ['size', 'endpoint', 'p50_ms', 'p95_ms', 'mean_ms', 'queries', 'peak_kb', 'bytes'])
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            problems = compare(results, json.load(fh), args.latency_tolerance, args.memory_tolerance)
+        for problem in problems:
+            print(f'REGRESSION {problem}', file=sys.stderr)
+        if problems:
+            sys.exit(1)
+        print(f'no regressions against {args.compare}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
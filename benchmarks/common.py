@@ -0,0 +1,78 @@
+"""
+Shared setup for the benchmark scripts.
+
+Each script runs against a throwaway SQLite file with the project's
+migrations applied, so it never touches db.sqlite3. Run them from the
+repository root, e.g. `python -m benchmarks.bench_public_lookup`.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None, migrate=True):
+    """Point Django at a scratch database and migrate it. Returns the DB path."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'c3070_final.settings')
+
+    from django.conf import settings
+
+    path = db_path or os.path.join(tempfile.mkdtemp(prefix='c3070-bench-'), 'bench.sqlite3')
+    # must happen before the first connection is opened
+    settings.DATABASES['default']['NAME'] = path
+    settings.DEBUG = False  # don't let connection.queries grow unbounded
+    settings.ALLOWED_HOSTS = ['testserver', 'localhost']
+
+    import django
+    django.setup()
+
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+    return path
+
+
+def measure(fn, repeat=50, warmup=3):
+    """Call fn repeatedly; return latency stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        'n': repeat,
+        'mean_ms': statistics.fmean(samples),
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def percentile(samples, pct):
+    """pct-th percentile of an unsorted list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def print_table(rows, columns):
+    """Print a list of dicts as an aligned text table."""
+    widths = {c: max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    for r in rows:
+        print('  '.join(_fmt(r.get(c)).ljust(widths[c]) for c in columns))
+
+
+def _fmt(v):
+    if isinstance(v, float):
+        return f'{v:.2f}'
+    return '' if v is None else str(v)
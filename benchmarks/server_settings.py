@@ -0,0 +1,16 @@
+"""
+Settings for benchmark servers started as subprocesses (see bench_asgi.py):
+the project settings pointed at the scratch database in BENCH_DB.
+"""
+import os
+
+from c3070_final.settings import *  # noqa: F401,F403
+from c3070_final.settings import DATABASES
+
+DATABASES['default']['NAME'] = os.environ['BENCH_DB']
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+# bench_asgi.py --no-middleware
+if os.environ.get('BENCH_NO_MIDDLEWARE'):
+    MIDDLEWARE = []
@@ -12,5 +12,20 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'c3070_final.settings')
+# Django advises against persistent connections under ASGI: each request
+# may run on a different thread, which keeps its own connection
+os.environ.setdefault('DJANGO_CONN_MAX_AGE', '0')
 
-application = get_asgi_application()
+# set up Django before importing consumers, which import models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from core.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    # live identity/profile updates (see core/live.py)
+    'websocket': AllowedHostsOriginValidator(URLRouter(websocket_urlpatterns)),
+})
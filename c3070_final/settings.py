@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,9 +32,14 @@ ALLOWED_HOSTS = []
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Square avatar renditions (px) rendered in the background after an upload
+AVATAR_RENDITION_SIZES = (64, 128, 256)
+AVATAR_RENDITION_WORKERS = 2
+
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver, so the dev server also speaks WebSocket
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -43,6 +49,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'drf_yasg', 
+    'channels',
     'core',
 ]
 
@@ -53,26 +60,79 @@ SWAGGER_SETTINGS = {
             'name': 'Authorization',
             'in': 'header',
         }
-    }
+    },
+    # the UI fetches the document generate_openapi wrote (see core.openapi)
+    'SPEC_URL': 'openapi-schema',
+    'USE_SESSION_AUTH': False,
 }
+REDOC_SETTINGS = {'SPEC_URL': 'openapi-schema'}
+
+# Written by `manage.py generate_openapi` at build time; served at /openapi.json
+OPENAPI_SCHEMA_PATH = BASE_DIR / 'openapi.json'
+OPENAPI_MAX_AGE = 3600
 
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',  # first, so its timing covers the rest
+    'core.ratelimit.RateLimitMiddleware',  # refuses floods before any other work
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',  # WhiteNoise; answers /static/ before sessions or auth
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.routers.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-view latency / SQL / size metrics (core/metrics.py), scraped from
+# /metrics by Prometheus. None lets any client address read /metrics.
+# Server-Timing headers expose per-request SQL counts, so only under DEBUG.
+METRICS_ENABLED = True
+METRICS_SERVER_TIMING = DEBUG
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Token-bucket limits and load shedding for the anonymous endpoints
+# (core/ratelimit.py), keyed by URL name. 'ip' / 'username': (tokens per
+# second, burst); 'concurrency': requests one worker runs at once (503 past it).
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_STORE = 'cache'  # 'cache' is shared by workers; 'local' is per process
+RATE_LIMIT_IP_HEADER = None  # e.g. 'HTTP_X_FORWARDED_FOR' behind a reverse proxy
+RATE_LIMITS = {
+    'token_obtain_pair': {'methods': ['POST'], 'ip': (1.0, 20), 'username': (0.2, 10), 'concurrency': 4},
+    'public_identity_lookup': {'ip': (20.0, 100), 'concurrency': 64},
+    'public_profile': {'ip': (20.0, 100), 'concurrency': 64},
+    'public_batch': {'ip': (5.0, 20), 'concurrency': 16},
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
     )
 }
 
+# Access tokens carry username/role/rv claims so reads skip the user lookup
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'core.serializers.ClaimsTokenObtainPairSerializer',
+}
+
+# How token logins record last_login: 'off' (like simplejwt's default),
+# 'sync' or 'deferred' (batched off the request path every
+# LAST_LOGIN_FLUSH_INTERVAL seconds). Ignored when SIMPLE_JWT['UPDATE_LAST_LOGIN'] is on.
+LAST_LOGIN_UPDATE = os.environ.get('DJANGO_LAST_LOGIN_UPDATE', 'off')
+LAST_LOGIN_FLUSH_INTERVAL = 5.0
+
+# Identity list pagination (keyset on updated_at, id); clients may pass ?page_size=
+IDENTITY_PAGE_SIZE = 50
+IDENTITY_MAX_PAGE_SIZE = 200
+
+# Bulk import writes this many identities per INSERT
+IDENTITY_IMPORT_BATCH_SIZE = 1000
+
+# Streaming export reads rows from the DB this many at a time
+IDENTITY_EXPORT_CHUNK_SIZE = 2000
+
 ROOT_URLCONF = 'c3070_final.urls'
 
 TEMPLATES = [
@@ -92,18 +152,129 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'c3070_final.wsgi.application'
+ASGI_APPLICATION = 'c3070_final.asgi.application'
+
+# Live updates over WebSockets (core/live.py). The in-memory layer only
+# reaches sockets in the same process; set DJANGO_CHANNEL_REDIS_URL in
+# production so every ASGI worker shares one layer.
+if os.environ.get('DJANGO_CHANNEL_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.environ['DJANGO_CHANNEL_REDIS_URL']]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite tuning (core/sqlite.py): 'wal' runs WAL / synchronous=NORMAL / mmap /
+# cache / busy_timeout pragmas on every connection and takes the write lock up
+# front (BEGIN IMMEDIATE) so concurrent writers queue instead of failing with
+# "database is locked"; 'default' keeps SQLite's stock behaviour.
+SQLITE_PROFILE = os.environ.get('DJANGO_SQLITE_PROFILE', 'wal')
+# Per-pragma overrides on top of the profile, e.g. {'busy_timeout': 10000}
+SQLITE_PRAGMAS = {}
+
+# Django advises against persistent connections under ASGI: each request may
+# run on a different thread, which keeps its own connection. asgi.py sets
+# DJANGO_CONN_MAX_AGE=0 before loading settings; `manage.py runserver` is
+# daphne's ASGI server here but loads settings first, so it is caught here.
+ASGI_RUNSERVER = sys.argv[1:2] == ['runserver'] and 'daphne' in INSTALLED_APPS
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # persistent connections under WSGI: the pragmas run once per
+        # connection, not per request. 0 under ASGI (see above).
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', '0' if ASGI_RUNSERVER else '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'} if SQLITE_PROFILE == 'wal' else {},
     }
 }
 
+# Read replicas (core/routers.py): the public GET endpoints read from these
+# aliases unless the client or the data's owner wrote in the last
+# REPLICA_PIN_SECONDS, which must exceed the replicas' lag. Lookups read from
+# a replica are cached for at most REPLICA_CACHE_TIMEOUT seconds.
+# Local setup: DJANGO_REPLICA_DB=/path/replica.sqlite3 adds a second SQLite
+# file as 'replica'; `python manage.py sync_replica` copies the primary into it.
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = []
+if os.environ.get('DJANGO_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DJANGO_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+REPLICA_PIN_SECONDS = 10
+REPLICA_CACHE_TIMEOUT = 60
+
+
+# Cache
+# Local memory under DEBUG, Redis otherwise, so every worker shares the same
+# entries (ETags, version counters, role versions, rate limits). Override with
+# DJANGO_CACHE_BACKEND/LOCATION, e.g. for memcached.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', (
+            'django.core.cache.backends.locmem.LocMemCache' if DEBUG
+            else 'django.core.cache.backends.redis.RedisCache'
+        )),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'c3070' if DEBUG else 'redis://127.0.0.1:6379/1'),
+    }
+}
+
+# A process-local cache only sees its own worker's writes: per-user version
+# counters then expire after USER_VERSION_TIMEOUT seconds, which bounds how long
+# other workers serve stale lookups. Outside DEBUG, the core.E001 system check
+# refuses a process-local cache; turn CACHE_REQUIRE_SHARED off for a
+# single-process deployment.
+CACHE_REQUIRE_SHARED = os.environ.get('DJANGO_CACHE_REQUIRE_SHARED', '0' if DEBUG else '1') == '1'
+USER_VERSION_TIMEOUT = 300
+# Counters are created for any username a client asks about; in a shared
+# cache they still expire, so probing unknown names can't grow it for good.
+USER_VERSION_SHARED_TIMEOUT = 60 * 60 * 24
+
+# Public lookup responses are invalidated by per-user version bumps; the
+# timeout only bounds how long unused entries linger.
+PUBLIC_LOOKUP_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Default number of results for /api/public/lookup/<username>/?mode=ranked (max 100)
+PUBLIC_LOOKUP_RANKED_LIMIT = 10
+
+# Most usernames one /api/public/batch/ request may resolve
+PUBLIC_BATCH_MAX_USERNAMES = 50
+
+# Serve public_profile, public_identity_lookup and search_users from the async
+# views in core/async_views.py. Opt-in, and only useful under ASGI.
+ASYNC_READ_VIEWS = os.environ.get('DJANGO_ASYNC_READ_VIEWS', '0') == '1'
+
+
+# Password hashing. pbkdf2_sha256 runs on a pool of PASSWORD_HASH_WORKERS
+# processes at PASSWORD_HASH_NICE (core/hashers.py); 0 hashes on the request
+# thread. Past PASSWORD_HASH_QUEUE_LIMIT waiting hashes, or after
+# PASSWORD_HASH_TIMEOUT seconds, logins and registrations get 503.
+PASSWORD_HASHERS = [
+    'core.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_WORKERS = int(os.environ.get('DJANGO_PASSWORD_HASH_WORKERS', '0'))
+PASSWORD_HASH_QUEUE_LIMIT = 32
+PASSWORD_HASH_TIMEOUT = 5.0
+PASSWORD_HASH_NICE = 10
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -143,6 +314,21 @@ STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [BASE_DIR / "core/static"]
 
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Content-hashed, gzip/brotli-precompressed files from `collectstatic`, served
+# immutable (core/staticfiles.py). Needs collectstatic before the server
+# starts, so it is off under DEBUG unless DJANGO_STATIC_MANIFEST=1.
+STATIC_MANIFEST = os.environ.get('DJANGO_STATIC_MANIFEST', '0' if DEBUG else '1') == '1'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
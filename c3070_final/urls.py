@@ -20,56 +20,25 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from django.conf import settings
 from django.conf.urls.static import static
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Identity API",
-        default_version='v1',
-        description="API for context-sensitive identity management",
-    ),
-    public=True,
-    authentication_classes=[],
-    permission_classes=(permissions.AllowAny,),
-)
-
-
+from core.metrics import metrics_view
+from core.openapi import openapi_schema, redoc_ui, swagger_ui
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/', include('core.urls')),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape target
 
-    # Swagger UI
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # API docs, from the document `manage.py generate_openapi` writes
+    path('openapi.json', openapi_schema, name='openapi-schema'),
+    path('swagger/', swagger_ui, name='schema-swagger-ui'),
+    path('redoc/', redoc_ui, name='schema-redoc'),
 ]
 
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Identity API",
-        default_version='v1',
-        description="API for context-sensitive identity management",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
 
-swagger_settings = {
-    'SECURITY_DEFINITIONS': {
-        'Bearer': {
-            'type': 'apiKey',
-            'name': 'Authorization',
-            'in': 'header'
-        }
-    },
-}
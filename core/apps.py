@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from . import checks  # noqa: F401  registers the system checks
+        from .metrics import install_sql_counter
+        from .sqlite import apply_pragmas
+
+        for receiver in (apply_pragmas, install_sql_counter):
+            connection_created.connect(receiver, dispatch_uid=f'{receiver.__module__}.{receiver.__name__}')
+        for connection in connections.all(initialized_only=True):
+            install_sql_counter(connection=connection)
+            if connection.connection is not None:
+                apply_pragmas(connection=connection)
@@ -0,0 +1,147 @@
+"""
+Async versions of the public read endpoints, for ASGI deployments.
+
+Under ASGI a sync DRF view costs a thread hop for the whole request; these
+run on the event loop and only leave it for the queries themselves (Django's
+async ORM) and the cache (its a* methods). Responses match the views in
+views.py, including the 401 for a bad Bearer token on the public endpoints;
+DRF's browsable API and OPTIONS handling are not offered. urls.py routes to
+these when ASYNC_READ_VIEWS is on (DJANGO_ASYNC_READ_VIEWS=1).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from . import search
+from .authentication import ClaimsJWTAuthentication
+from .cache import aget_user_version, lookup_cache_key, lookup_cache_timeout
+from .conditional import avalidators_for, not_modified, with_validators
+from .models import Profile
+from .routers import replica_reads
+from .serializers import ProfileSerializer, identity_row
+from .views import (
+    _lookup_params, _lookup_queryset, _lookup_response, _lookup_variant, _owner_queryset,
+    _rank_identities, _ranked_params, _search_queryset, _search_response,
+)
+
+
+def _error(data, status, **headers):
+    # rendered the way DRF's exception handler would
+    response = HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def _not_found(message):
+    return _error({'detail': message}, 404)
+
+
+async def _authenticate(request, required=False):
+    """
+    DRF's authentication step: (auth, None), or (None, the 401 to return).
+
+    A bad or expired Bearer token is refused even where no login is required,
+    as DRF does; `auth` is None for anonymous requests.
+    """
+    authenticator = ClaimsJWTAuthentication()
+    challenge = {'WWW-Authenticate': authenticator.authenticate_header(request)}
+    try:
+        auth = await authenticator.aauthenticate_read(request)
+    except (AuthenticationFailed, InvalidToken) as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+        return None, _error(detail, 401, **challenge)
+    if auth is None and required:
+        return None, _error({'detail': 'Authentication credentials were not provided.'}, 401, **challenge)
+    return auth, None
+
+
+@replica_reads
+@require_GET
+async def public_profile(request, username):
+    _, refused = await _authenticate(request)
+    if refused is not None:
+        return refused
+    etag, modified = await avalidators_for(request, username)
+    cached = not_modified(request, etag, modified)
+    if cached is not None:
+        return cached
+    prof = await (
+        Profile.objects.select_related('user', 'preferred_identity').filter(user__username=username).afirst()
+    )
+    if prof is None:
+        return _not_found("No Profile matches the given query.")
+    serializer = ProfileSerializer(prof, context={'request': request})
+    return with_validators(JsonResponse(serializer.data, status=200), etag, modified)
+
+
+async def _alookup_identities(username, ctx, requested_primary, mode_out):
+    """_lookup_identities on the async ORM."""
+    values = [v async for v in _lookup_queryset(username, ctx, requested_primary, mode_out)]
+    if values:
+        owner = values[0]['user__username']
+    else:
+        owner = await _owner_queryset(username).afirst()
+        if owner is None:
+            raise Http404("No User matches the given query.")
+    return owner, [identity_row(v) for v in values]
+
+
+@replica_reads
+@require_GET
+async def public_identity_lookup(request, username):
+    _, refused = await _authenticate(request)
+    if refused is not None:
+        return refused
+    mode, vary, variant = _lookup_variant(request)
+    etag, modified = await avalidators_for(request, username, variant)
+    cached = not_modified(request, etag, modified)
+    if cached is not None:
+        return cached
+
+    ctx, raw_lang, requested_langs, requested_primary = _lookup_params(request)
+    try:
+        if mode == 'ranked':
+            version = await aget_user_version(username)
+            prefs, limit, key = _ranked_params(request, username, ctx, raw_lang, version)
+            hit = await cache.aget(key)
+            if hit is None:
+                # scoring streams rows through rank_candidates; keep it on one thread
+                hit = await sync_to_async(_rank_identities)(username, ctx, prefs, limit)
+                await cache.aset(key, hit, lookup_cache_timeout())
+            languages, mode_out = prefs.tags, 'ranked'
+        else:
+            mode_out = 'best' if mode == 'best' else 'list'
+            key = lookup_cache_key(username, await aget_user_version(username), ctx, requested_primary, mode_out)
+            hit = await cache.aget(key)
+            if hit is None:
+                hit = await _alookup_identities(username, ctx, requested_primary, mode_out)
+                await cache.aset(key, hit, lookup_cache_timeout())
+            languages = requested_langs
+    except Http404 as exc:
+        return _not_found(str(exc))
+
+    owner, data = hit
+    return with_validators(_lookup_response(owner, ctx, languages, mode_out, data), etag, modified, vary=vary)
+
+
+@replica_reads
+@require_GET
+async def search_users(request):
+    _, refused = await _authenticate(request, required=True)
+    if refused is not None:
+        return refused
+
+    q = (request.GET.get('q') or '').strip().lower()
+    if len(q) >= search.MIN_QUERY_LENGTH and search.fts_available():
+        # raw FTS5 SQL has no async API
+        ids = await sync_to_async(search.search_user_ids)(q, limit=20)
+        found = await User.objects.select_related('profile').ain_bulk(ids)
+        users = [found[i] for i in ids if i in found]
+    else:
+        users = [u async for u in _search_queryset(q)[:20]]
+    return _search_response(users)
@@ -0,0 +1,128 @@
+"""
+Stateless JWT authentication.
+
+Access tokens issued by ClaimsTokenObtainPairSerializer carry `username`,
+`role` and `rv` (the profile's role version) next to `user_id`. For safe
+(read-only) requests the user is rebuilt from those claims without touching
+auth_user or core_profile; requests that mutate still load the real User.
+
+A role change bumps Profile.role_version, and any token whose `rv` no longer
+matches is rejected. The current version is read from the cache, falling
+back to one indexed query on a miss; with a process-local cache, which would
+miss other workers' role changes, it is always that query. Like simplejwt's TokenUser, the read
+path doesn't re-check is_active; deactivation takes effect on writes and once
+the (short-lived) access token expires.
+"""
+from asgiref.sync import sync_to_async
+from django.db import router
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import acache_role_version, aget_cached_role_version, cache_role_version, get_cached_role_version
+from .models import Profile
+
+CLAIMS = ('username', 'role', 'rv')
+
+
+class ClaimsUser(TokenUser):
+    """Request user backed only by token claims."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', 'user')
+
+
+def _role_versions(user_id):
+    # from the primary: a lagging replica could still hold the old version
+    return Profile.objects.using(router.db_for_write(Profile)).filter(user_id=user_id).values_list(
+        'role_version', flat=True,
+    )
+
+
+def current_role_version(user_id):
+    version = get_cached_role_version(user_id)
+    if version is None:
+        version = _role_versions(user_id).first()
+        if version is None:
+            return 0  # no profile yet; matches what the token serializer issues
+        cache_role_version(user_id, version)
+    return version
+
+
+async def acurrent_role_version(user_id):
+    version = await aget_cached_role_version(user_id)
+    if version is None:
+        version = await _role_versions(user_id).afirst()
+        if version is None:
+            return 0
+        await acache_role_version(user_id, version)
+    return version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+
+        if not all(claim in token for claim in CLAIMS):
+            # issued before claims were added: plain database-backed auth
+            return self.get_user(token), token
+
+        try:
+            user_id = token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if current_role_version(user_id) != token['rv']:
+            raise AuthenticationFailed("Role changed; please log in again.", code="token_not_valid")
+
+        if request.method in SAFE_METHODS:
+            return ClaimsUser(token), token
+        return self.get_user(token), token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        # warm the profile so role checks on mutating requests cost nothing extra
+        try:
+            user._cached_role = user.profile.role
+        except Profile.DoesNotExist:
+            pass
+        return user
+
+    async def aauthenticate_read(self, request):
+        """
+        authenticate() for the async read views: (user, token) or None.
+
+        Tokens with claims cost no query beyond a role-version cache miss;
+        older tokens load the user through the sync path.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return await self.aauthenticate_token(raw_token)
+
+    async def aauthenticate_token(self, raw_token):
+        """Read-path checks for a raw access token from anywhere (e.g. a WebSocket query string)."""
+        token = self.get_validated_token(raw_token)
+
+        if not all(claim in token for claim in CLAIMS):
+            return await sync_to_async(self.get_user)(token), token
+        try:
+            user_id = token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if await acurrent_role_version(user_id) != token['rv']:
+            raise AuthenticationFailed("Role changed; please log in again.", code="token_not_valid")
+        return ClaimsUser(token), token
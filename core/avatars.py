@@ -0,0 +1,141 @@
+"""
+Avatar renditions.
+
+After an avatar upload the original is scaled into square WebP and JPEG
+renditions (AVATAR_RENDITION_SIZES, in px) on a small thread pool, so the
+upload request never waits on Pillow. When they are written,
+Profile.avatar_renditions maps each size to its files:
+
+    {"64": {"webp": "avatars/renditions/7/3f2a...-64.webp", "jpeg": "...-64.jpg"}, ...}
+
+The mapping stays empty until the worker finishes, and clients fall back to
+avatar_url meanwhile.
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from . import live
+from .cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+FORMATS = (
+    # (key, file extension, Pillow format, save options)
+    ('webp', 'webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_sizes():
+    return tuple(getattr(settings, 'AVATAR_RENDITION_SIZES', (64, 128, 256)))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'AVATAR_RENDITION_WORKERS', 2),
+                thread_name_prefix='avatar-renditions',
+            )
+        return _executor
+
+
+def schedule_renditions(profile, stale=None):
+    """
+    Queue rendition work for the profile's current avatar once the save
+    commits. `stale` is the renditions mapping of the replaced avatar; its
+    files are removed after the new ones are published.
+    """
+    pk, name = profile.pk, profile.avatar.name if profile.avatar else ''
+    transaction.on_commit(lambda: get_executor().submit(_render_in_worker, pk, name, stale))
+
+
+def _rendition_name(profile_pk, source_name, size, ext):
+    # keyed on the source name so a new upload never overwrites files still being served
+    digest = hashlib.sha1(source_name.encode('utf-8')).hexdigest()[:12]
+    return f'avatars/renditions/{profile_pk}/{digest}-{size}.{ext}'
+
+
+def _encode(image, fmt, options):
+    if fmt == 'JPEG' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buf = io.BytesIO()
+    image.save(buf, fmt, **options)
+    return buf.getvalue()
+
+
+def build_renditions(profile_pk, source_name):
+    """Write every size/format for source_name; returns the renditions mapping."""
+    with default_storage.open(source_name, 'rb') as fh:
+        with Image.open(fh) as original:
+            original.draft('RGB', (max(rendition_sizes()) * 2,) * 2)  # cheap JPEG downscale on decode
+            image = ImageOps.exif_transpose(original)
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    renditions = {}
+    for size in sorted(rendition_sizes(), reverse=True):
+        # center-crop to a square, the shape every avatar slot displays
+        thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        files = {}
+        for key, ext, fmt, options in FORMATS:
+            name = _rendition_name(profile_pk, source_name, size, ext)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            files[key] = default_storage.save(name, ContentFile(_encode(thumb, fmt, options)))
+        renditions[str(size)] = files
+        image = thumb  # the next, smaller size scales down from this one
+    return renditions
+
+
+def render_avatar(profile_pk, source_name, stale=None):
+    """Worker entry point: render, then publish unless the avatar changed meanwhile."""
+    from .models import Profile
+
+    try:
+        renditions = build_renditions(profile_pk, source_name) if source_name else {}
+        row = (
+            Profile.objects.filter(pk=profile_pk)
+            .values_list('avatar', 'avatar_renditions', 'user__username', 'user_id').first()
+        )
+        if row is None or (row[0] or '') != source_name:
+            _delete_files(renditions)  # superseded by a newer upload
+            return
+        _, previous, username, user_id = row
+        Profile.objects.filter(pk=profile_pk, avatar=source_name).update(avatar_renditions=renditions)
+        # .update() skips signals; the public profile/lookup caches key on this
+        bump_user_version(username)
+        live.profile_updated(profile_pk, user_id)
+        _delete_files(previous, keep=renditions)
+        _delete_files(stale, keep=renditions)
+    except Exception:
+        logger.exception('avatar renditions failed for profile %s', profile_pk)
+
+
+def _render_in_worker(profile_pk, source_name, stale):
+    try:
+        render_avatar(profile_pk, source_name, stale)
+    finally:
+        close_old_connections()
+
+
+def _delete_files(renditions, keep=None):
+    keep_names = {n for files in (keep or {}).values() for n in files.values()}
+    for files in (renditions or {}).values():
+        for name in files.values():
+            if name not in keep_names:
+                default_storage.delete(name)
@@ -0,0 +1,214 @@
+"""
+Versioned caching for public, per-user data.
+
+Every user has a version counter that is bumped whenever one of their
+identities or their profile changes (see the signal receivers in models.py).
+Cache keys embed the current version, so a bump makes every older entry
+unreachable at once: exact invalidation, no TTL tuning.
+
+Counters are created on first read, for any username a client asks about,
+so they always expire: a missing counter is reseeded from the clock, which
+only costs the next request a cache miss. In a shared cache they live for
+USER_VERSION_SHARED_TIMEOUT seconds (a day), which bounds the keys that
+probing unknown usernames can leave behind.
+
+Invalidation is only exact when every worker shares the cache. A
+process-local cache (LocMemCache) sees only its own process's bumps, so
+there the counters expire after USER_VERSION_TIMEOUT seconds, which caps
+how long another worker can serve stale entries or 304s. Outside DEBUG a
+process-local cache fails the core.E001 check.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from . import routers
+
+
+# '*' can't appear in a username; this counter moves with every user's
+ALL_USERS = '*'
+
+
+def _version_key(username):
+    return f'user-ver:{username}'
+
+
+def _modified_key(username):
+    return f'user-mod:{username}'
+
+
+def is_shared_cache():
+    """False when the default cache lives in this process only."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def version_timeout():
+    """How long a version counter lives: USER_VERSION_SHARED_TIMEOUT or USER_VERSION_TIMEOUT."""
+    if is_shared_cache():
+        return getattr(settings, 'USER_VERSION_SHARED_TIMEOUT', 60 * 60 * 24)
+    return getattr(settings, 'USER_VERSION_TIMEOUT', 300)
+
+
+def _seed():
+    # Seed from the clock so a counter that was evicted (or a restarted cache)
+    # never reuses a version number that older entries were stored under.
+    return time.time_ns() // 1000
+
+
+def get_user_version(username):
+    key = _version_key(username)
+    version = cache.get(key)
+    if version is None:
+        version = _seed()
+        if not cache.add(key, version, version_timeout()):
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_user_version(username):
+    """get_user_version() for the async views."""
+    key = _version_key(username)
+    version = await cache.aget(key)
+    if version is None:
+        version = _seed()
+        if not await cache.aadd(key, version, version_timeout()):
+            version = await cache.aget(key, version)
+    return version
+
+
+def get_user_versions(usernames):
+    """{username: version} for many users in one cache round trip."""
+    keys = {_version_key(name): name for name in usernames}
+    found = cache.get_many(list(keys))
+    versions = {keys[k]: v for k, v in found.items()}
+    for name in usernames:
+        if name not in versions:
+            versions[name] = get_user_version(name)
+    return versions
+
+
+def get_user_validators(username):
+    """
+    (version, last-modified unix time) for `username`, in one cache round trip.
+
+    The timestamp is only as old as the cache entry: when it is missing it is
+    recorded as "now", which at worst costs clients one full response. A
+    change within REPLICA_PIN_SECONDS moves the request's reads to the
+    primary, which a replica may not have caught up with.
+    """
+    vkey, mkey = _version_key(username), _modified_key(username)
+    found = cache.get_many([vkey, mkey])
+    version = found.get(vkey)
+    if version is None:
+        version = get_user_version(username)
+    modified = found.get(mkey)
+    if modified is None:
+        modified = int(time.time())
+        if not cache.add(mkey, modified, version_timeout()):
+            modified = cache.get(mkey, modified)
+    if time.time() - modified < routers.pin_seconds():
+        routers.use_primary()
+    return version, modified
+
+
+async def aget_user_validators(username):
+    """get_user_validators() for the async views."""
+    vkey, mkey = _version_key(username), _modified_key(username)
+    found = await cache.aget_many([vkey, mkey])
+    version = found.get(vkey)
+    if version is None:
+        version = await aget_user_version(username)
+    modified = found.get(mkey)
+    if modified is None:
+        modified = int(time.time())
+        if not await cache.aadd(mkey, modified, version_timeout()):
+            modified = await cache.aget(mkey, modified)
+    if time.time() - modified < routers.pin_seconds():
+        routers.use_primary()
+    return version, modified
+
+
+def _bump(username):
+    key, timeout = _version_key(username), version_timeout()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # no counter yet; a concurrent add may win, which is just as good
+        if not cache.add(key, _seed(), timeout):
+            cache.incr(key)
+    cache.set(_modified_key(username), int(time.time()), timeout)
+
+
+def bump_user_version(username):
+    """
+    Invalidate everything cached for `username`.
+
+    Bumps now and again once the surrounding transaction commits, so a reader
+    that raced the write cannot leave pre-commit data under the new version.
+    """
+    if not username:
+        return
+    for name in (username, ALL_USERS):
+        _bump(name)
+        transaction.on_commit(lambda name=name: _bump(name))
+
+
+def lookup_cache_key(username, version, ctx, languages, mode, extra=''):
+    params = '|'.join([ctx.lower(), ','.join(sorted(set(languages))), mode, extra])
+    digest = hashlib.md5(params.encode('utf-8')).hexdigest()
+    return f'lookup:{username}:{version}:{digest}'
+
+
+def lookup_cache_timeout():
+    timeout = getattr(settings, 'PUBLIC_LOOKUP_CACHE_TIMEOUT', 60 * 60 * 24)
+    if routers.read_alias() is not None:
+        # rows from a lagging replica may sit under the newest version
+        timeout = min(timeout, getattr(settings, 'REPLICA_CACHE_TIMEOUT', 60))
+    return timeout
+
+
+# ---- role versions for stateless token auth ----
+
+def _role_version_key(user_id):
+    return f'role-ver:{user_id}'
+
+
+# A role change must reach every worker at once, so a process-local cache
+# never answers for role versions: every token check reads the database.
+
+def get_cached_role_version(user_id):
+    if not is_shared_cache():
+        return None
+    return cache.get(_role_version_key(user_id))
+
+
+async def aget_cached_role_version(user_id):
+    if not is_shared_cache():
+        return None
+    return await cache.aget(_role_version_key(user_id))
+
+
+def cache_role_version(user_id, version):
+    if is_shared_cache():
+        cache.set(_role_version_key(user_id), version, None)
+
+
+async def acache_role_version(user_id, version):
+    if is_shared_cache():
+        await cache.aset(_role_version_key(user_id), version, None)
+
+
+def remember_role_version(user_id, version):
+    """
+    Publish a profile's role version after a save.
+
+    The entry is dropped now (readers fall back to the database) and only
+    set once the transaction commits, so a rollback never leaves a version
+    in the cache that the database doesn't have.
+    """
+    cache.delete(_role_version_key(user_id))
+    transaction.on_commit(lambda: cache_role_version(user_id, version))
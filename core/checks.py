@@ -0,0 +1,21 @@
+"""
+System checks for the project's deployment assumptions.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .cache import is_shared_cache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Version counters, role versions and rate limits need one cache for every worker."""
+    if not getattr(settings, 'CACHE_REQUIRE_SHARED', False) or is_shared_cache():
+        return []
+    return [Error(
+        'The default cache is process-local (LocMemCache).',
+        hint='Point DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION at Redis or memcached, '
+             'or set CACHE_REQUIRE_SHARED = False for a single-process deployment.',
+        obj='CACHES',
+        id='core.E001',
+    )]
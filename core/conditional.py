@@ -0,0 +1,60 @@
+"""
+Conditional GETs (ETag / Last-Modified) for per-user data.
+
+Validators come from the per-user version counter in core/cache.py, which
+is bumped on every identity, profile or username change. Checking
+If-None-Match / If-Modified-Since therefore costs one cache round trip and
+happens before any query or serialization.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .cache import aget_user_validators, get_user_validators
+
+
+def validators_for(request, owner, *variant):
+    """
+    (etag, last_modified) for a response built from `owner`'s data.
+
+    The tag covers the full URL and any `variant` values the body depends on
+    (viewer, negotiated format, headers), so different views of the same
+    data never share a tag.
+    """
+    version, modified = get_user_validators(owner)
+    return _etag(request, version, variant), modified
+
+
+async def avalidators_for(request, owner, *variant):
+    """validators_for() for the async views."""
+    version, modified = await aget_user_validators(owner)
+    return _etag(request, version, variant), modified
+
+
+def _etag(request, version, variant):
+    parts = [request.build_absolute_uri(), *(str(v) for v in variant)]
+    digest = hashlib.md5('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 to return as-is, or None when the client copy is stale."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None and response.status_code == 304:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def with_validators(response, etag, last_modified, private=False, vary=()):
+    """Attach the validators; `vary` names request headers the body depends on."""
+    if response.status_code == 200:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # revalidate every time; the 304 path is cheap
+        response['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+        vary = (['Authorization'] if private else []) + list(vary)
+        if vary:
+            patch_vary_headers(response, vary)
+    return response
@@ -0,0 +1,86 @@
+"""
+WebSocket consumer for live identity/profile updates (see core/live.py).
+
+Browsers can't set an Authorization header on a WebSocket handshake, so the
+access token travels as the second of two subprotocols:
+
+    new WebSocket(url, ["bearer", token])
+
+The server answers with the "bearer" subprotocol only. Unlike a query
+string, the token doesn't end up in server or proxy access logs. It is
+checked like a REST read (signature, expiry, role version). The socket is
+read-only and is closed with CLOSE_UNAUTHORIZED when the token is missing,
+rejected or expires.
+
+A rejected token still gets its handshake accepted and is then closed:
+closing before accept() makes the server refuse the handshake (HTTP 403),
+which a browser only sees as close code 1006, and main.js could not tell
+it apart from a network error.
+"""
+import asyncio
+import time
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .authentication import ClaimsJWTAuthentication
+from .live import ADMINS_GROUP, user_group
+
+# close code for a rejected or expired token; main.js stops reconnecting on it
+CLOSE_UNAUTHORIZED = 4401
+
+AUTH_SUBPROTOCOL = 'bearer'
+
+
+def _raw_token(scope):
+    protocols = scope.get('subprotocols') or []
+    if len(protocols) == 2 and protocols[0] == AUTH_SUBPROTOCOL:
+        return protocols[1]
+    return ''
+
+
+def _subprotocol(scope):
+    # a browser drops a handshake that picks a subprotocol it didn't offer
+    return AUTH_SUBPROTOCOL if AUTH_SUBPROTOCOL in (scope.get('subprotocols') or []) else None
+
+
+def _role(user):
+    # a ClaimsUser carries the role claim; a legacy token's User was loaded with it
+    return getattr(user, 'role', None) or getattr(user, '_cached_role', 'user')
+
+
+class LiveUpdatesConsumer(AsyncWebsocketConsumer):
+    live_groups = ()
+
+    async def connect(self):
+        try:
+            user, token = await ClaimsJWTAuthentication().aauthenticate_token(_raw_token(self.scope))
+        except (AuthenticationFailed, InvalidToken):
+            await self.accept(_subprotocol(self.scope))
+            await self.close(code=CLOSE_UNAUTHORIZED)
+            return
+
+        self.is_admin = _role(user) == 'admin'
+        self.live_groups = [user_group(user.id)] + ([ADMINS_GROUP] if self.is_admin else [])
+        for group in self.live_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept(_subprotocol(self.scope))
+        self.expiry = asyncio.get_running_loop().call_later(
+            max(token['exp'] - time.time(), 0), lambda: asyncio.ensure_future(self.close(code=CLOSE_UNAUTHORIZED)),
+        )
+
+    async def disconnect(self, code):
+        if getattr(self, 'expiry', None) is not None:
+            self.expiry.cancel()
+        for group in self.live_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        pass  # nothing to receive; updates only flow server -> client
+
+    async def live_event(self, message):
+        # admins get every identity event from the admins group; skip the copy
+        # sent to their own user group
+        if self.is_admin and message['kind'] == 'identity' and message['group'] != ADMINS_GROUP:
+            return
+        await self.send(text_data=message['text'])
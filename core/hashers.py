@@ -0,0 +1,141 @@
+"""
+PBKDF2 password hashing off the request thread.
+
+PooledPBKDF2PasswordHasher is Django's pbkdf2_sha256 hasher (same algorithm
+name, same hashes) that, with PASSWORD_HASH_WORKERS > 0, runs the PBKDF2
+rounds on a process pool. Every password check goes through it: logins
+(including the dummy hash for unknown usernames), registration and
+password changes. A request waits for its hash without holding a core, and
+the pool's processes run at PASSWORD_HASH_NICE, so a login storm takes the
+CPU left over by the other requests instead of sharing it equally with them.
+
+The pool is bounded:
+
+- at most PASSWORD_HASH_QUEUE_LIMIT hashes are queued or running per
+  process; past that a request is refused at once
+- a hash not finished within PASSWORD_HASH_TIMEOUT seconds is abandoned
+
+Both raise HashingUnavailable, which DRF views answer with 503 and
+Retry-After, and both are counted at /metrics as
+core_password_hash_rejected_total{reason}. With PASSWORD_HASH_WORKERS = 0
+(the default) hashing stays on the request thread, as before.
+"""
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.encoding import force_bytes
+from rest_framework.exceptions import APIException
+
+from .metrics import registry
+
+REJECTED_HELP = 'Password hashes refused by the hashing pool, by reason.'
+
+
+class HashingUnavailable(APIException):
+    status_code = 503
+    default_detail = 'Server busy, please retry shortly.'
+    default_code = 'hashing_unavailable'
+    wait = 1  # DRF sends it as Retry-After
+
+
+# ---- pool -------------------------------------------------------------------
+
+_executor = None
+_executor_workers = 0
+_in_flight = 0
+_lock = threading.Lock()
+
+
+def pool_workers():
+    return getattr(settings, 'PASSWORD_HASH_WORKERS', 0)
+
+
+def get_executor():
+    global _executor, _executor_workers
+    workers = pool_workers()
+    with _lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a process that runs server threads is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=os.nice,
+                initargs=(getattr(settings, 'PASSWORD_HASH_NICE', 10),),
+            )
+            _executor_workers = workers
+        return _executor
+
+
+def _discard(executor):
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _done(future):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def _refuse(reason):
+    registry.inc('core_password_hash_rejected_total', REJECTED_HELP, reason=reason)
+    return HashingUnavailable()
+
+
+def pbkdf2(password, salt, iterations, digest_name):
+    """hashlib.pbkdf2_hmac, on the pool when one is configured."""
+    global _in_flight
+    password, salt = force_bytes(password), force_bytes(salt)
+    if not pool_workers():
+        return hashlib.pbkdf2_hmac(digest_name, password, salt, iterations)
+
+    with _lock:
+        if _in_flight >= getattr(settings, 'PASSWORD_HASH_QUEUE_LIMIT', 32):
+            raise _refuse('queue')
+        _in_flight += 1
+    executor = get_executor()
+    try:
+        future = executor.submit(hashlib.pbkdf2_hmac, digest_name, password, salt, iterations)
+    except BaseException as exc:
+        _done(None)
+        if isinstance(exc, BrokenProcessPool):
+            _discard(executor)
+            raise _refuse('broken') from None
+        raise
+    # the slot is freed when the worker finishes, even after a timeout
+    future.add_done_callback(_done)
+    try:
+        return future.result(timeout=getattr(settings, 'PASSWORD_HASH_TIMEOUT', 5.0))
+    except FutureTimeout:
+        future.cancel()
+        raise _refuse('timeout') from None
+    except BrokenProcessPool:
+        # a worker died; the next hash starts a fresh pool
+        _discard(executor)
+        raise _refuse('broken') from None
+
+
+# ---- hasher -----------------------------------------------------------------
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """pbkdf2_sha256, computed by pbkdf2() above."""
+
+    def encode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = pbkdf2(password, salt, iterations, self.digest().name)
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
@@ -0,0 +1,150 @@
+"""
+Incremental reader for identity import bodies.
+
+Accepts a top-level array or an object with an "items" / "results" array and
+yields the array elements one by one, reading the source in fixed-size chunks,
+so memory stays flat however large the upload is.
+"""
+import codecs
+import json
+
+_WHITESPACE = ' \t\r\n'
+_decoder = json.JSONDecoder()
+
+
+class InvalidJSON(ValueError):
+    """The body is not well-formed JSON."""
+
+
+class NoItemsArray(ValueError):
+    """The body is valid JSON but has no array of items."""
+
+
+class _ChunkReader:
+    def __init__(self, fileobj, chunk_size, max_value_size):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        # the old import decoded with errors="ignore"; keep that leniency
+        self.codec = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.started = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.fileobj.read(self.chunk_size) if self.fileobj is not None else b''
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        text = self.codec.decode(chunk or b'', final=not chunk)
+        if not chunk:
+            self.eof = True
+        if not self.started and text:
+            text = text.lstrip('\ufeff')
+            self.started = True
+        # drop what has been consumed so the buffer only holds the current value
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise InvalidJSON(f"expected {char!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or len(self.buf) - self.pos > self.max_value_size:
+                    raise InvalidJSON("malformed value")
+                self.fill()
+                continue
+            # a number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return obj
+
+    def array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            c = self.peek()
+            self.pos += 1
+            if c == ']':
+                return
+            if c != ',':
+                raise InvalidJSON("expected ',' or ']'")
+
+    def end(self):
+        if self.peek() != '':
+            raise InvalidJSON("extra data")
+
+
+def iter_json_items(fileobj, chunk_size=64 * 1024, max_value_size=1024 * 1024):
+    """
+    Yield the elements of `[...]`, `{"items": [...]}` or `{"results": [...]}`.
+
+    Raises InvalidJSON for malformed input and NoItemsArray when the document
+    has no such array. Both can surface after some items were already yielded,
+    so callers should write inside a transaction.
+    """
+    reader = _ChunkReader(fileobj, chunk_size, max_value_size)
+    first = reader.peek()
+
+    if first == '':
+        # empty body behaves like "{}"
+        raise NoItemsArray()
+
+    if first == '[':
+        yield from reader.array()
+        reader.end()
+        return
+
+    if first != '{':
+        reader.value()
+        reader.end()
+        raise NoItemsArray()
+
+    reader.pos += 1
+    found = False
+    if reader.peek() == '}':
+        reader.pos += 1
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise InvalidJSON("object keys must be strings")
+            reader.expect(':')
+            if not found and key in ('items', 'results') and reader.peek() == '[':
+                found = True
+                yield from reader.array()
+            else:
+                reader.value()
+            c = reader.peek()
+            reader.pos += 1
+            if c == '}':
+                break
+            if c != ',':
+                raise InvalidJSON("expected ',' or '}'")
+    reader.end()
+    if not found:
+        raise NoItemsArray()
@@ -0,0 +1,32 @@
+# Language normalisation shared by the lookup endpoint and the Identity model.
+
+# Common word aliases
+LANGUAGE_ALIASES = {
+    'english': 'en',
+    'chinese': 'zh',
+    'mandarin': 'zh',
+    'malay': 'ms',
+    'tamil': 'ta',
+}
+
+
+def norm_lang(s: str) -> str:
+    """
+    Reduce a language name or tag to its primary code ('en-GB' -> 'en',
+    'Mandarin' -> 'zh'). Returns '' when it doesn't look like a language.
+    """
+    if not s:
+        return ''
+    s = s.strip().lower()
+
+    if s in LANGUAGE_ALIASES:
+        return LANGUAGE_ALIASES[s]
+
+    # If looks like a tag, reduce to primary (en, zh, ms, ta...)
+    if '-' in s:
+        s = s.split('-', 1)[0]
+
+    # if they typed 'en' / 'zh' already, keep it
+    if len(s) in (2, 3):  # crude but fine for our set
+        return s
+    return ''
@@ -0,0 +1,97 @@
+"""
+Live identity/profile updates over WebSockets (Django Channels).
+
+Committed changes are pushed to the owner's group; identity changes also go
+to the admins group, since admins list every user's identities. Each event
+is rendered to JSON once, here, and forwarded as-is by LiveUpdatesConsumer
+(core/consumers.py) to every socket in the group:
+
+    {"type": "identity.saved", "identity": {...}}     IdentitySerializer shape
+    {"type": "identity.deleted", "id": 12}
+    {"type": "identities.reset"}                      bulk import; refetch the list
+    {"type": "profile.saved", "profile": {...}}       ProfileSerializer shape
+
+Nothing is sent, or even rendered, when no channel layer is configured or
+when the in-memory layer has no socket in the target groups; that layer is
+per process, so a WSGI worker never has one. A layer that is down only costs
+a logged error: the REST API stays the source of truth.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+ADMINS_GROUP = 'live.admins'
+
+
+def user_group(user_id):
+    return f'live.user.{user_id}'
+
+
+def _listened(layer, groups):
+    """The groups an event for `groups` has to go to."""
+    if layer is None:
+        return []
+    if isinstance(layer, InMemoryChannelLayer):
+        # only sockets served by this process can be in its groups
+        return [group for group in groups if layer.groups.get(group)]
+    return groups
+
+
+def _send(groups, kind, build):
+    layer = get_channel_layer()
+    groups = _listened(layer, groups)
+    if not groups:
+        return
+    message = {'type': 'live.event', 'kind': kind, 'text': JSONRenderer().render(build()).decode('utf-8')}
+    send = async_to_sync(layer.group_send)
+    for group in groups:
+        send(group, {**message, 'group': group})
+
+
+def _on_commit(groups, kind, build):
+    if not _listened(get_channel_layer(), groups):
+        return
+    # robust: a failed push must not fail the request that made the change
+    transaction.on_commit(lambda: _send(groups, kind, build), robust=True)
+
+
+def identity_saved(identity):
+    from .serializers import IdentitySerializer  # serializers imports models
+
+    def build():
+        return {'type': 'identity.saved', 'identity': IdentitySerializer(identity).data}
+    _on_commit([user_group(identity.user_id), ADMINS_GROUP], 'identity', build)
+
+
+def identity_deleted(identity):
+    pk = identity.pk
+    _on_commit([user_group(identity.user_id), ADMINS_GROUP], 'identity',
+               lambda: {'type': 'identity.deleted', 'id': pk})
+
+
+def identities_reset(user_id):
+    _on_commit([user_group(user_id), ADMINS_GROUP], 'identity', lambda: {'type': 'identities.reset'})
+
+
+def profile_saved(profile):
+    from .serializers import ProfileSerializer
+
+    def build():
+        return {'type': 'profile.saved', 'profile': ProfileSerializer(profile).data}
+    _on_commit([user_group(profile.user_id)], 'profile', build)
+
+
+def profile_updated(profile_pk, user_id):
+    """profile_saved() for writes that skip save(), such as a queryset .update()."""
+    from .models import Profile
+    from .serializers import ProfileSerializer
+
+    def build():
+        profile = Profile.objects.select_related('user', 'preferred_identity').get(pk=profile_pk)
+        return {'type': 'profile.saved', 'profile': ProfileSerializer(profile).data}
+    _on_commit([user_group(user_id)], 'profile', build)
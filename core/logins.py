@@ -0,0 +1,105 @@
+"""
+last_login bookkeeping for token logins.
+
+LAST_LOGIN_UPDATE picks how a successful POST /api/token/ is recorded:
+
+- "off" (default): last_login is not touched, as with simplejwt's own
+  UPDATE_LAST_LOGIN = False
+- "sync": django's update_last_login, one UPDATE on the request path
+- "deferred": the timestamp is queued in memory and a background
+  thread writes every pending login in one bulk UPDATE every
+  LAST_LOGIN_FLUSH_INTERVAL seconds. Repeated logins by the same user
+  within an interval coalesce into a single row write. With the interval
+  set to None nothing is written until flush() is called (or at exit).
+
+With SIMPLE_JWT['UPDATE_LAST_LOGIN'] on, simplejwt already wrote last_login
+and this setting is ignored. Deferred writes still pending when the process dies are lost; last_login is
+informational, so that trade is acceptable.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User, update_last_login
+from django.db import close_old_connections
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginQueue:
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, user_id, when):
+        with self._lock:
+            self._pending[user_id] = when
+            interval = getattr(settings, 'LAST_LOGIN_FLUSH_INTERVAL', 5.0)
+            if interval and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(
+                    target=self._run, args=(interval,), name='last-login-flush', daemon=True,
+                )
+                self._thread.start()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of users updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            # bulk_update sends one CASE ... WHEN UPDATE and fires no signals
+            User.objects.bulk_update(
+                [User(pk=pk, last_login=when) for pk, when in pending.items()],
+                ['last_login'],
+            )
+        except Exception:
+            # put them back for the next round unless a newer login arrived
+            with self._lock:
+                for pk, when in pending.items():
+                    self._pending.setdefault(pk, when)
+            raise
+        return len(pending)
+
+    def flush_logged(self):
+        """flush() for the background thread and exit: failures are logged, not raised."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Writing %d queued last_login updates failed', len(self._pending))
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush_logged()  # failed rows are retried on the next tick
+            finally:
+                close_old_connections()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = LastLoginQueue()
+            atexit.register(_queue.flush_logged)
+        return _queue
+
+
+def record_login(user):
+    if api_settings.UPDATE_LAST_LOGIN:
+        return  # TokenObtainPairSerializer.validate already wrote it
+    mode = getattr(settings, 'LAST_LOGIN_UPDATE', 'off')
+    if mode == 'sync':
+        update_last_login(None, user)
+    elif mode == 'deferred':
+        user.last_login = timezone.now()
+        get_queue().add(user.pk, user.last_login)
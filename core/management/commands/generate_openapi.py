@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import openapi
+
+
+class Command(BaseCommand):
+    help = (
+        "Introspect the API and write the OpenAPI document served at /openapi.json "
+        "(OPENAPI_SCHEMA_PATH). Run it at build time; --check fails if the file is stale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='write here instead of OPENAPI_SCHEMA_PATH')
+        parser.add_argument('--check', action='store_true',
+                            help="don't write; exit non-zero if the file differs from the API")
+
+    def handle(self, *args, output=None, check=False, **options):
+        path = Path(output) if output else openapi.schema_path()
+        body = openapi.generate()
+        if check:
+            if not path.exists() or path.read_bytes() != body:
+                raise CommandError(f"{path} is out of date; run `manage.py generate_openapi`.")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date."))
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        openapi.reset()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path} ({len(body) / 1024:.0f} KiB)."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 people-search index from users, profiles and identities."
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError("The search index needs SQLite (FTS5); nothing to rebuild.")
+        with transaction.atomic(), connection.cursor() as cursor:
+            search.create_tables(cursor)
+            search.rebuild(cursor)
+            cursor.execute(f"INSERT INTO {search.USER_TABLE}({search.USER_TABLE}) VALUES ('optimize')")
+            cursor.execute(f"INSERT INTO {search.IDENTITY_TABLE}({search.IDENTITY_TABLE}) VALUES ('optimize')")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
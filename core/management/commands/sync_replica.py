@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import routers
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the replica aliases (DATABASE_REPLICAS) "
+        "with SQLite's online backup; --interval repeats it, standing in for replication locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='aliases',
+                            help='replica alias to refresh (default: all of DATABASE_REPLICAS)')
+        parser.add_argument('--interval', type=float, default=0,
+                            help='keep copying every N seconds until interrupted')
+
+    def handle(self, *args, aliases=None, interval=0, **options):
+        aliases = aliases or list(routers.replicas())
+        if not aliases:
+            raise CommandError("No replicas configured; set DJANGO_REPLICA_DB or DATABASE_REPLICAS.")
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if alias not in connections or connections[alias].vendor != 'sqlite':
+                raise CommandError(f"sync_replica copies SQLite files; {alias!r} is not a SQLite database.")
+
+        while True:
+            started = time.perf_counter()
+            source = connections[DEFAULT_DB_ALIAS]
+            source.ensure_connection()
+            for alias in aliases:
+                target = connections[alias]
+                target.ensure_connection()
+                source.connection.backup(target.connection)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Copied {DEFAULT_DB_ALIAS} -> {alias} in {(time.perf_counter() - started) * 1000:.0f} ms."
+                ))
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,249 @@
+"""
+Per-view request metrics and a Prometheus /metrics endpoint.
+
+MetricsMiddleware (first in MIDDLEWARE) times every request and records,
+per (view, method): a latency histogram, a request count per status code,
+SQL query count and time, and response bytes. With METRICS_SERVER_TIMING
+(by default only under DEBUG, since it reveals query counts to clients) each
+response also carries a Server-Timing header, so the numbers show up in the
+browser's network tab:
+
+    Server-Timing: app;dur=12.41, db;dur=3.05;desc="4 queries"
+
+SQL is counted by an execute wrapper installed on every DB connection as it
+opens (CoreConfig.ready). The wrapper charges the request found in a
+ContextVar, which sync_to_async carries over to worker threads, so queries
+made by the async views are counted too. Outside a request it only costs a
+ContextVar lookup.
+
+Views are labelled by URL name (resolver_match.view_name), never by path,
+so the series count stays bounded; unrouted requests share "<unmatched>".
+Streaming responses are timed up to the first byte and add no bytes.
+
+The registry lives in process memory: under several workers each one
+reports its own counters, which Prometheus sums across scrape targets.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseForbidden
+
+# seconds; Prometheus' usual web-latency ladder
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = '<unmatched>'
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ---- SQL accounting -------------------------------------------------------
+
+class RequestStats:
+    __slots__ = ('queries', 'sql_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+_current = contextvars.ContextVar('core_metrics_request', default=None)
+
+
+def count_sql(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - start
+
+
+def install_sql_counter(connection, **kwargs):
+    """connection_created receiver; also called for connections already open."""
+    if count_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_sql)
+
+
+# ---- registry -------------------------------------------------------------
+
+class _Series:
+    __slots__ = ('buckets', 'latency_sum', 'count', 'statuses', 'queries', 'sql_seconds', 'bytes')
+
+    def __init__(self, n_buckets):
+        self.buckets = [0] * (n_buckets + 1)  # last slot is +Inf
+        self.latency_sum = 0.0
+        self.count = 0
+        self.statuses = defaultdict(int)
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.bytes = 0
+
+
+class Registry:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._counters = {}  # name -> (help, {labels tuple: value})
+        self._lock = threading.Lock()
+
+    def observe(self, view, method, status, seconds, queries, sql_seconds, size):
+        # bisect_left: a value equal to a bound belongs to that bucket (le)
+        slot = bisect_left(self.buckets, seconds)
+        key = (view, method)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.buckets[slot] += 1
+            series.latency_sum += seconds
+            series.count += 1
+            series.statuses[status] += 1
+            series.queries += queries
+            series.sql_seconds += sql_seconds
+            series.bytes += size
+
+    def inc(self, name, help_text, **labels):
+        """Add one to a free-standing counter (e.g. rejected requests)."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            _, values = self._counters.setdefault(name, (help_text, defaultdict(int)))
+            values[key] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+
+    def render(self):
+        """The Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            snapshot = [
+                (key, list(s.buckets), s.latency_sum, s.count, dict(s.statuses), s.queries, s.sql_seconds, s.bytes)
+                for key, s in sorted(self._series.items())
+            ]
+            counters = [
+                (name, help_text, sorted(values.items()))
+                for name, (help_text, values) in sorted(self._counters.items())
+            ]
+        bounds = [_number(b) for b in self.buckets] + ['+Inf']
+
+        lines = [
+            '# HELP core_http_request_duration_seconds Time spent in Django per request, by view.',
+            '# TYPE core_http_request_duration_seconds histogram',
+        ]
+        for (view, method), buckets, total, count, *_ in snapshot:
+            labels = _labels(view=view, method=method)
+            running = 0
+            for bound, n in zip(bounds, buckets):
+                running += n
+                lines.append(f'core_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f'core_http_request_duration_seconds_sum{{{labels}}} {_number(total)}')
+            lines.append(f'core_http_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += [
+            '# HELP core_http_requests_total Requests answered, by view and status code.',
+            '# TYPE core_http_requests_total counter',
+        ]
+        for (view, method), _, _, _, statuses, *_ in snapshot:
+            for status, n in sorted(statuses.items()):
+                lines.append(f'core_http_requests_total{{{_labels(view=view, method=method, status=status)}}} {n}')
+
+        for name, index, help_text in (
+            ('core_http_db_queries_total', 5, 'SQL statements executed while handling requests.'),
+            ('core_http_db_duration_seconds_total', 6, 'Time spent executing SQL while handling requests.'),
+            ('core_http_response_bytes_total', 7, 'Response body bytes sent (streaming bodies excluded).'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for row in snapshot:
+                (view, method) = row[0]
+                lines.append(f'{name}{{{_labels(view=view, method=method)}}} {_number(row[index])}')
+
+        for name, help_text, values in counters:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for labels, n in values:
+                lines.append(f'{name}{{{_labels(**dict(labels))}}} {n}')
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+registry = Registry()
+
+
+# ---- middleware -----------------------------------------------------------
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', settings.DEBUG)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _finish(self, request, response, stats, seconds):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else UNMATCHED
+        method = request.method if request.method in METHODS else 'OTHER'
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(view, method, response.status_code, seconds, stats.queries, stats.sql_seconds, size)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'app;dur={seconds * 1000:.2f}, '
+                f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries"'
+            )
+        return response
+
+
+# ---- endpoint -------------------------------------------------------------
+
+def metrics_view(request):
+    """GET /metrics: every series in the Prometheus text format."""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-17 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_profile_preferred_identity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='identity',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='identity_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='identity',
+            index=models.Index(fields=['updated_at', 'id'], name='identity_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-17 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.languages import norm_lang
+
+
+def backfill_language_key(apps, schema_editor):
+    Identity = apps.get_model('core', 'Identity')
+    # one UPDATE per distinct language value; leaves updated_at untouched
+    for lang in Identity.objects.values_list('language', flat=True).distinct():
+        Identity.objects.filter(language=lang).update(language_key=norm_lang(lang))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_identity_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='identity',
+            name='language_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_language_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='identity',
+            index=models.Index(fields=['user', 'context', 'language_key', 'updated_at'], name='identity_lookup_ctx_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='identity',
+            index=models.Index(fields=['user', 'language_key', 'updated_at'], name='identity_lookup_lang_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+import sqlite3
+
+from django.db import migrations
+
+# Inlined rather than imported from core.search, so later changes to that
+# module never change what this migration does.
+USER_TABLE = 'core_user_search'
+IDENTITY_TABLE = 'core_identity_search'
+
+
+def trigram_available():
+    # FTS5 and its trigram tokenizer (SQLite 3.34+) are both optional
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute("CREATE VIRTUAL TABLE t USING fts5(x, tokenize='trigram')")
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite' or not trigram_available():
+        return  # search_users keeps using the ORM
+    user_table = apps.get_model('auth', 'User')._meta.db_table
+    profile_table = apps.get_model('core', 'Profile')._meta.db_table
+    identity_table = apps.get_model('core', 'Identity')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {USER_TABLE} "
+            f"USING fts5(username, display_label, tokenize='trigram')"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {IDENTITY_TABLE} "
+            f"USING fts5(display_name, user_id UNINDEXED, tokenize='trigram')"
+        )
+        cursor.execute(
+            f"INSERT INTO {USER_TABLE}(rowid, username, display_label) "
+            f"SELECT u.id, u.username, COALESCE(p.display_label, '') "
+            f"FROM {user_table} u LEFT JOIN {profile_table} p ON p.user_id = u.id"
+        )
+        cursor.execute(
+            f"INSERT INTO {IDENTITY_TABLE}(rowid, display_name, user_id) "
+            f"SELECT id, display_name, user_id FROM {identity_table}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {USER_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {IDENTITY_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_identity_language_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,16 +1,39 @@
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from . import live, search
+from .cache import bump_user_version, remember_role_version
+from .languages import norm_lang
+
 class Identity(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='identities')
     display_name = models.CharField(max_length=100)
     context = models.CharField(max_length=40) 
     language = models.CharField(max_length=20, default='en')  
+    # norm_lang(language), kept in sync on save so lookups can filter in SQL
+    language_key = models.CharField(max_length=20, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)  
     updated_at = models.DateTimeField(auto_now=True)      
 
+    class Meta:
+        indexes = [
+            # keyset pagination: newest first, (updated_at, id) cursor
+            models.Index(fields=['user', 'updated_at', 'id'], name='identity_user_updated_idx'),
+            models.Index(fields=['updated_at', 'id'], name='identity_updated_idx'),
+            # public lookup: gate on context / primary language, newest first
+            models.Index(fields=['user', 'context', 'language_key', 'updated_at'], name='identity_lookup_ctx_idx'),
+            models.Index(fields=['user', 'language_key', 'updated_at'], name='identity_lookup_lang_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.language_key = norm_lang(self.language)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'language' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'language_key'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.display_name} ({self.context}, {self.language})"
 
@@ -40,6 +63,58 @@ class Profile(models.Model):
         on_delete=models.SET_NULL, related_name='preferred_by'
     )
 
+    # size -> {"webp": name, "jpeg": name}, filled in by core.avatars after an upload
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    # bumped whenever role changes; access tokens carry it as the `rv` claim
+    role_version = models.PositiveIntegerField(default=0, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_saved(field_names)
+        return instance
+
+    def _remember_saved(self, attnames=None):
+        # snapshot of the values the database holds, for dirty_fields()
+        saved = getattr(self, '_saved_values', {})
+        for f in self._meta.concrete_fields:
+            if f.attname in self.__dict__ and (attnames is None or f.attname in attnames):
+                saved[f.attname] = f.get_prep_value(getattr(self, f.attname))
+        self._saved_values = saved
+
+    def dirty_fields(self):
+        """
+        Attnames whose value differs from what was loaded or last saved, or
+        None for an instance that has never been loaded or saved.
+        """
+        saved = getattr(self, '_saved_values', None)
+        if saved is None:
+            return None
+        return {
+            f.attname for f in self._meta.concrete_fields
+            if f.attname in self.__dict__
+            and f.get_prep_value(getattr(self, f.attname)) != saved.get(f.attname)
+        }
+
+    def save(self, *args, **kwargs):
+        dirty = self.dirty_fields()
+        self._role_changed = bool(dirty) and 'role' in dirty
+        update_fields = kwargs.get('update_fields')
+        if self._role_changed:
+            self.role_version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = set(update_fields) | {'role_version'}
+        if dirty and 'avatar' in dirty and self.avatar_renditions:
+            self.avatar_renditions = {}  # stale until the new upload is rendered
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = set(update_fields) | {'avatar_renditions'}
+        super().save(*args, **kwargs)
+        if update_fields is None:
+            self._remember_saved()
+        else:
+            self._remember_saved({self._meta.get_field(name).attname for name in update_fields})
+
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -47,5 +122,100 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         role = 'admin' if instance.is_superuser else 'user'
         Profile.objects.create(user=instance, role=role)
     else:
-        instance.profile.save()
+        # Only a profile already loaded on this user can carry unsaved edits,
+        # and then only the changed columns are written. Saves such as the
+        # last_login update on each login no longer touch core_profile.
+        profile = instance._state.fields_cache.get('profile')
+        if profile is None:
+            return
+        dirty = profile.dirty_fields()
+        if dirty is None:
+            profile.save()
+        elif dirty:
+            profile.save(update_fields=dirty)
+
+
+def _owner_username(instance):
+    # use the cached owner when there is one; during a cascading user delete
+    # the row may already be gone, and the User receiver covers that case
+    user = instance._state.fields_cache.get('user')
+    if user is not None:
+        return user.username
+    return User.objects.filter(pk=instance.user_id).values_list('username', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Identity)
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_public_cache(sender, instance, **kwargs):
+    bump_user_version(_owner_username(instance))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_public_cache_for_user(sender, instance, **kwargs):
+    bump_user_version(instance.username)
+
+
+@receiver(post_save, sender=User)
+def invalidate_public_cache_for_username(sender, instance, created, update_fields=None, **kwargs):
+    # usernames appear in profile and identity payloads; last_login saves don't matter
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    bump_user_version(instance.username)
+
+
+@receiver(post_save, sender=Profile)
+def publish_role_version(sender, instance, **kwargs):
+    # stateless auth compares the token's `rv` claim against this
+    if not getattr(instance, '_role_changed', False):
+        return
+    remember_role_version(instance.user_id, instance.role_version)
+
+
+# ---- full-text search index (see core/search.py) ----
+
+@receiver(post_save, sender=Profile)
+def index_profile_for_search(sender, instance, **kwargs):
+    search.index_user(instance.user_id, instance.user.username, instance.display_label)
+
+
+@receiver(post_save, sender=User)
+def index_username_for_search(sender, instance, created, update_fields=None, **kwargs):
+    # new users are indexed when their profile is created
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    label = Profile.objects.filter(user=instance).values_list('display_label', flat=True).first()
+    search.index_user(instance.pk, instance.username, label)
+
+
+@receiver(post_delete, sender=User)
+def unindex_user_for_search(sender, instance, **kwargs):
+    search.unindex_user(instance.pk)
+
+
+@receiver(post_save, sender=Identity)
+def index_identity_for_search(sender, instance, **kwargs):
+    search.index_identities([instance])
+
+
+@receiver(post_delete, sender=Identity)
+def unindex_identity_for_search(sender, instance, **kwargs):
+    search.unindex_identity(instance.pk)
+
+
+# ---- live updates over WebSockets (see core/live.py) ----
+
+@receiver(post_save, sender=Identity)
+def push_identity_saved(sender, instance, **kwargs):
+    live.identity_saved(instance)
+
+
+@receiver(post_delete, sender=Identity)
+def push_identity_deleted(sender, instance, **kwargs):
+    live.identity_deleted(instance)
+
 
+@receiver(post_save, sender=Profile)
+def push_profile_saved(sender, instance, created, **kwargs):
+    # a new profile belongs to a new user, who has no socket open yet
+    if not created:
+        live.profile_saved(instance)
@@ -0,0 +1,164 @@
+"""
+The OpenAPI document and the /swagger/ and /redoc/ pages.
+
+`manage.py generate_openapi` introspects every view once, at build time, and
+writes the document to OPENAPI_SCHEMA_PATH. At runtime nothing is
+introspected:
+
+- /openapi.json serves the file's bytes, read once per process
+- /swagger/ and /redoc/ are drf_yasg's UI pages pointed at /openapi.json
+  (SWAGGER_SETTINGS / REDOC_SETTINGS 'SPEC_URL'); each is rendered once per
+  process. The API takes Bearer tokens, so the pages carry no session
+  login button and are the same for everyone.
+
+All three send an ETag and Cache-Control: public, max-age=OPENAPI_MAX_AGE,
+and answer a matching If-None-Match with 304.
+
+drf_yasg's generator, codecs and renderers are imported by the first docs
+request, not when the URLconf loads. The drf_yasg package itself is loaded
+at startup through INSTALLED_APPS, and DRF already imports PyYAML and
+uritemplate. Without a generated file the first /openapi.json request
+generates the document in process and logs a warning, so a checkout works
+before its first build.
+"""
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+logger = logging.getLogger(__name__)
+
+INFO = {
+    'title': 'Identity API',
+    'default_version': 'v1',
+    'description': 'API for context-sensitive identity management',
+}
+CONTENT_TYPE = 'application/json'
+
+# page name -> drf_yasg renderer class
+UI_RENDERERS = {'swagger': 'SwaggerUIRenderer', 'redoc': 'ReDocRenderer'}
+
+
+def schema_path():
+    return Path(getattr(settings, 'OPENAPI_SCHEMA_PATH', settings.BASE_DIR / 'openapi.json'))
+
+
+def max_age():
+    return getattr(settings, 'OPENAPI_MAX_AGE', 3600)
+
+
+# ---- generation -------------------------------------------------------------
+
+def generate():
+    """Introspect the API into the OpenAPI document; returns its JSON bytes."""
+    from drf_yasg import openapi
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    generator = OpenAPISchemaGenerator(openapi.Info(**INFO))
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+# ---- served documents -------------------------------------------------------
+
+class _Document:
+    __slots__ = ('body', 'etag', 'content_type')
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.content_type = content_type
+
+
+_documents = {}
+_lock = threading.RLock()  # a page loads the schema while holding it
+
+
+def _get(name, build):
+    document = _documents.get(name)
+    if document is None:
+        with _lock:
+            document = _documents.get(name)
+            if document is None:
+                document = _documents[name] = build()
+    return document
+
+
+def reset():
+    """Forget the loaded document and pages (after regenerating the file)."""
+    with _lock:
+        _documents.clear()
+
+
+def schema_document():
+    return _get('schema', _load_schema)
+
+
+def _load_schema():
+    path = schema_path()
+    try:
+        body = path.read_bytes()
+    except FileNotFoundError:
+        logger.warning("%s is missing; generating the OpenAPI document in process. "
+                       "Run `manage.py generate_openapi` at build time.", path)
+        body = generate()
+    return _Document(body, CONTENT_TYPE)
+
+
+def _render_ui(page):
+    from drf_yasg import openapi, renderers
+
+    # the UI only needs the title and version; the spec is fetched from SPEC_URL
+    info = json.loads(schema_document().body)['info']
+    swagger = openapi.Swagger(info=openapi.Info(title=info['title'], default_version=info['version']),
+                              _prefix='/', paths=openapi.Paths(paths={}))
+    renderer = getattr(renderers, UI_RENDERERS[page])()
+    context = {}
+    renderer.set_context(context, swagger)
+    context['USE_SESSION_AUTH'] = False
+    html = render_to_string(renderer.template, context)
+    return _Document(html.encode('utf-8'), 'text/html; charset=utf-8')
+
+
+# ---- views ------------------------------------------------------------------
+
+def _serve(request, document):
+    response = get_conditional_response(request, etag=document.etag)
+    if response is None:
+        response = HttpResponse(document.body, content_type=document.content_type)
+    response['ETag'] = document.etag
+    patch_cache_control(response, public=True, max_age=max_age())
+    return response
+
+
+@require_safe
+def openapi_schema(request):
+    """GET /openapi.json: the generated OpenAPI document."""
+    return _serve(request, schema_document())
+
+
+def _serve_ui(request, page):
+    if request.GET.get('format') == 'openapi':
+        # drf_yasg's own spec URL, kept for existing clients
+        return _serve(request, schema_document())
+    return _serve(request, _get(page, lambda: _render_ui(page)))
+
+
+@require_safe
+def swagger_ui(request):
+    """GET /swagger/: Swagger UI over /openapi.json."""
+    return _serve_ui(request, 'swagger')
+
+
+@require_safe
+def redoc_ui(request):
+    """GET /redoc/: ReDoc over /openapi.json."""
+    return _serve_ui(request, 'redoc')
@@ -0,0 +1,103 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class IdentityCursorPagination(BasePagination):
+    """
+    Keyset pagination over (updated_at, id), newest first.
+
+    Each page is a single `WHERE (updated_at, id) < cursor ORDER BY ... LIMIT n+1`
+    query: no OFFSET scan and no COUNT(*). The id tie-breaker keeps the order
+    total, so rows sharing a timestamp are never skipped or repeated.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = getattr(settings, 'IDENTITY_PAGE_SIZE', 50)
+    max_page_size = getattr(settings, 'IDENTITY_MAX_PAGE_SIZE', 200)
+    ordering = ('-updated_at', '-id')
+
+    # where `next` points; defaults to the requested URL
+    base_url = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_used = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            ts, pk = position
+            queryset = queryset.filter(Q(updated_at__lt=ts) | Q(updated_at=ts, id__lt=pk))
+
+        # fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.page_size_used + 1])
+        self.has_next = len(rows) > self.page_size_used
+        rows = rows[:self.page_size_used]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # ---- helpers ----
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        url = self.base_url or self.request.build_absolute_uri()
+        if isinstance(self.last, dict):  # a page of .values() rows
+            ts, pk = self.last['updated_at'], self.last['id']
+        else:
+            ts, pk = self.last.updated_at, self.last.pk
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(ts, pk))
+
+    @staticmethod
+    def encode_cursor(ts, pk):
+        raw = f"{ts.isoformat()}|{pk}".encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            ts_raw, pk_raw = raw.rsplit('|', 1)
+            ts = parse_datetime(ts_raw)
+            pk = int(pk_raw)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if ts is None:
+            raise NotFound('Invalid cursor')
+        return ts, pk
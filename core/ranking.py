@@ -0,0 +1,120 @@
+"""
+Accept-Language negotiation for `mode=ranked` identity lookups.
+
+A header such as "en-GB,en;q=0.8,zh;q=0.5,*;q=0.1" is compiled once into
+lookup tables (memoised per distinct header string), so scoring a candidate
+is a handful of dict lookups. Candidates are scored in a single pass and only
+the top `limit` are kept.
+"""
+import heapq
+from functools import lru_cache
+
+from .languages import LANGUAGE_ALIASES, norm_lang
+
+CONTEXT_EXACT = 100.0
+CONTEXT_PARTIAL = 50.0
+EXACT_TAG = 20.0          # header "en-gb", identity "en-GB"
+RANGE_MATCH = 12.0        # header "en" accepts identity "en-GB" (RFC 4647 basic filtering)
+PRIMARY_FALLBACK = 8.0    # header "en-gb", identity "en"
+SIBLING_REGION = 6.0      # header "en-gb", identity "en-US"
+WILDCARD = 1.0            # header "*"
+POSITION_DECAY = 0.1      # later preferences at equal q count slightly less
+
+
+class LanguagePreferences:
+    __slots__ = ('entries', 'exact', 'range', 'fallback', 'wildcard', 'primaries')
+
+    def __init__(self, entries, exact, range_, fallback, wildcard):
+        self.entries = entries          # ((tag, q), ...) best first
+        self.exact = exact
+        self.range = range_
+        self.fallback = fallback
+        self.wildcard = wildcard
+        self.primaries = frozenset(range_) | frozenset(fallback)
+
+    @property
+    def tags(self):
+        return [tag for tag, _ in self.entries]
+
+    @property
+    def cache_token(self):
+        return ','.join(f'{tag};{q:g}' for tag, q in self.entries)
+
+
+@lru_cache(maxsize=4096)
+def canonical_tag(value):
+    """'en_GB' -> 'en-gb', 'Mandarin' -> 'zh'."""
+    s = (value or '').strip().lower().replace('_', '-')
+    return LANGUAGE_ALIASES.get(s, s)
+
+
+def _keep_best(table, key, weight):
+    if weight > table.get(key, 0.0):
+        table[key] = weight
+
+
+@lru_cache(maxsize=512)
+def compile_accept_language(header):
+    """Parse an Accept-Language style string into LanguagePreferences."""
+    parsed = []
+    for pos, part in enumerate((header or '').split(',')):
+        piece = part.strip()
+        if not piece:
+            continue
+        tag, *params = [p.strip() for p in piece.split(';')]
+        q = 1.0
+        for param in params:
+            if param.lower().startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 1.0
+        q = min(max(q, 0.0), 1.0)
+        tag = canonical_tag(tag)
+        if tag and q > 0:  # q=0 means "not acceptable"
+            parsed.append((tag, q, pos))
+    parsed.sort(key=lambda e: (-e[1], e[2]))
+
+    exact, range_, fallback = {}, {}, {}
+    wildcard = 0.0
+    for rank, (tag, q, _) in enumerate(parsed):
+        weight = q / (1 + rank * POSITION_DECAY)
+        if tag == '*':
+            wildcard = max(wildcard, WILDCARD * weight)
+            continue
+        primary = norm_lang(tag)
+        if not primary:
+            continue
+        _keep_best(exact, tag, EXACT_TAG * weight)
+        if '-' in tag:
+            _keep_best(exact, primary, PRIMARY_FALLBACK * weight)
+            _keep_best(fallback, primary, SIBLING_REGION * weight)
+        else:
+            _keep_best(range_, primary, RANGE_MATCH * weight)
+
+    entries = tuple((tag, q) for tag, q, _ in parsed)
+    return LanguagePreferences(entries, exact, range_, fallback, wildcard)
+
+
+def rank_candidates(candidates, prefs, ctx='', limit=10):
+    """
+    Score (id, language, language_key, context, updated_at) rows and return
+    the best `limit` as [(id, score), ...]: highest score first, then newest,
+    then lowest id.
+    """
+    want = (ctx or '').strip().lower()
+    exact, range_, fallback, wildcard = prefs.exact, prefs.range, prefs.fallback, prefs.wildcard
+
+    def scored():
+        for pk, language, key, context, updated_at in candidates:
+            tag = canonical_tag(language)
+            score = max(exact.get(tag, 0.0), range_.get(key, 0.0), fallback.get(key, 0.0), wildcard)
+            if want:
+                c = (context or '').lower()
+                if c == want:
+                    score += CONTEXT_EXACT
+                elif want in c:
+                    score += CONTEXT_PARTIAL
+            yield score, updated_at, -pk
+
+    return [(-neg_pk, score) for score, _, neg_pk in heapq.nlargest(limit, scored())]
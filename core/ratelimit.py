@@ -0,0 +1,286 @@
+"""
+Token-bucket rate limiting and load shedding for the anonymous endpoints.
+
+RATE_LIMITS maps URL names to a rule:
+
+    'token_obtain_pair': {
+        'methods': ['POST'],       # others pass untouched (default: all)
+        'ip': (1.0, 20),           # per client address: tokens/second, burst
+        'username': (0.2, 5),      # per username: the posted one, else the URL's
+        'concurrency': 4,          # requests one worker runs at once
+    }
+
+RateLimitMiddleware decides in process_view, on the URL Django has already
+resolved and before any other middleware's process_view or the view itself,
+so a rejection costs no auth, query or password hash:
+
+- a client whose bucket is empty gets 429 with Retry-After
+- a request arriving while `concurrency` are already in flight in this
+  process gets 503 with Retry-After: 1 (load shedding; hashing a password
+  is CPU-bound, so queueing more logins than cores only adds latency)
+
+RATE_LIMIT_STORE picks where buckets live:
+
+- "cache" (default): the Django cache, shared by every worker when that is
+  Redis or memcached. Each bucket is a start time and an atomic incr
+  counter of tokens spent, so concurrent workers can't both take the last
+  token.
+- "local": a bounded in-process dict; no round trips, per-worker limits.
+
+Client addresses come from REMOTE_ADDR, or from the last hop of
+RATE_LIMIT_IP_HEADER (e.g. 'HTTP_X_FORWARDED_FOR') behind a proxy that
+appends to it. Rejections are counted in core.metrics as
+core_ratelimit_rejected_total{rule, reason}.
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.http import JsonResponse
+from django.http.multipartparser import MultiPartParserError
+
+from .metrics import registry
+
+REJECTED_HELP = 'Requests refused before reaching the view, by rule and reason.'
+
+# a posted username is only looked for in bodies this small
+MAX_SNIFF_BYTES = 4096
+
+
+# ---- bucket stores --------------------------------------------------------
+
+class LocalBucketStore:
+    """Token buckets in this process; the least recently used are dropped first."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """Spend one token; returns 0 when allowed, else seconds until one is due."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Token buckets in the Django cache.
+
+    A bucket is (t0, spent): tokens earned since t0 are rate * (now - t0),
+    so a request is allowed while spent <= earned + burst. `spent` only
+    moves through incr/decr, which are atomic on Redis and memcached. Once a
+    bucket has refilled past its burst, `spent` is raised to `earned` so idle
+    time never banks more than `burst` tokens.
+    """
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        start_key, spent_key = f'rl:{key}:t0', f'rl:{key}:n'
+        timeout = max(3600, math.ceil(2 * burst / rate))
+        t0 = cache.get(start_key)
+        if t0 is None:
+            if cache.add(start_key, now, timeout):
+                cache.set(spent_key, 0, timeout)
+                t0 = now
+            else:
+                t0 = cache.get(start_key, now)
+        earned = int((now - t0) * rate)
+        try:
+            spent = cache.incr(spent_key)
+        except ValueError:  # counter evicted
+            cache.add(spent_key, earned, timeout)
+            spent = cache.incr(spent_key)
+        if spent <= earned:
+            # a full bucket: forget the surplus beyond the burst
+            cache.set(spent_key, earned + 1, timeout)
+            return 0.0
+        if spent <= earned + burst:
+            return 0.0
+        try:
+            cache.decr(spent_key)  # a refused request spends nothing
+        except ValueError:
+            pass
+        return (spent - burst) / rate + t0 - now
+
+    def clear(self):
+        pass  # entries live in the cache
+
+
+_stores = {'local': LocalBucketStore(), 'cache': CacheBucketStore()}
+
+
+def get_store():
+    name = getattr(settings, 'RATE_LIMIT_STORE', 'cache')
+    if name not in _stores:
+        raise ImproperlyConfigured(f'RATE_LIMIT_STORE must be one of {", ".join(_stores)}, not {name!r}')
+    return _stores[name]
+
+
+# ---- rules ----------------------------------------------------------------
+
+class Rule:
+    __slots__ = ('name', 'methods', 'ip', 'username', 'concurrency', '_in_flight', '_lock')
+
+    def __init__(self, name, methods=None, ip=None, username=None, concurrency=None):
+        self.name = name
+        self.methods = frozenset(m.upper() for m in methods) if methods else None
+        self.ip = ip
+        self.username = username
+        self.concurrency = concurrency
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def applies_to(self, method):
+        return self.methods is None or method in self.methods
+
+    def enter(self):
+        if self.concurrency is None:
+            return True
+        with self._lock:
+            if self._in_flight >= self.concurrency:
+                return False
+            self._in_flight += 1
+            return True
+
+    def leave(self):
+        if self.concurrency is not None:
+            with self._lock:
+                self._in_flight -= 1
+
+
+def client_ip(request):
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', None)
+    if header and request.META.get(header):
+        # the hop our own proxy appended; earlier entries are client-supplied
+        return request.META[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def posted_username(request):
+    """The username a login posts, read without disturbing DRF's parsing."""
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return None
+    if not 0 < length <= MAX_SNIFF_BYTES:
+        return None
+    media_type = (request.content_type or '').lower()
+    try:
+        if media_type == 'application/json':
+            data = json.loads(request.body)  # cached on the request for DRF
+            value = data.get('username') if isinstance(data, dict) else None
+        elif media_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+            value = request.POST.get('username')
+        else:
+            return None
+    except (ValueError, MultiPartParserError):
+        return None  # malformed body: DRF answers it with a 400
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def _bucket_key(rule, kind, value):
+    digest = hashlib.md5(value.encode('utf-8')).hexdigest()
+    return f'{rule.name}:{kind}:{digest}'
+
+
+# ---- middleware -----------------------------------------------------------
+
+def _refuse(rule, reason, status, retry_after, detail):
+    registry.inc('core_ratelimit_rejected_total', REJECTED_HELP, rule=rule.name, reason=reason)
+    response = JsonResponse({'detail': detail}, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class RateLimitMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        limits = getattr(settings, 'RATE_LIMITS', {})
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True) or not limits:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rules = {name: Rule(name, **options) for name, options in limits.items()}
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would run a sync process_view on a worker thread
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self._release(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            self._release(request)
+
+    def _release(self, request):
+        rule = request.__dict__.pop('_rate_limit_rule', None)
+        if rule is not None:
+            rule.leave()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return self._admit(request, view_kwargs)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return self._admit(request, view_kwargs)
+
+    def _admit(self, request, view_kwargs):
+        """A refusal response, or None to let the view run."""
+        match = request.resolver_match
+        rule = self.rules.get(match.url_name)
+        if rule is None or not rule.applies_to(request.method):
+            return None
+
+        # shed first: it needs no store round trip and spends no tokens
+        if not rule.enter():
+            return _refuse(rule, 'concurrency', 503, 1, 'Server busy, please retry shortly.')
+        # from here on the slot is released once the response is built, even
+        # when something below raises
+        request._rate_limit_rule = rule
+
+        store = get_store()
+        checks = []
+        if rule.ip:
+            checks.append(('ip', client_ip(request), rule.ip))
+        if rule.username:
+            username = posted_username(request) if request.method == 'POST' else None
+            checks.append(('username', username or view_kwargs.get('username'), rule.username))
+        for kind, value, (rate, burst) in checks:
+            if not value:
+                continue
+            wait = store.take(_bucket_key(rule, kind, value), rate, burst)
+            if wait:
+                self._release(request)
+                return _refuse(rule, kind, 429, wait, 'Request was throttled.')
+        return None
@@ -0,0 +1,52 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib writes the same bytes, only slower
+    orjson = None
+
+
+def dumps_compact(data, escape_js_separators=True):
+    """
+    Compact UTF-8 JSON bytes, as DRF's JSONRenderer writes them by default.
+
+    For the plain rows the fast read paths build (dicts, lists, str, int,
+    bool, None): orjson and json.dumps agree byte for byte on those, but not
+    on floats, so keep floats and datetimes out. JSONRenderer escapes
+    U+2028/U+2029 for JavaScript; pass escape_js_separators=False for
+    NDJSON lines, which leave them as they are.
+    """
+    if orjson is not None:
+        out = orjson.dumps(data)
+    else:
+        out = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if escape_js_separators and b'\xe2\x80' in out:
+        # U+2028 and U+2029 in UTF-8
+        out = out.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return out
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON: one compact object per line.
+
+    Registering it lets DRF's content negotiation accept `?format=ndjson`
+    and `Accept: application/x-ndjson`. Streaming views write each row with
+    `dumps_line`, the same encoding render() uses.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    @staticmethod
+    def dumps_line(row):
+        """One line, as UTF-8 bytes, for a row of plain values (see dumps_compact)."""
+        return dumps_compact(row, escape_js_separators=False) + b'\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(self.dumps_line(row) for row in rows)
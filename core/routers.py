@@ -0,0 +1,167 @@
+"""
+Read replicas for the public read endpoints.
+
+Views wrapped in @replica_reads (public_profile, public_identity_lookup,
+public_batch, search_users, sync and async) send their ORM reads to one of
+the DATABASE_REPLICAS aliases, picked per request. Everything else,
+and every write, stays on 'default'.
+
+Replicas lag, so a request falls back to the primary when:
+
+- the client wrote recently: ReplicaPinMiddleware answers every successful
+  POST/PUT/PATCH/DELETE with a `replica_pin` cookie, and pins the user in the
+  cache for API clients that don't keep cookies; both last
+  REPLICA_PIN_SECONDS (read-your-writes)
+- the owner being read changed within REPLICA_PIN_SECONDS: get_user_validators
+  calls use_primary(), so a fresh ETag never labels a stale body
+- the request is not a GET/HEAD
+
+Lookup results read from a replica are cached for at most
+REPLICA_CACHE_TIMEOUT (see core.cache.lookup_cache_timeout), which bounds
+how long lag can leak into the version-keyed cache. REPLICA_PIN_SECONDS has
+to exceed the replica's worst lag for the guarantees above to hold.
+"""
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject
+
+PIN_COOKIE = 'replica_pin'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+# ---- per-request routing state ----------------------------------------------
+
+class _Reads:
+    __slots__ = ('request', 'alias', 'user_checked')
+
+    def __init__(self, request, alias):
+        self.request = request
+        self.alias = alias
+        self.user_checked = False
+
+
+_reads = ContextVar('core_replica_reads', default=None)
+
+
+def _start(request):
+    state = None
+    if replicas() and request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES:
+        state = _Reads(request, random.choice(replicas()))
+    return _reads.set(state)
+
+
+def replica_reads(view):
+    """Let a read-only view's queries go to a replica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = _start(request)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _reads.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _start(request)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _reads.reset(token)
+    return wrapper
+
+
+def use_primary():
+    """Send the rest of this request's reads to the primary."""
+    state = _reads.get()
+    if state is not None:
+        state.alias = None
+
+
+def read_alias():
+    """The replica this request reads from, or None for the primary."""
+    state = _reads.get()
+    if state is None or state.alias is None:
+        return None
+    if not state.user_checked:
+        # browsers carry the pin cookie; token clients are checked once
+        # DRF has authenticated them
+        user = _resolved_user(state.request)
+        if user is not None:
+            state.user_checked = True
+            if user.is_authenticated and cache.get(_pin_key(user.pk)):
+                state.alias = None
+    return state.alias
+
+
+# ---- router -----------------------------------------------------------------
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the primary's rows, so objects from either may mix
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema with the data (see sync_replica)
+        return False if db in replicas() else None
+
+
+# ---- read-your-writes -------------------------------------------------------
+
+def _resolved_user(request):
+    """request.user if authentication already ran (DRF sets it); never forces a session lookup."""
+    user = getattr(request, 'user', None)
+    return None if type(user) is SimpleLazyObject else user
+
+
+class ReplicaPinMiddleware:
+    """Pins a client to the primary for REPLICA_PIN_SECONDS after it writes."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._pin(request, await self.get_response(request))
+
+    def _pin(self, request, response):
+        if replicas() and request.method not in SAFE_METHODS and response.status_code < 400:
+            seconds = pin_seconds()
+            response.set_cookie(PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax')
+            user = _resolved_user(request)
+            if user is not None and user.is_authenticated:
+                cache.set(_pin_key(user.pk), 1, seconds)
+        return response
@@ -0,0 +1,151 @@
+"""
+Full-text people search backed by SQLite FTS5 with the trigram tokenizer.
+
+Two FTS5 tables are kept in sync by the signal receivers in models.py:
+
+* core_user_search      rowid = user id,     columns username, display_label
+* core_identity_search  rowid = identity id, columns display_name, user_id
+
+Trigram indexing gives case-insensitive substring matching for any script
+(CJK, Tamil, ...), which is what the old `icontains` search did, but from an
+index instead of a full table scan. On other database vendors, or an SQLite
+built without FTS5 or the trigram tokenizer (3.34+), every function here is a
+no-op and search_users keeps using the ORM.
+"""
+import functools
+import sqlite3
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, router
+
+USER_TABLE = 'core_user_search'
+IDENTITY_TABLE = 'core_identity_search'
+
+# trigram needs at least three characters to match anything
+MIN_QUERY_LENGTH = 3
+
+# bm25 column weights: username, display_label; identity names count for less
+USER_WEIGHTS = (10.0, 5.0)
+IDENTITY_WEIGHT = 0.5
+
+
+@functools.cache
+def _trigram_available():
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute("CREATE VIRTUAL TABLE t USING fts5(x, tokenize='trigram')")
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def fts_available():
+    return connection.vendor == 'sqlite' and _trigram_available()
+
+
+def create_tables(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {USER_TABLE} "
+        f"USING fts5(username, display_label, tokenize='trigram')"
+    )
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {IDENTITY_TABLE} "
+        f"USING fts5(display_name, user_id UNINDEXED, tokenize='trigram')"
+    )
+
+
+def drop_tables(cursor):
+    cursor.execute(f"DROP TABLE IF EXISTS {USER_TABLE}")
+    cursor.execute(f"DROP TABLE IF EXISTS {IDENTITY_TABLE}")
+
+
+def rebuild(cursor):
+    """Repopulate both tables from the source tables in two INSERT ... SELECTs."""
+    from .models import Identity, Profile
+
+    cursor.execute(f"DELETE FROM {USER_TABLE}")
+    cursor.execute(f"DELETE FROM {IDENTITY_TABLE}")
+    cursor.execute(
+        f"INSERT INTO {USER_TABLE}(rowid, username, display_label) "
+        f"SELECT u.id, u.username, COALESCE(p.display_label, '') "
+        f"FROM {User._meta.db_table} u LEFT JOIN {Profile._meta.db_table} p ON p.user_id = u.id"
+    )
+    cursor.execute(
+        f"INSERT INTO {IDENTITY_TABLE}(rowid, display_name, user_id) "
+        f"SELECT id, display_name, user_id FROM {Identity._meta.db_table}"
+    )
+
+
+# ---- incremental sync (called from signal receivers) ----
+
+def index_user(user_id, username, display_label):
+    if not fts_available():
+        return
+    with connection.cursor() as c:
+        c.execute(f"DELETE FROM {USER_TABLE} WHERE rowid = %s", [user_id])
+        c.execute(
+            f"INSERT INTO {USER_TABLE}(rowid, username, display_label) VALUES (%s, %s, %s)",
+            [user_id, username, display_label or ''],
+        )
+
+
+def unindex_user(user_id):
+    if not fts_available():
+        return
+    with connection.cursor() as c:
+        c.execute(f"DELETE FROM {USER_TABLE} WHERE rowid = %s", [user_id])
+
+
+def index_identities(identities):
+    if not fts_available():
+        return
+    rows = [(i.pk, i.display_name, i.user_id) for i in identities if i.pk is not None]
+    if not rows:
+        return
+    with connection.cursor() as c:
+        c.executemany(f"DELETE FROM {IDENTITY_TABLE} WHERE rowid = %s", [(r[0],) for r in rows])
+        c.executemany(
+            f"INSERT INTO {IDENTITY_TABLE}(rowid, display_name, user_id) VALUES (%s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_identity(identity_id):
+    if not fts_available():
+        return
+    with connection.cursor() as c:
+        c.execute(f"DELETE FROM {IDENTITY_TABLE} WHERE rowid = %s", [identity_id])
+
+
+def unindex_identities(identity_ids):
+    if not fts_available() or not identity_ids:
+        return
+    with connection.cursor() as c:
+        c.executemany(f"DELETE FROM {IDENTITY_TABLE} WHERE rowid = %s", [(pk,) for pk in identity_ids])
+
+
+# ---- querying ----
+
+def _phrase(q):
+    # a quoted FTS5 string matches the text literally, operators and all
+    return '"' + q.replace('"', '""') + '"'
+
+
+def search_user_ids(q, limit=20):
+    """User ids whose username, label or any identity name contains q, best first."""
+    phrase = _phrase(q)
+    # a read replica when the request is routed to one (core/routers.py)
+    with connections[router.db_for_read(User)].cursor() as c:
+        c.execute(
+            f"SELECT user_id FROM ("
+            f"  SELECT rowid AS user_id, bm25({USER_TABLE}, %s, %s) AS score"
+            f"  FROM {USER_TABLE} WHERE {USER_TABLE} MATCH %s"
+            f"  UNION ALL"
+            f"  SELECT user_id, bm25({IDENTITY_TABLE}) * %s AS score"
+            f"  FROM {IDENTITY_TABLE} WHERE {IDENTITY_TABLE} MATCH %s"
+            f") GROUP BY user_id ORDER BY MIN(score), user_id LIMIT %s",
+            [*USER_WEIGHTS, phrase, IDENTITY_WEIGHT, phrase, limit],
+        )
+        return [row[0] for row in c.fetchall()]
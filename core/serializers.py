@@ -1,6 +1,9 @@
 
 import re
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .logins import record_login
 from .models import Identity, Profile
 
 class IdentitySerializer(serializers.ModelSerializer):
@@ -12,9 +15,36 @@ class IdentitySerializer(serializers.ModelSerializer):
         fields = ['id','display_name','context','language','username','role','created_at','updated_at']
         read_only_fields = ['username','role','created_at','updated_at']
 
+# .values() columns behind IdentitySerializer's fields, for identity_row()
+IDENTITY_VALUES = (
+    'id', 'display_name', 'context', 'language', 'user__username', 'user__profile__role', 'created_at', 'updated_at',
+)
+
+_datetime = serializers.DateTimeField().to_representation
+
+
+def identity_row(values):
+    """
+    IdentitySerializer's output for a `.values(*IDENTITY_VALUES)` dict.
+
+    Hot read paths use this to skip model instances and per-field
+    to_representation; keep it in step with IdentitySerializer.Meta.fields.
+    """
+    return {
+        'id': values['id'],
+        'display_name': values['display_name'],
+        'context': values['context'],
+        'language': values['language'],
+        'username': values['user__username'],
+        'role': values['user__profile__role'],
+        'created_at': _datetime(values['created_at']),
+        'updated_at': _datetime(values['updated_at']),
+    }
+
 class ProfileSerializer(serializers.ModelSerializer):
     username   = serializers.SerializerMethodField(read_only=True)
     avatar_url = serializers.SerializerMethodField(read_only=True)
+    avatar_urls = serializers.SerializerMethodField(read_only=True)
 
     preferred_identity = serializers.PrimaryKeyRelatedField(
         queryset=Identity.objects.all(), required=False, allow_null=True
@@ -26,11 +56,11 @@ class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = [
-            'username','display_label','bio','avatar','avatar_url','role',
+            'username','display_label','bio','avatar','avatar_url','avatar_urls','role',
             'gender_identity','pronouns',
             'website','github','twitter','linkedin','preferred_identity','preferred_identity_name','preferred_identity_data',
         ]
-        read_only_fields = ['username','avatar_url','role']
+        read_only_fields = ['username','avatar_url','avatar_urls','role']
 
     def to_internal_value(self, data):
         data = data.copy()
@@ -51,7 +81,20 @@ class ProfileSerializer(serializers.ModelSerializer):
         if obj.avatar and hasattr(obj.avatar, 'url'):
             return req.build_absolute_uri(obj.avatar.url) if req else obj.avatar.url
         return None
-    
+
+    def get_avatar_urls(self, obj):
+        """Resized renditions, {"64": {"webp": url, "jpeg": url}, ...}; {} until processed."""
+        if not obj.avatar:
+            return {}
+        req = self.context.get('request')
+        urls = {}
+        for size, files in (obj.avatar_renditions or {}).items():
+            urls[size] = {
+                fmt: req.build_absolute_uri(default_storage.url(name)) if req else default_storage.url(name)
+                for fmt, name in files.items()
+            }
+        return urls
+
     def get_preferred_identity_name(self, obj):
         pi = getattr(obj, 'preferred_identity', None)
         return getattr(pi, 'display_name', None) if pi else None
@@ -78,3 +121,20 @@ class ProfileSerializer(serializers.ModelSerializer):
             "updated_at": pi.updated_at,
             "created_at": pi.created_at,
         }
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds the claims ClaimsJWTAuthentication needs to skip the user lookup."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        profile = getattr(user, 'profile', None)
+        token['username'] = user.username
+        token['role'] = profile.role if profile else 'user'
+        token['rv'] = profile.role_version if profile else 0
+        return token
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        record_login(self.user)
+        return data
@@ -5,6 +5,8 @@ let token = localStorage.getItem("accessToken");
 let currentUser = "";
 let currentRole = "";
 let _allIdentities = [];
+let _identitiesNext = null; // cursor URL of the next page, null when exhausted
+let _identitiesPage = null; // in-flight request for the next page
 let _rendered = [];
 let currentPreferredIdentityId = null;
 
@@ -23,6 +25,16 @@ function formatDateISO(s) {
   return `${y}-${m}-${day} ${hh}:${mm}`;
 }
 
+// Avatar <img>: the smallest WebP rendition covering `px` at the device's
+// pixel ratio; the original upload until the renditions are ready.
+function setAvatar(img, prof, px) {
+  const urls = (prof && prof.avatar_urls) || {};
+  const sizes = Object.keys(urls).map(Number).sort((a, b) => a - b);
+  const want = px * (window.devicePixelRatio || 1);
+  const size = sizes.find((s) => s >= want) || sizes[sizes.length - 1];
+  img.src = size ? urls[size].webp || urls[size].jpeg : (prof && prof.avatar_url) || "";
+}
+
 function requireAuth() {
   if (!token) {
     window.location.href = "/api/login/";
@@ -244,25 +256,26 @@ async function fetchUserInfo() {
   if (!requireAuth()) return;
 
   const response = await authFetch("/api/user-info/");
-  if (response.ok) {
-    const data = await response.json();
-    currentUser = data.username;
-    currentRole = data.role;
-
-    const usernameSpan = document.getElementById("username");
-    const roleSpan = document.getElementById("role");
-    if (usernameSpan) usernameSpan.innerText = currentUser;
-    if (roleSpan) roleSpan.innerText = currentRole;
-
-    const adminPanel = document.getElementById("admin_lookup_panel");
-    if (adminPanel) {
-      if (currentRole === "admin") adminPanel.classList.remove("d-none");
-      else adminPanel.classList.add("d-none");
-    }
-    const btnPub = document.getElementById("btn_public_profile");
-    if (btnPub) {
-      btnPub.href = `/api/profile-page/${encodeURIComponent(currentUser)}/`;
-    }
+  if (response.ok) applyUserInfo(await response.json());
+}
+
+function applyUserInfo(data) {
+  currentUser = data.username;
+  currentRole = data.role;
+
+  const usernameSpan = document.getElementById("username");
+  const roleSpan = document.getElementById("role");
+  if (usernameSpan) usernameSpan.innerText = currentUser;
+  if (roleSpan) roleSpan.innerText = currentRole;
+
+  const adminPanel = document.getElementById("admin_lookup_panel");
+  if (adminPanel) {
+    if (currentRole === "admin") adminPanel.classList.remove("d-none");
+    else adminPanel.classList.add("d-none");
+  }
+  const btnPub = document.getElementById("btn_public_profile");
+  if (btnPub) {
+    btnPub.href = `/api/profile-page/${encodeURIComponent(currentUser)}/`;
   }
 }
 
@@ -270,25 +283,70 @@ async function fetchIdentities() {
   if (!requireAuth()) return;
 
   const container = document.getElementById("identityList");
-  if (container) {
-    container.innerHTML = `
-      <div class="col-12 text-center py-4">
-        <div class="spinner-border" role="status"></div>
-      </div>`;
-  }
+  showIdentitiesSpinner();
 
-  const response = await authFetch("/api/identities/");
-  if (!response.ok) {
+  _allIdentities = [];
+  _identitiesNext = null;
+  const ok = await loadIdentitiesPage("/api/identities/");
+  if (!ok) {
     if (container) {
       container.innerHTML =
         "<div class='col-12 text-danger'>Failed to load identities.</div>";
     }
     return;
   }
-
-  _allIdentities = await response.json(); // cache full list from server
   applyFilters(); // initial render with current UI values
 }
+
+async function loadIdentitiesPage(url) {
+  // server pages newest-first with a cursor; append to the local cache
+  const response = await authFetch(url);
+  if (!response.ok) return false;
+
+  const page = await response.json();
+  _allIdentities = _allIdentities.concat(page.results || []);
+  _identitiesNext = page.next || null;
+  updateLoadMore();
+  return true;
+}
+
+// One request for the next page at a time; callers share it
+function loadNextIdentities() {
+  if (!_identitiesPage && _identitiesNext) {
+    _identitiesPage = loadIdentitiesPage(_identitiesNext).finally(() => {
+      _identitiesPage = null;
+    });
+  }
+  return _identitiesPage || Promise.resolve(false);
+}
+
+async function loadMoreIdentities() {
+  if (await loadNextIdentities()) applyFilters();
+}
+
+async function loadAllIdentities() {
+  while (_identitiesNext) {
+    if (!(await loadNextIdentities())) return false;
+  }
+  return true;
+}
+
+function showIdentitiesSpinner() {
+  const container = document.getElementById("identityList");
+  if (!container) return;
+  container.innerHTML = `
+    <div class="col-12 text-center py-4">
+      <div class="spinner-border" role="status"></div>
+    </div>`;
+}
+
+function updateLoadMore() {
+  const more = document.getElementById("identityMore");
+  if (!more) return;
+  if (_identitiesNext) more.classList.remove("d-none");
+  else more.classList.add("d-none");
+}
+
 function getFilterValues() {
   const q =
     (document.getElementById("flt_q") || {}).value?.trim().toLowerCase() || "";
@@ -323,8 +381,23 @@ async function setAsDisplayed(id) {
   applyFilters();
 }
 
+// Pages arrive in the server's order, most recently updated first, so only
+// that view can be shown from the pages loaded so far. A filter or another
+// sort may need rows from any page: load them all first.
 function applyFilters() {
   const { q, ctx, lng, sort } = getFilterValues();
+  if (_identitiesNext && (q || ctx || lng || sort !== "recent")) {
+    showIdentitiesSpinner();
+    loadAllIdentities().then((ok) => {
+      if (ok) return applyFilters();
+      const container = document.getElementById("identityList");
+      if (container) {
+        container.innerHTML =
+          "<div class='col-12 text-danger'>Failed to load identities.</div>";
+      }
+    });
+    return;
+  }
   let list = [..._allIdentities];
 
   if (q)
@@ -387,9 +460,88 @@ function clearFilters() {
 }
 
 async function initHomePage() {
-  await fetchUserInfo();
-  await fetchPreferredIdentity();
-  await fetchIdentities();
+  if (!requireAuth()) return;
+
+  // one round trip for user info, profile and the first identity page
+  const response = await authFetch("/api/me/bootstrap/");
+  if (!response.ok) {
+    await fetchUserInfo();
+    await fetchPreferredIdentity();
+    await fetchIdentities();
+    connectLive(applyLiveEvent, fetchIdentities);
+    return;
+  }
+  const data = await response.json();
+  applyUserInfo(data.user);
+  currentPreferredIdentityId = (data.profile || {}).preferred_identity || null;
+  _allIdentities = data.identities.results || [];
+  _identitiesNext = data.identities.next || null;
+  updateLoadMore();
+  applyFilters();
+  connectLive(applyLiveEvent, fetchIdentities);
+}
+
+// ----------------------------
+// Live updates (WebSocket)
+// ----------------------------
+let _live = null;
+
+// Stream change events from /ws/live/ into onEvent. After a dropped
+// connection it reconnects with backoff and calls onResync, since events
+// sent while it was down are lost. The token goes in the subprotocol list,
+// which stays out of access logs. The server closes with 4401 when the
+// token is rejected, expires or is revoked; a handshake that keeps failing
+// before the socket opens is given up on after LIVE_MAX_FAILURES tries.
+const LIVE_MAX_FAILURES = 5;
+
+function connectLive(onEvent, onResync, delay = 1000, reconnect = false, failures = 0) {
+  if (!token || !("WebSocket" in window)) return;
+  const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+  const ws = new WebSocket(`${scheme}://${window.location.host}/ws/live/`, ["bearer", token]);
+  _live = ws;
+  let opened = false;
+  ws.onopen = () => {
+    opened = true;
+    if (reconnect && onResync) onResync();
+  };
+  ws.onmessage = (e) => onEvent(JSON.parse(e.data));
+  ws.onclose = (e) => {
+    _live = null;
+    if (e.code === 4401) return;
+    const failed = opened ? 0 : failures + 1;
+    if (failed >= LIVE_MAX_FAILURES) return;
+    const next = opened ? 1000 : Math.min(delay * 2, 30000);
+    setTimeout(() => connectLive(onEvent, onResync, next, true, failed), next);
+  };
+}
+
+function liveConnected() {
+  return !!_live && _live.readyState === WebSocket.OPEN;
+}
+
+// Home page: patch the local identity cache instead of refetching it
+function applyLiveEvent(ev) {
+  switch (ev.type) {
+    case "identity.saved": {
+      const idx = _allIdentities.findIndex((i) => i.id === ev.identity.id);
+      if (idx >= 0) _allIdentities[idx] = ev.identity;
+      else _allIdentities.unshift(ev.identity);
+      break;
+    }
+    case "identity.deleted":
+      _allIdentities = _allIdentities.filter((i) => i.id !== ev.id);
+      if (currentPreferredIdentityId === ev.id) currentPreferredIdentityId = null;
+      break;
+    case "identities.reset": // bulk import
+      fetchIdentities();
+      return;
+    case "profile.saved":
+      currentPreferredIdentityId = ev.profile.preferred_identity || null;
+      break;
+    default:
+      return;
+  }
+  applyFilters();
 }
 
 document.addEventListener("DOMContentLoaded", () => {
@@ -400,6 +552,14 @@ document.addEventListener("DOMContentLoaded", () => {
     q.addEventListener("keyup", (e) => {
       if (e.key === "Enter") applyFilters();
     });
+
+  // lazily pull the next page when the "load more" sentinel scrolls into view
+  const more = document.getElementById("identityMore");
+  if (more && "IntersectionObserver" in window) {
+    new IntersectionObserver((entries) => {
+      if (entries.some((e) => e.isIntersecting)) loadMoreIdentities();
+    }).observe(more);
+  }
 });
 
 // ----------------------------
@@ -452,8 +612,11 @@ async function deleteIdentity(ev) {
   });
 
   if (res.status === 204) {
-    // No content
-    await fetchIdentities();
+    // drop it locally; other tabs hear about it over the live socket
+    const gone = Number(id);
+    _allIdentities = _allIdentities.filter((i) => i.id !== gone);
+    if (currentPreferredIdentityId === gone) currentPreferredIdentityId = null;
+    applyFilters();
   } else {
     const msg = await res.text();
     alert("Failed to delete identity.\n" + msg);
@@ -564,8 +727,13 @@ async function initMyProfilePage() {
   document.getElementById("pf_twitter").value = prof.twitter || "";
   document.getElementById("pf_linkedin").value = prof.linkedin || "";
 
-  const img = document.getElementById("pf_avatar");
-  img.src = prof.avatar_url || "";
+  setAvatar(document.getElementById("pf_avatar"), prof, 96);
+
+  // renditions are made in the background; swap them in when they land
+  connectLive((ev) => {
+    if (ev.type === "profile.saved")
+      setAvatar(document.getElementById("pf_avatar"), ev.profile, 96);
+  });
 }
 
 async function saveMyProfile(e) {
@@ -592,7 +760,7 @@ async function saveMyProfile(e) {
   if (res.ok) {
     const data = await res.json();
     status.textContent = "Saved!";
-    document.getElementById("pf_avatar").src = data.avatar_url || "";
+    setAvatar(document.getElementById("pf_avatar"), data, 96);
     setTimeout(() => (status.textContent = ""), 1500);
   } else {
     status.textContent = "Save failed.";
@@ -650,7 +818,8 @@ async function importIdentitiesFromFile(ev) {
         (resp.errors?.length ? " Some rows had errors; open console." : "");
       alert(msg);
       if (resp.errors?.length) console.warn("Import errors:", resp.errors);
-      await fetchIdentities(); // refresh the grid
+      // the live socket announces the import with identities.reset
+      if (!liveConnected()) await fetchIdentities();
     } else {
       alert("Import failed: " + (resp.error || res.status));
     }
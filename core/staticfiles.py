@@ -0,0 +1,43 @@
+"""
+Static files through WhiteNoise, hashed and precompressed.
+
+With STATIC_MANIFEST on (the default when DEBUG is off), `collectstatic`
+writes every file under STATIC_ROOT with its content hash in the name
+(core/js/main.3f2a9c1b7e4d.js) plus .gz and .br copies. {% static %} in
+the templates resolves names through the manifest, so a page always asks for
+the current version, and StaticFilesMiddleware serves hashed names with
+`Cache-Control: max-age=315360000, public, immutable`, picking the .br or
+.gz copy the client accepts. Unhashed names are still served, cached for
+WHITENOISE_MAX_AGE only.
+
+WhiteNoiseMiddleware itself is sync-only: under ASGI, Django would run every
+request beneath it through async_to_sync. StaticFilesMiddleware adds an async
+path so the async views keep running on the event loop.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # stats the file system; only under DEBUG
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
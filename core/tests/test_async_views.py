@@ -0,0 +1,111 @@
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from core import async_views
+from core.models import Identity
+from core.serializers import ClaimsTokenObtainPairSerializer
+
+
+class AsyncReadViewTests(APITestCase):
+    """The async views answer exactly like the sync ones they stand in for."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.u2 = User.objects.create_user(username="user2", password="pass123")
+        Identity.objects.create(user=cls.u1, display_name="u1 Legal", context="Legal", language="en")
+        Identity.objects.create(user=cls.u1, display_name="u1 Work", context="Work", language="zh")
+        Identity.objects.create(user=cls.u2, display_name="u2 Social", context="Social", language="ms")
+        cls.token = str(ClaimsTokenObtainPairSerializer.get_token(cls.u1).access_token)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.client = APIClient()
+
+    async def assertSameAsSync(self, view, path, *args, headers=None):
+        sync = await sync_to_async(self.client.get)(path, headers=headers)
+        cache.clear()
+        response = await view(self.factory.get(path, headers=headers), *args)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(response.content, sync.content)
+        return response
+
+    async def test_public_profile(self):
+        r = await self.assertSameAsSync(async_views.public_profile, "/api/profile/user1/", "user1")
+        self.assertTrue(r.has_header("ETag"))
+
+    async def test_public_profile_missing(self):
+        await self.assertSameAsSync(async_views.public_profile, "/api/profile/ghost/", "ghost")
+
+    async def test_lookup_modes(self):
+        for query in ("", "?al=zh", "?mode=list&context=work", "?mode=ranked&al=en,zh;q=0.5", "?al=ta"):
+            with self.subTest(query=query):
+                await self.assertSameAsSync(
+                    async_views.public_identity_lookup, f"/api/public/lookup/user1/{query}", "user1",
+                )
+
+    async def test_lookup_missing_user(self):
+        r = await self.assertSameAsSync(
+            async_views.public_identity_lookup, "/api/public/lookup/ghost/", "ghost",
+        )
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_lookup_not_modified(self):
+        r = await async_views.public_identity_lookup(self.factory.get("/api/public/lookup/user1/"), "user1")
+        r304 = await async_views.public_identity_lookup(
+            self.factory.get("/api/public/lookup/user1/", headers={"If-None-Match": r["ETag"]}), "user1",
+        )
+        self.assertEqual(r304.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_search(self):
+        auth = {"Authorization": f"Bearer {self.token}"}
+        for q in ("", "us", "user2", "social"):
+            with self.subTest(q=q):
+                await self.assertSameAsSync(async_views.search_users, f"/api/users/search/?q={q}", headers=auth)
+
+    async def test_search_requires_auth(self):
+        r = await self.assertSameAsSync(async_views.search_users, "/api/users/search/?q=user")
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(r.has_header("WWW-Authenticate"))
+
+        bad = {"Authorization": "Bearer not-a-token"}
+        await self.assertSameAsSync(async_views.search_users, "/api/users/search/?q=user", headers=bad)
+
+    async def test_search_legacy_token(self):
+        token = AccessToken.for_user(self.u1)
+        r = await async_views.search_users(
+            self.factory.get("/api/users/search/?q=user2", headers={"Authorization": f"Bearer {token}"})
+        )
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    async def test_rejects_writes(self):
+        r = await async_views.public_profile(self.factory.post("/api/profile/user1/"), "user1")
+        self.assertEqual(r.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_bad_token_is_refused_everywhere(self):
+        auth = {"Authorization": "Bearer not-a-token"}
+        for view, path, args in (
+            (async_views.public_profile, "/api/profile/user1/", ("user1",)),
+            (async_views.public_identity_lookup, "/api/public/lookup/user1/", ("user1",)),
+            (async_views.search_users, "/api/users/search/?q=user", ()),
+        ):
+            with self.subTest(path=path):
+                r = await self.assertSameAsSync(view, path, *args, headers=auth)
+                self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @mock.patch("core.cache.get_user_version", side_effect=AssertionError("sync cache call"))
+    @mock.patch("core.conditional.get_user_validators", side_effect=AssertionError("sync cache call"))
+    async def test_cache_is_used_through_its_async_api(self, *_):
+        for query in ("", "?mode=ranked&al=en"):
+            with self.subTest(query=query):
+                r = await async_views.public_identity_lookup(
+                    self.factory.get(f"/api/public/lookup/user1/{query}"), "user1",
+                )
+                self.assertEqual(r.status_code, status.HTTP_200_OK)
@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import Identity, Profile
+
+
+@override_settings(LAST_LOGIN_UPDATE="sync")
+class ClaimsJWTAuthenticationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        Identity.objects.create(user=cls.u1, display_name="u1 Legal", context="Legal", language="en")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, username="user1", password="pass123"):
+        r = self.client.post("/api/token/", {"username": username, "password": password}, format="json")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {r.json()['access']}")
+        return r.json()["access"]
+
+    def test_token_carries_claims(self):
+        token = AccessToken(self.login())
+        self.assertEqual(token["username"], "user1")
+        self.assertEqual(token["role"], "user")
+        self.assertEqual(token["rv"], 0)
+
+    def test_read_skips_user_lookup(self):
+        self.login()
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get("/api/user-info/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.json(), {"username": "user1", "role": "user"})
+        # the process-local test cache never answers for role versions
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('"core_profile"', ctx.captured_queries[0]["sql"])
+
+    @mock.patch("core.cache.is_shared_cache", return_value=True)
+    def test_read_with_shared_cache_skips_queries(self, _):
+        self.login()
+        self.client.get("/api/user-info/")  # warms the role version cache
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get("/api/user-info/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_role_change_on_another_worker_invalidates_token(self):
+        self.login()
+        # what a process-local cache could hold after another worker's demotion
+        cache.set(f"role-ver:{self.u1.pk}", 0)
+        Profile.objects.filter(user=self.u1).update(role="user", role_version=1)
+        r = self.client.get("/api/user-info/")
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_read_lists_own_identities(self):
+        self.login()
+        r = self.client.get("/api/identities/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual([i["display_name"] for i in r.json()["results"]], ["u1 Legal"])
+
+    def test_write_uses_real_user(self):
+        self.login()
+        r = self.client.post(
+            "/api/identities/",
+            {"display_name": "u1 Work", "context": "Work", "language": "en"},
+            format="json",
+        )
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Identity.objects.filter(user=self.u1, display_name="u1 Work").exists())
+
+    def test_role_change_invalidates_token(self):
+        self.login()
+        self.assertEqual(self.client.get("/api/user-info/").status_code, status.HTTP_200_OK)
+
+        profile = User.objects.get(pk=self.u1.pk).profile
+        profile.role = "admin"
+        profile.save()
+
+        r = self.client.get("/api/user-info/")
+        self.assertEqual(r.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.login()
+        r = self.client.get("/api/user-info/")
+        self.assertEqual(r.json()["role"], "admin")
+
+    def test_other_profile_edits_keep_token(self):
+        self.login()
+        profile = User.objects.get(pk=self.u1.pk).profile
+        profile.bio = "hello"
+        profile.save()
+        self.assertEqual(self.client.get("/api/user-info/").status_code, status.HTTP_200_OK)
+
+    def test_legacy_token_without_claims(self):
+        token = AccessToken.for_user(self.u1)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        r = self.client.get("/api/user-info/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.json()["username"], "user1")
@@ -0,0 +1,107 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core import avatars
+from core.models import Profile
+
+
+class RecordingExecutor:
+    """Stands in for the thread pool: records jobs so the test runs them explicitly."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append(args)
+
+
+def png_upload(name="avatar.png", size=(600, 400), mode="RGBA"):
+    buf = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 255) if mode == "RGBA" else (200, 30, 30)).save(buf, "PNG")
+    return SimpleUploadedFile(name, buf.getvalue(), content_type="image/png")
+
+
+class AvatarRenditionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.executor = RecordingExecutor()
+        patcher = mock.patch.object(avatars, "get_executor", return_value=self.executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.u1)
+
+    def upload(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.client.patch("/api/me/profile/", {"avatar": png_upload(**kwargs)}, format="multipart")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        return r.json()
+
+    def test_upload_does_not_wait_for_renditions(self):
+        data = self.upload()
+        self.assertTrue(data["avatar_url"])
+        self.assertEqual(data["avatar_urls"], {})
+        self.assertEqual(len(self.executor.jobs), 1)
+
+    def test_renditions_are_published(self):
+        self.upload()
+        avatars.render_avatar(*self.executor.jobs[0])
+
+        data = self.client.get("/api/me/profile/").json()
+        self.assertEqual(set(data["avatar_urls"]), {"64", "128", "256"})
+        for size, files in data["avatar_urls"].items():
+            self.assertEqual(set(files), {"webp", "jpeg"})
+            self.assertTrue(files["webp"].endswith(f"-{size}.webp"))
+
+        renditions = Profile.objects.get(user=self.u1).avatar_renditions
+        with default_storage.open(renditions["64"]["webp"]) as fh, Image.open(fh) as img:
+            self.assertEqual((img.format, img.size), ("WEBP", (64, 64)))
+        with default_storage.open(renditions["256"]["jpeg"]) as fh, Image.open(fh) as img:
+            self.assertEqual((img.format, img.mode, img.size), ("JPEG", "RGB", (256, 256)))
+
+    def test_public_profile_sees_renditions(self):
+        self.upload()
+        self.assertEqual(self.client.get("/api/profile/user1/").json()["avatar_urls"], {})
+        avatars.render_avatar(*self.executor.jobs[0])
+        self.assertIn("64", self.client.get("/api/profile/user1/").json()["avatar_urls"])
+
+    def test_new_upload_replaces_renditions(self):
+        self.upload(name="first.png")
+        avatars.render_avatar(*self.executor.jobs[0])
+        first = Profile.objects.get(user=self.u1).avatar_renditions
+
+        data = self.upload(name="second.png", mode="RGB")
+        self.assertEqual(data["avatar_urls"], {})
+        avatars.render_avatar(*self.executor.jobs[1])
+
+        second = Profile.objects.get(user=self.u1).avatar_renditions
+        self.assertNotEqual(first["64"]["webp"], second["64"]["webp"])
+        self.assertFalse(default_storage.exists(first["64"]["webp"]))
+        self.assertTrue(default_storage.exists(second["64"]["webp"]))
+
+    def test_superseded_job_is_discarded(self):
+        self.upload(name="first.png")
+        self.upload(name="second.png")
+        avatars.render_avatar(*self.executor.jobs[0])
+        self.assertEqual(Profile.objects.get(user=self.u1).avatar_renditions, {})
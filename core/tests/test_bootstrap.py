@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.models import Identity
+
+
+class BootstrapTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.u2 = User.objects.create_user(username="user2", password="pass123")
+        for i in range(3):
+            Identity.objects.create(user=cls.u1, display_name=f"u1 Name {i}", context="Work", language="en")
+        Identity.objects.create(user=cls.u2, display_name="u2 Legal", context="Legal", language="zh")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.u1)
+
+    def test_matches_separate_endpoints(self):
+        r = self.client.get("/api/me/bootstrap/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        body = r.json()
+        self.assertEqual(body["user"], self.client.get("/api/user-info/").json())
+        self.assertEqual(body["profile"], self.client.get("/api/me/profile/").json())
+        self.assertEqual(body["identities"], self.client.get("/api/identities/").json())
+
+    def test_next_continues_at_identity_list(self):
+        body = self.client.get("/api/me/bootstrap/?page_size=2").json()
+        self.assertEqual(len(body["identities"]["results"]), 2)
+        nxt = body["identities"]["next"]
+        self.assertIn("/api/identities/?", nxt)
+        self.assertIn("page_size=2", nxt)
+        rest = self.client.get(nxt).json()
+        self.assertEqual([i["display_name"] for i in rest["results"]], ["u1 Name 0"])
+        self.assertIsNone(rest["next"])
+
+    def test_admin_sees_all_identities(self):
+        admin = User.objects.create_superuser(username="admin", password="pass123")
+        self.client.force_authenticate(admin)
+        body = self.client.get("/api/me/bootstrap/").json()
+        self.assertEqual(body["user"]["role"], "admin")
+        self.assertEqual(len(body["identities"]["results"]), 4)
+
+    def test_conditional(self):
+        etag = self.client.get("/api/me/bootstrap/")["ETag"]
+        r = self.client.get("/api/me/bootstrap/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_304_NOT_MODIFIED)
+        Identity.objects.create(user=self.u1, display_name="u1 New", context="Work", language="en")
+        r = self.client.get("/api/me/bootstrap/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    def test_requires_auth(self):
+        self.client.force_authenticate(None)
+        r = self.client.get("/api/me/bootstrap/")
+        self.assertIn(r.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
@@ -0,0 +1,144 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core import cache as user_cache
+from core.checks import check_shared_cache
+from core.models import Identity
+
+
+class ConditionalGetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.u2 = User.objects.create_user(username="user2", password="pass123")
+        cls.i_u1 = Identity.objects.create(user=cls.u1, display_name="u1 Legal", context="Legal", language="en")
+        cls.i_u2 = Identity.objects.create(user=cls.u2, display_name="u2 Work", context="Work", language="zh")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.u1)
+
+    def assertRevalidates(self, url, **extra):
+        r = self.client.get(url, **extra)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        etag = r["ETag"]
+        self.assertTrue(r.has_header("Last-Modified"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            r304 = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **extra)
+        self.assertEqual(r304.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(r304["ETag"], etag)
+        self.assertEqual(r304.content, b"")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        r = self.client.get(url, HTTP_IF_MODIFIED_SINCE=r["Last-Modified"], **extra)
+        self.assertEqual(r.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_my_profile(self):
+        etag = self.assertRevalidates("/api/me/profile/")
+        self.client.patch("/api/me/profile/", {"bio": "changed"}, format="json")
+        r = self.client.get("/api/me/profile/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.json()["bio"], "changed")
+        self.assertIn("private", r["Cache-Control"])
+
+    def test_public_profile(self):
+        etag = self.assertRevalidates("/api/profile/user2/")
+        profile = User.objects.get(pk=self.u2.pk).profile
+        profile.display_label = "Two"
+        profile.save()
+        r = self.client.get("/api/profile/user2/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    def test_public_lookup(self):
+        url = "/api/public/lookup/user1/?al=en"
+        etag = self.assertRevalidates(url)
+        # a different query is a different representation
+        r = self.client.get("/api/public/lookup/user1/?al=zh", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+        Identity.objects.create(user=self.u1, display_name="u1 New", context="Work", language="en")
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.json()["results"][0]["display_name"], "u1 New")
+
+    def test_ranked_lookup_varies_on_accept_language(self):
+        url = "/api/public/lookup/user1/?mode=ranked"
+        etag = self.assertRevalidates(url, HTTP_ACCEPT_LANGUAGE="en")
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_LANGUAGE="zh")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertIn("Accept-Language", r["Vary"])
+        self.assertNotIn("Accept-Language", self.client.get("/api/public/lookup/user1/").get("Vary", ""))
+
+    def test_identity_list(self):
+        etag = self.assertRevalidates("/api/identities/")
+        self.i_u1.display_name = "u1 Renamed"
+        self.i_u1.save()
+        r = self.client.get("/api/identities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.json()["results"][0]["display_name"], "u1 Renamed")
+
+    def test_identity_list_is_per_viewer(self):
+        etag = self.client.get("/api/identities/")["ETag"]
+        self.client.force_authenticate(self.u2)
+        r = self.client.get("/api/identities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    def test_admin_list_tracks_every_user(self):
+        admin = User.objects.create_superuser(username="admin", password="pass123")
+        self.client.force_authenticate(admin)
+        etag = self.client.get("/api/identities/")["ETag"]
+        self.assertEqual(
+            self.client.get("/api/identities/", HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        self.i_u2.context = "School"
+        self.i_u2.save()
+        r = self.client.get("/api/identities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    @mock.patch("core.cache.is_shared_cache", return_value=True)
+    def test_unknown_usernames_leave_nothing_for_good(self, _):
+        for path in ("/api/public/lookup/ghost/", "/api/profile/ghost/"):
+            self.assertEqual(self.client.get(path).status_code, 404)
+        self.assertIsNotNone(cache.get("user-ver:ghost"))
+        later = user_cache.time.time() + 60 * 60 * 24 + 1
+        with mock.patch("time.time", return_value=later):
+            self.assertEqual(cache.get_many(["user-ver:ghost", "user-mod:ghost"]), {})
+
+
+REDIS_CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://127.0.0.1:6379/1"}}
+
+
+class ProcessLocalCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(USER_VERSION_TIMEOUT=60)
+    def test_version_counters_expire(self):
+        version = user_cache.get_user_version("user1")
+        etag, _ = user_cache.get_user_validators("user1")
+        later = user_cache.time.time() + 61
+        with mock.patch("time.time", return_value=later):
+            self.assertNotEqual(user_cache.get_user_version("user1"), version)
+            self.assertNotEqual(user_cache.get_user_validators("user1")[0], etag)
+
+    def test_shared_cache_counters_live_longer(self):
+        self.assertEqual(user_cache.version_timeout(), 300)
+        with self.settings(CACHES=REDIS_CACHES):
+            self.assertTrue(user_cache.is_shared_cache())
+            self.assertEqual(user_cache.version_timeout(), 60 * 60 * 24)
+
+    def test_check_rejects_process_local_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+        with self.settings(CACHE_REQUIRE_SHARED=True):
+            self.assertEqual([e.id for e in check_shared_cache(None)], ["core.E001"])
+            with self.settings(CACHES=REDIS_CACHES):
+                self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,113 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from core import renderers
+from core.models import Identity, Profile
+from core.serializers import IDENTITY_VALUES, IdentitySerializer, identity_row
+
+# names that trip up encoders: quotes, escapes, JS line separators, CJK, astral, control chars
+AWKWARD = ["Jon \"JT\" Tan", "back\\slash/", "陈大文", "emoji 😀", "tab\tnew\nline\x01", "é\u0085\x7f", "js\u2028line\u2029sep"]
+
+
+class FastReadPathTests(APITestCase):
+    """The .values() + dumps_compact paths write the bytes the serializer path did."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.orphan = User.objects.create_user(username="orphan", password="pass123")
+        Profile.objects.filter(user=cls.orphan).delete()  # role serializes as null
+        for n, name in enumerate(AWKWARD):
+            Identity.objects.create(user=cls.u1, display_name=name, context=f"Ctx{n % 2}", language="en")
+        Identity.objects.create(user=cls.orphan, display_name="no profile", context="Work", language="zh")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.u1)
+
+    def serialized(self, qs):
+        return IdentitySerializer(qs, many=True).data
+
+    def test_identity_row_matches_serializer(self):
+        qs = Identity.objects.order_by("id")
+        self.assertEqual([identity_row(v) for v in qs.values(*IDENTITY_VALUES)], self.serialized(qs))
+
+    def assertListBytes(self):
+        r = self.client.get("/api/identities/?page_size=4")
+        page = Identity.objects.filter(user=self.u1).order_by("-updated_at", "-id")[:4]
+        expected = JSONRenderer().render({"next": r.json()["next"], "results": self.serialized(page)})
+        self.assertEqual(r.content, expected)
+        self.assertEqual(r["Content-Type"], "application/json")
+        self.assertIn(b"\\u2028", r.content)
+
+        r = self.client.get(r.json()["next"])
+        page = Identity.objects.filter(user=self.u1).order_by("-updated_at", "-id")[4:]
+        self.assertEqual(r.content, JSONRenderer().render({"next": None, "results": self.serialized(page)}))
+
+    def test_list(self):
+        self.assertListBytes()
+
+    def test_list_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertListBytes()
+
+    def test_list_other_renderers_keep_the_serializer(self):
+        r = self.client.get("/api/identities/", HTTP_ACCEPT="application/json; indent=2")
+        self.assertIn(b'\n  "results"', r.content)
+        r = self.client.get("/api/identities/?format=api")
+        self.assertIn(b"<html", r.content)
+
+    def assertNDJSONBytes(self):
+        r = self.client.get("/api/identities/export/?format=ndjson")
+        expected = "".join(
+            json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for row in self.serialized(Identity.objects.filter(user=self.u1).order_by("id"))
+        )
+        self.assertEqual(b"".join(r.streaming_content), expected.encode("utf-8"))
+
+    def test_export_ndjson(self):
+        self.assertNDJSONBytes()
+
+    def test_export_ndjson_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertNDJSONBytes()
+
+    def test_ndjson_render_matches_the_stream(self):
+        rows = [{"display_name": "a\u2028b", "id": 1}, {"display_name": "李", "id": 2}]
+        body = renderers.NDJSONRenderer().render(rows)
+        self.assertEqual(body, b"".join(renderers.NDJSONRenderer.dumps_line(row) for row in rows))
+        lines = body.decode("utf-8").split("\n")[:-1]  # splitlines() would also split at U+2028
+        self.assertEqual(lines, [json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in rows])
+
+    def test_export_json_across_batches(self):
+        for n in range(450):
+            Identity.objects.create(user=self.u1, display_name=f"bulk {n}", context="Work", language="en")
+        r = self.client.get("/api/identities/export/")
+        expected = JsonResponse(
+            {"items": self.serialized(Identity.objects.filter(user=self.u1).order_by("id"))},
+            json_dumps_params={"ensure_ascii": False},
+        ).content
+        self.assertEqual(b"".join(r.streaming_content), expected)
+
+    def test_lookup(self):
+        qs = Identity.objects.filter(user=self.u1).order_by("-updated_at", "id")
+        for query, rows in (("?mode=list", qs), ("", qs[:1]), ("?mode=list&context=ctx1", qs.filter(context="Ctx1"))):
+            with self.subTest(query=query):
+                r = self.client.get(f"/api/public/lookup/user1/{query}")
+                self.assertEqual(r.json()["results"], json.loads(json.dumps(self.serialized(rows))))
+
+        r = self.client.get("/api/public/lookup/orphan/?mode=ranked&al=zh")
+        self.assertIsNone(r.json()["results"][0]["role"])
+        self.assertIn("score", r.json()["results"][0])
+
+    def test_batch(self):
+        r = self.client.get("/api/public/batch/?usernames=user1,orphan&mode=list")
+        results = r.json()["results"]
+        self.assertEqual(len(results["user1"]["results"]), len(AWKWARD))
+        self.assertEqual(results["orphan"], None)  # no profile, so not a public user
@@ -0,0 +1,59 @@
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+from core import hashers, metrics
+
+
+def tearDownModule():
+    if hashers._executor is not None:
+        hashers._discard(hashers._executor)
+
+
+@override_settings(PASSWORD_HASH_WORKERS=1)
+class PooledHasherTests(SimpleTestCase):
+    def test_same_hashes_as_django(self):
+        expected = PBKDF2PasswordHasher().encode("s3cret", "saltsalt", 1000)
+        self.assertEqual(hashers.PooledPBKDF2PasswordHasher().encode("s3cret", "saltsalt", 1000), expected)
+        with self.settings(PASSWORD_HASH_WORKERS=0):
+            self.assertEqual(hashers.PooledPBKDF2PasswordHasher().encode("s3cret", "saltsalt", 1000), expected)
+
+    def test_existing_hashes_still_verify(self):
+        encoded = PBKDF2PasswordHasher().encode("s3cret", "saltsalt")
+        self.assertTrue(check_password("s3cret", encoded))
+        self.assertFalse(check_password("wrong", encoded))
+        self.assertTrue(make_password("s3cret").startswith("pbkdf2_sha256$"))
+
+    @override_settings(PASSWORD_HASH_TIMEOUT=0.001)
+    def test_timeout(self):
+        metrics.registry.clear()
+        with self.assertRaises(hashers.HashingUnavailable):
+            hashers.pbkdf2("s3cret", "saltsalt", 5_000_000, "sha256")
+        self.assertIn('core_password_hash_rejected_total{reason="timeout"} 1', metrics.registry.render())
+
+
+@override_settings(PASSWORD_HASH_WORKERS=1, LAST_LOGIN_UPDATE="off", RATE_LIMIT_ENABLED=False)
+class PooledLoginTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username="user1", password="pass123")
+
+    def login(self):
+        return self.client.post("/api/token/", {"username": "user1", "password": "pass123"}, format="json")
+
+    def register(self):
+        return self.client.post("/api/register/", {"username": "user2", "password": "pass123"}, format="json")
+
+    def test_login_and_register(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.register().status_code, 201)
+        self.assertTrue(User.objects.get(username="user2").check_password("pass123"))
+        self.assertIsNotNone(hashers._executor)
+
+    @override_settings(PASSWORD_HASH_QUEUE_LIMIT=0)
+    def test_full_queue_is_refused(self):
+        for r in (self.login(), self.register()):
+            with self.subTest(path=r.request["PATH_INFO"]):
+                self.assertEqual(r.status_code, 503)
+                self.assertEqual(r["Retry-After"], "1")
+        self.assertFalse(User.objects.filter(username="user2").exists())
@@ -1,5 +1,7 @@
 
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from core.models import Identity
@@ -37,15 +39,15 @@ class IdentityAPITests(APITestCase):
         self.client.force_authenticate(self.u1)
         r = self.client.get("/api/identities/")
         self.assertEqual(r.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(r.json()), 2)  # u1's two identities
-        names = {x["display_name"] for x in r.json()}
+        self.assertEqual(len(r.json()["results"]), 2)  # u1's two identities
+        names = {x["display_name"] for x in r.json()["results"]}
         self.assertSetEqual(names, {"u1 Legal", "u1 School"})
 
     def test_list_identities_admin_sees_all(self):
         self.client.force_authenticate(self.admin)
         r = self.client.get("/api/identities/")
         self.assertEqual(r.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(r.json()), 3)
+        self.assertEqual(len(r.json()["results"]), 3)
 
     def test_create_identity(self):
         self.client.force_authenticate(self.u1)
@@ -81,3 +83,51 @@ class IdentityAPITests(APITestCase):
         r = self.client.delete(f"/api/identities/{self.i2_u1.id}/")
         self.assertEqual(r.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Identity.objects.filter(id=self.i2_u1.id).exists())
+
+
+class IdentityPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="pager", password="pass123")
+        for n in range(7):
+            Identity.objects.create(user=cls.u1, display_name=f"N{n}", context="Work", language="en")
+        # force timestamp ties so the id tie-breaker is exercised
+        first = Identity.objects.filter(user=cls.u1).order_by("id").first()
+        Identity.objects.filter(user=cls.u1).update(updated_at=first.updated_at)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.u1)
+
+    def test_pages_cover_every_row_once(self):
+        seen = []
+        url = "/api/identities/?page_size=3"
+        while url:
+            r = self.client.get(url)
+            self.assertEqual(r.status_code, status.HTTP_200_OK)
+            body = r.json()
+            self.assertNotIn("count", body)
+            self.assertLessEqual(len(body["results"]), 3)
+            seen.extend(x["id"] for x in body["results"])
+            url = body["next"]
+        expected = list(
+            Identity.objects.filter(user=self.u1).order_by("-updated_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_is_single_query_without_offset_or_count(self):
+        r = self.client.get("/api/identities/?page_size=2")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(r.json()["next"])
+        sql = " ".join(q["sql"] for q in ctx.captured_queries).upper()
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT(", sql)
+
+    def test_page_size_is_capped(self):
+        r = self.client.get("/api/identities/?page_size=100000")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(r.json()["results"]), 7)
+
+    def test_invalid_cursor_is_404(self):
+        r = self.client.get("/api/identities/?cursor=not-a-cursor")
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
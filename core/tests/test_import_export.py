@@ -1,8 +1,15 @@
 
 import json
+from io import BytesIO
+from unittest import mock
+
 from django.contrib.auth.models import User
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
+from core.jsonstream import InvalidJSON, NoItemsArray, iter_json_items
+from core import search
 from core.models import Identity
 
 
@@ -21,10 +28,32 @@ class ImportExportTests(APITestCase):
         r = self.client.get("/api/identities/export/")
         self.assertEqual(r.status_code, status.HTTP_200_OK)
         self.assertEqual(r["Content-Disposition"].startswith('attachment;'), True)
-        payload = r.json()
+        payload = json.loads(b"".join(r.streaming_content))
         self.assertIn("items", payload)
         self.assertEqual(len(payload["items"]), 2)
 
+    def test_export_json_matches_non_streamed_bytes(self):
+        from django.http import JsonResponse
+        from core.serializers import IdentitySerializer
+
+        r = self.client.get("/api/identities/export/")
+        self.assertTrue(r.streaming)
+        qs = Identity.objects.filter(user=self.u1).order_by("id")
+        expected = JsonResponse(
+            {"items": IdentitySerializer(qs, many=True).data},
+            json_dumps_params={"ensure_ascii": False},
+        ).content
+        self.assertEqual(b"".join(r.streaming_content), expected)
+
+    def test_export_ndjson(self):
+        r = self.client.get("/api/identities/export/?format=ndjson")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertTrue(r["Content-Type"].startswith("application/x-ndjson"))
+        self.assertIn(".ndjson", r["Content-Disposition"])
+        lines = b"".join(r.streaming_content).decode("utf-8").splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([x["display_name"] for x in rows], ["Legal EN", "School ZH"])
+
     def test_import_valid_items(self):
         payload = {
             "items": [
@@ -58,3 +87,71 @@ class ImportExportTests(APITestCase):
         r = self.client.post("/api/identities/import/", {"file": file_tuple}, format="multipart")
         self.assertIn(r.status_code, (status.HTTP_201_CREATED, status.HTTP_200_OK))
         self.assertTrue(Identity.objects.filter(user=self.u1, display_name="FileNick").exists())
+
+    @override_settings(IDENTITY_IMPORT_BATCH_SIZE=2)
+    def test_import_top_level_array_in_batches(self):
+        payload = [{"name": f"Batch {n}", "context": "Work", "lang": "en"} for n in range(5)]
+        r = self.client.post("/api/identities/import/", payload, format="json")
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(r.json()["created_count"], 5)
+        self.assertEqual(Identity.objects.filter(user=self.u1, display_name__startswith="Batch").count(), 5)
+
+    def test_import_partial_is_207_with_item_errors(self):
+        payload = {"results": [{"display_name": "Ok"}, "junk", {"context": "Work"}]}
+        r = self.client.post("/api/identities/import/", payload, format="json")
+        self.assertEqual(r.status_code, 207)
+        body = r.json()
+        self.assertEqual(body["created_count"], 1)
+        self.assertEqual(body["total_received"], 3)
+        self.assertEqual(body["errors"], [
+            "Item 2: not an object",
+            "Item 3: 'display_name' / 'name' is required",
+        ])
+
+    @override_settings(IDENTITY_IMPORT_BATCH_SIZE=1)
+    def test_import_malformed_tail_rolls_back(self):
+        etag = self.client.get("/api/identities/")["ETag"]
+        raw = b'{"items": [{"display_name": "Early"}, {"display_name": "Late"}, {oops'
+        deleted = mock.Mock()
+        post_delete.connect(deleted, sender=Identity)
+        try:
+            r = self.client.post("/api/identities/import/", raw, content_type="application/json")
+        finally:
+            post_delete.disconnect(deleted, sender=Identity)
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Identity.objects.filter(user=self.u1, display_name="Early").exists())
+        # undone in bulk: no per-row signals, one version bump for the owner
+        deleted.assert_not_called()
+        self.assertNotEqual(self.client.get("/api/identities/")["ETag"], etag)
+        # the batch committed before the bad tail is gone from the search index too
+        self.assertEqual(search.search_user_ids("Early"), [])
+
+    def test_import_without_items_array(self):
+        r = self.client.post("/api/identities/import/", {"items": "nope"}, format="json")
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JSONStreamTests(SimpleTestCase):
+    def items(self, raw, chunk_size=3):
+        return list(iter_json_items(BytesIO(raw.encode("utf-8")), chunk_size=chunk_size))
+
+    def test_values_split_across_chunks(self):
+        raw = '{"meta": {"v": [1, 2]}, "items": [{"display_name": "李伟明"}, 12345, {"n": "தமிழ்"}]}'
+        self.assertEqual(
+            self.items(raw),
+            [{"display_name": "李伟明"}, 12345, {"n": "தமிழ்"}],
+        )
+
+    def test_top_level_array_and_bom(self):
+        self.assertEqual(self.items('\ufeff [ {"a": 1} , {"b": 2} ] '), [{"a": 1}, {"b": 2}])
+        self.assertEqual(self.items("[]"), [])
+
+    def test_missing_array(self):
+        for raw in ("", "{}", '{"items": 3}', '"text"'):
+            with self.assertRaises(NoItemsArray):
+                self.items(raw)
+
+    def test_malformed(self):
+        for raw in ("[1, 2", '{"items": [1,]}', "[1] [2]", '{"items" [1]}'):
+            with self.assertRaises(InvalidJSON):
+                self.items(raw)
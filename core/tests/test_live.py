@@ -0,0 +1,149 @@
+import json
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from core.consumers import CLOSE_UNAUTHORIZED, LiveUpdatesConsumer
+from core.models import Identity, Profile
+from core.serializers import ClaimsTokenObtainPairSerializer
+
+
+def token_for(user):
+    return str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+
+
+class LiveUpdatesTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.u2 = User.objects.create_user(username="user2", password="pass123")
+        cls.admin = User.objects.create_superuser(username="admin", password="pass123")
+        cls.i_u1 = Identity.objects.create(user=cls.u1, display_name="u1 Legal", context="Legal", language="en")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.u1)
+        self.sockets = []
+
+    async def connect(self, token):
+        communicator = self.communicator(token)
+        connected, code = await communicator.connect()
+        if connected:
+            self.sockets.append(communicator)
+        return communicator, connected, code
+
+    async def assertUnauthorized(self, communicator):
+        # the handshake is accepted, then closed, so a browser sees 4401 rather than 1006
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        closed = await communicator.receive_output(timeout=2)
+        self.assertEqual((closed["type"], closed["code"]), ("websocket.close", CLOSE_UNAUTHORIZED))
+
+    def communicator(self, token):
+        return WebsocketCommunicator(LiveUpdatesConsumer.as_asgi(), "/ws/live/", subprotocols=["bearer", token])
+
+    async def disconnect(self):
+        for communicator in self.sockets:
+            await communicator.disconnect()
+
+    async def receive(self, communicator):
+        return json.loads(await communicator.receive_from(timeout=2))
+
+    def committed(self, fn, *args, **kwargs):
+        """Run a write and its on_commit callbacks (the pushes) on a worker thread."""
+        def run():
+            with self.captureOnCommitCallbacks(execute=True):
+                return fn(*args, **kwargs)
+        return sync_to_async(run)()
+
+    async def test_rejects_missing_or_bad_token(self):
+        for token in ("", "not-a-token"):
+            with self.subTest(token=token):
+                await self.assertUnauthorized(self.communicator(token))
+
+    async def test_token_only_in_subprotocol(self):
+        _, connected, subprotocol = await self.connect(token_for(self.u1))
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, "bearer")  # the token is never echoed back
+        await self.disconnect()
+
+        query = WebsocketCommunicator(LiveUpdatesConsumer.as_asgi(), f"/ws/live/?token={token_for(self.u1)}")
+        await self.assertUnauthorized(query)
+
+    def test_nothing_queued_without_subscribers(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post("/api/identities/", {"display_name": "u1 Work", "context": "Work"}, format="json")
+            Profile.objects.get(user=self.u1).save()
+        self.assertEqual([c for c in callbacks if c.__module__ == "core.live"], [])
+
+    async def test_rejects_token_after_role_change(self):
+        token = token_for(self.u1)
+
+        def promote():
+            profile = Profile.objects.get(user=self.u1)
+            profile.role = "admin"
+            profile.save()
+        await self.committed(promote)
+        await self.assertUnauthorized(self.communicator(token))
+
+    async def test_identity_events(self):
+        communicator, connected, _ = await self.connect(token_for(self.u1))
+        self.assertTrue(connected)
+
+        r = await self.committed(
+            self.client.post, "/api/identities/",
+            {"display_name": "u1 Work", "context": "Work", "language": "zh"}, format="json",
+        )
+        event = await self.receive(communicator)
+        self.assertEqual(event["type"], "identity.saved")
+        self.assertEqual(event["identity"], r.json())
+
+        await self.committed(self.client.patch, f"/api/identities/{self.i_u1.pk}/", {"context": "School"})
+        event = await self.receive(communicator)
+        self.assertEqual((event["identity"]["id"], event["identity"]["context"]), (self.i_u1.pk, "School"))
+
+        await self.committed(self.client.delete, f"/api/identities/{self.i_u1.pk}/")
+        self.assertEqual(await self.receive(communicator), {"type": "identity.deleted", "id": self.i_u1.pk})
+        await self.disconnect()
+
+    async def test_only_the_owner_and_admins_hear(self):
+        owner, _, _ = await self.connect(token_for(self.u1))
+        other, _, _ = await self.connect(token_for(self.u2))
+        admin, _, _ = await self.connect(token_for(self.admin))
+
+        await self.committed(Identity.objects.create, user=self.u1, display_name="u1 New", context="Work")
+        self.assertEqual((await self.receive(owner))["type"], "identity.saved")
+        self.assertEqual((await self.receive(admin))["identity"]["display_name"], "u1 New")
+        self.assertTrue(await other.receive_nothing())
+
+        # an admin's own identity arrives once, not once per group
+        await self.committed(Identity.objects.create, user=self.admin, display_name="Admin", context="Work")
+        self.assertEqual((await self.receive(admin))["identity"]["display_name"], "Admin")
+        self.assertTrue(await admin.receive_nothing())
+        await self.disconnect()
+
+    async def test_profile_and_import_events(self):
+        communicator, _, _ = await self.connect(token_for(self.u1))
+
+        await self.committed(self.client.patch, "/api/me/profile/", {"preferred_identity": self.i_u1.pk})
+        event = await self.receive(communicator)
+        self.assertEqual(event["type"], "profile.saved")
+        self.assertEqual(event["profile"]["preferred_identity"], self.i_u1.pk)
+
+        await self.committed(
+            self.client.post, "/api/identities/import/",
+            [{"display_name": "A", "context": "Work"}, {"display_name": "B", "context": "Work"}], format="json",
+        )
+        self.assertEqual(await self.receive(communicator), {"type": "identities.reset"})
+        self.assertTrue(await communicator.receive_nothing())
+        await self.disconnect()
+
+    async def test_legacy_token(self):
+        _, connected, _ = await self.connect(str(AccessToken.for_user(self.u1)))
+        self.assertTrue(connected)
+        await self.disconnect()
+
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core import logins
+from core.models import Profile
+
+
+class ProfileDirtyTrackingTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+
+    def profile_writes(self, queries):
+        return [q["sql"] for q in queries if q["sql"].startswith('UPDATE "core_profile"')]
+
+    def test_user_save_skips_clean_profile(self):
+        user = User.objects.select_related("profile").get(pk=self.u1.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            user.save(update_fields=["last_login"])
+            user.save()
+        self.assertEqual(self.profile_writes(ctx.captured_queries), [])
+
+    def test_user_save_writes_only_changed_profile_fields(self):
+        user = User.objects.get(pk=self.u1.pk)
+        user.profile.bio = "hello"
+        with CaptureQueriesContext(connection) as ctx:
+            user.save()
+        writes = self.profile_writes(ctx.captured_queries)
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"bio"', writes[0])
+        self.assertNotIn('"display_label"', writes[0])
+        self.assertEqual(Profile.objects.get(user=self.u1).bio, "hello")
+
+    def test_dirty_fields(self):
+        profile = Profile.objects.get(user=self.u1)
+        self.assertEqual(profile.dirty_fields(), set())
+        profile.pronouns = "they/them"
+        self.assertEqual(profile.dirty_fields(), {"pronouns"})
+        profile.save(update_fields=["pronouns"])
+        self.assertEqual(profile.dirty_fields(), set())
+        self.assertIsNone(Profile(user=self.u1).dirty_fields())
+
+
+class LastLoginTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+
+    def setUp(self):
+        self.client = APIClient()
+        logins.get_queue().flush()
+
+    def login(self):
+        r = self.client.post("/api/token/", {"username": "user1", "password": "pass123"}, format="json")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    def test_sync_updates_last_login(self):
+        with self.settings(LAST_LOGIN_UPDATE="sync"):
+            self.login()
+        self.assertIsNotNone(User.objects.get(pk=self.u1.pk).last_login)
+
+    def test_deferred_coalesces_until_flush(self):
+        with self.settings(LAST_LOGIN_UPDATE="deferred", LAST_LOGIN_FLUSH_INTERVAL=None):
+            self.login()
+            self.login()
+        self.assertIsNone(User.objects.get(pk=self.u1.pk).last_login)
+        self.assertEqual(logins.get_queue().flush(), 1)
+        self.assertIsNotNone(User.objects.get(pk=self.u1.pk).last_login)
+
+    def test_off(self):
+        with self.settings(LAST_LOGIN_UPDATE="off"):
+            self.login()
+        self.assertEqual(logins.get_queue().flush(), 0)
+        self.assertIsNone(User.objects.get(pk=self.u1.pk).last_login)
+
+    def test_off_by_default(self):
+        self.assertEqual(settings.LAST_LOGIN_UPDATE, "off")
+        self.login()
+        self.assertIsNone(User.objects.get(pk=self.u1.pk).last_login)
+
+    def test_simplejwt_update_last_login_wins(self):
+        # simplejwt's modules hold on to the api_settings object read at import
+        with mock.patch.object(logins.api_settings, "UPDATE_LAST_LOGIN", True), \
+                self.settings(LAST_LOGIN_UPDATE="deferred", LAST_LOGIN_FLUSH_INTERVAL=None):
+            self.login()
+        self.assertEqual(logins.get_queue().flush(), 0)
+        self.assertIsNotNone(User.objects.get(pk=self.u1.pk).last_login)
+
+    def test_background_flush_failures_are_logged(self):
+        queue = logins.LastLoginQueue()
+        queue._pending[self.u1.pk] = None
+        with mock.patch.object(User.objects, "bulk_update", side_effect=RuntimeError("db down")):
+            with self.assertLogs("core.logins", "ERROR") as logs:
+                queue.flush_logged()
+        self.assertIn("db down", logs.output[0])
+        self.assertEqual(queue._pending, {self.u1.pk: None})  # kept for the next tick
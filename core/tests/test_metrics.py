@@ -0,0 +1,104 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, override_settings
+from rest_framework.test import APITestCase, APIClient
+from core import metrics
+from core.models import Identity
+
+
+def sample(text, name, **labels):
+    """Value of one series in the exposition text, or None."""
+    prefix = name + "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "} "
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+
+@override_settings(METRICS_SERVER_TIMING=True)
+class MetricsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        Identity.objects.create(user=cls.u1, display_name="u1 Legal", context="Legal", language="en")
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        self.client = APIClient()
+
+    def scrape(self):
+        r = self.client.get("/metrics")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return r.content.decode()
+
+    def test_server_timing_header(self):
+        r = self.client.get("/api/profile/user1/")
+        self.assertRegex(r["Server-Timing"], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries"$')
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_can_be_turned_off(self):
+        self.assertFalse(self.client.get("/api/profile/user1/").has_header("Server-Timing"))
+
+    def test_per_view_series(self):
+        for _ in range(3):
+            self.client.get("/api/profile/user1/")
+        self.client.get("/api/profile/ghost/")
+        text = self.scrape()
+
+        view = dict(view="public_profile", method="GET")
+        self.assertEqual(sample(text, "core_http_request_duration_seconds_count", **view), 4)
+        self.assertEqual(sample(text, "core_http_requests_total", **view, status=200), 3)
+        self.assertEqual(sample(text, "core_http_requests_total", **view, status=404), 1)
+        self.assertEqual(sample(text, "core_http_db_queries_total", **view), 4)
+        self.assertGreater(sample(text, "core_http_db_duration_seconds_total", **view), 0)
+        self.assertGreater(sample(text, "core_http_response_bytes_total", **view), 0)
+
+        buckets = re.findall(
+            r'core_http_request_duration_seconds_bucket\{view="public_profile",method="GET",le="([^"]+)"\} (\d+)', text,
+        )
+        self.assertEqual(buckets[-1], ("+Inf", "4"))
+        counts = [int(n) for _, n in buckets]
+        self.assertEqual(counts, sorted(counts))  # cumulative
+
+    def test_unrouted_paths_share_one_series(self):
+        self.client.get("/no/such/page/1")
+        self.client.get("/no/such/page/2")
+        text = self.scrape()
+        self.assertEqual(sample(text, "core_http_requests_total", view="<unmatched>", method="GET", status=404), 2)
+        self.assertNotIn("/no/such", text)
+
+    def test_streamed_responses_add_no_bytes(self):
+        self.client.force_authenticate(self.u1)
+        r = self.client.get("/api/identities/export/")
+        b"".join(r.streaming_content)
+        text = self.scrape()
+        self.assertEqual(sample(text, "core_http_requests_total", view="identities_export", method="GET", status=200), 1)
+        self.assertEqual(sample(text, "core_http_response_bytes_total", view="identities_export", method="GET"), 0)
+
+    async def test_async_requests_count_queries_on_worker_threads(self):
+        async def view(request):
+            n = await sync_to_async(Identity.objects.count)()
+            return HttpResponse(str(n))
+
+        middleware = metrics.MetricsMiddleware(view)
+        r = await middleware(AsyncRequestFactory().get("/async/"))
+        self.assertIn('desc="1 queries"', r["Server-Timing"])
+        text = metrics.registry.render()
+        self.assertEqual(sample(text, "core_http_db_queries_total", view="<unmatched>", method="GET"), 1)
+
+    @override_settings(METRICS_ALLOWED_IPS=("10.0.0.1",))
+    def test_scrape_restricted_by_address(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.1").status_code, 200)
+
+    def test_label_escaping(self):
+        registry = metrics.Registry(buckets=(0.1,))
+        registry.observe('we"ird\\view', "GET", 200, 0.05, 0, 0.0, 10)
+        text = registry.render()
+        self.assertIn('core_http_request_duration_seconds_bucket{view="we\\"ird\\\\view",method="GET",le="0.1"} 1', text)
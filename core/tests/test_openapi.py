@@ -0,0 +1,73 @@
+import json
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from core import openapi
+
+
+class OpenAPIDocsTests(SimpleTestCase):
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp()) / "openapi.json"
+        patcher = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        call_command("generate_openapi", stdout=StringIO())
+        self.addCleanup(openapi.reset)
+
+    def test_serves_the_generated_file(self):
+        r = self.client.get("/openapi.json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.content, self.path.read_bytes())
+        doc = json.loads(r.content)
+        self.assertIn("/profile/{username}/", doc["paths"])
+        self.assertIn("Bearer", doc["securityDefinitions"])
+        self.assertIn("max-age=3600", r["Cache-Control"])
+
+        r = self.client.get("/openapi.json", headers={"If-None-Match": r["ETag"]})
+        self.assertEqual(r.status_code, 304)
+
+    def test_requests_do_not_introspect(self):
+        with mock.patch.object(openapi, "generate") as generate:
+            for url in ("/openapi.json", "/swagger/", "/redoc/", "/swagger/?format=openapi"):
+                with self.subTest(url=url):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+        generate.assert_not_called()
+
+    def test_ui_pages_point_at_the_document(self):
+        for url in ("/swagger/", "/redoc/"):
+            with self.subTest(url=url):
+                r = self.client.get(url)
+                self.assertContains(r, '"url": "/openapi.json"')
+                self.assertNotContains(r, "csrfmiddlewaretoken")
+                self.assertEqual(self.client.get(url, headers={"If-None-Match": r["ETag"]}).status_code, 304)
+
+    def test_missing_file_is_generated_once(self):
+        self.path.unlink()
+        openapi.reset()
+        with self.assertLogs("core.openapi", "WARNING"):
+            body = self.client.get("/openapi.json").content
+        self.assertEqual(json.loads(body)["info"]["title"], "Identity API")
+
+    def test_check(self):
+        call_command("generate_openapi", "--check", stdout=StringIO())
+        self.path.write_text("{}")
+        with self.assertRaises(CommandError):
+            call_command("generate_openapi", "--check", stdout=StringIO())
+
+    def test_urlconf_does_not_import_drf_yasg(self):
+        code = (
+            "import sys, django; django.setup(); import c3070_final.urls; "
+            "print(any(m.startswith('drf_yasg.') for m in sys.modules))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={"DJANGO_SETTINGS_MODULE": "c3070_final.settings", "PATH": ""},
+        )
+        self.assertEqual(out.stdout.strip(), "False")
@@ -0,0 +1,306 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.models import Identity
+from core.ranking import compile_accept_language, rank_candidates
+
+
+class PublicLookupTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        User.objects.create_user(username="empty", password="pass123")
+        cls.legal_en = Identity.objects.create(user=cls.u1, display_name="Jon Tan", context="Legal", language="en-GB")
+        cls.legal_zh = Identity.objects.create(user=cls.u1, display_name="陈", context="Legal", language="Mandarin")
+        cls.work_en = Identity.objects.create(user=cls.u1, display_name="JT", context="Work", language="en")
+        cls.odd = Identity.objects.create(user=cls.u1, display_name="???", context="Work", language="klingon")
+        # deterministic recency: work_en newest, then legal_zh, then legal_en
+        now = timezone.now()
+        for n, ident in enumerate([cls.work_en, cls.legal_zh, cls.legal_en, cls.odd]):
+            Identity.objects.filter(pk=ident.pk).update(updated_at=now - timedelta(minutes=n))
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def lookup(self, query=""):
+        r = self.client.get(f"/api/public/lookup/user1/{query}")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        return r.json()
+
+    def test_language_key_is_normalised_on_save(self):
+        self.assertEqual(self.legal_en.language_key, "en")
+        self.assertEqual(self.legal_zh.language_key, "zh")
+        self.assertEqual(self.odd.language_key, "")
+
+    def test_best_is_newest_match(self):
+        body = self.lookup()
+        self.assertEqual(body["mode"], "best")
+        self.assertEqual(body["count"], 1)
+        self.assertEqual(body["results"][0]["display_name"], "JT")
+        self.assertEqual(body["username"], "user1")
+
+    def test_context_and_aliases(self):
+        body = self.lookup("?context=legal&accept_language=Chinese&mode=all")
+        self.assertEqual([x["display_name"] for x in body["results"]], ["陈"])
+        self.assertEqual(body["applied_context"], "legal")
+        self.assertEqual(body["accept_language"], ["Chinese"])
+
+    def test_accept_language_tokens_reduce_to_primary(self):
+        body = self.lookup("?al=en-US;q=0.9,xx-unknown-word&mode=all")
+        self.assertEqual(body["mode"], "list")
+        self.assertEqual([x["display_name"] for x in body["results"]], ["JT", "Jon Tan"])
+        self.assertEqual(body["accept_language"], ["en-US", "xx-unknown-word"])
+
+    def test_unknown_language_only_does_not_gate(self):
+        body = self.lookup("?al=klingon-language-please&mode=all")
+        self.assertEqual(body["count"], 4)
+
+    def test_no_match_still_names_user(self):
+        body = self.lookup("?context=Gaming")
+        self.assertEqual(body["count"], 0)
+        self.assertEqual(body["username"], "user1")
+        r = self.client.get("/api/public/lookup/empty/")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.json()["results"], [])
+
+    def test_unknown_user_is_404(self):
+        r = self.client.get("/api/public/lookup/nobody/")
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_imported_rows_get_language_key(self):
+        self.client.force_authenticate(self.u1)
+        self.client.post(
+            "/api/identities/import/",
+            {"items": [{"display_name": "Imported", "context": "Social", "language": "Tamil"}]},
+            format="json",
+        )
+        self.assertEqual(Identity.objects.get(display_name="Imported").language_key, "ta")
+
+
+class PublicLookupCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.ident = Identity.objects.create(user=cls.u1, display_name="Jon", context="Legal", language="en")
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def get(self, query="?mode=all"):
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(f"/api/public/lookup/user1/{query}")
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        return r.json(), len(ctx.captured_queries)
+
+    def test_repeat_lookup_is_served_from_cache(self):
+        first, n1 = self.get()
+        second, n2 = self.get()
+        self.assertEqual(n1, 1)
+        self.assertEqual(n2, 0)
+        self.assertEqual(first, second)
+
+    def test_normalised_params_share_an_entry_but_echo_the_request(self):
+        self.get("?context=LEGAL&al=English")
+        body, n = self.get("?context=legal&al=en")
+        self.assertEqual(n, 0)
+        self.assertEqual(body["applied_context"], "legal")
+        self.assertEqual(body["accept_language"], ["en"])
+
+    def test_identity_changes_invalidate(self):
+        self.get()
+        Identity.objects.create(user=self.u1, display_name="New", context="Work", language="en")
+        body, n = self.get()
+        self.assertGreater(n, 0)
+        self.assertEqual(body["count"], 2)
+
+        self.ident.display_name = "Renamed"
+        self.ident.save()
+        body, _ = self.get()
+        self.assertIn("Renamed", [x["display_name"] for x in body["results"]])
+
+        self.ident.delete()
+        body, _ = self.get()
+        self.assertEqual(body["count"], 1)
+
+    def test_profile_change_invalidates(self):
+        body, _ = self.get()
+        self.assertEqual(body["results"][0]["role"], "user")
+        profile = self.u1.profile
+        profile.role = "admin"
+        profile.save()
+        body, _ = self.get()
+        self.assertEqual(body["results"][0]["role"], "admin")
+
+    def test_bulk_import_invalidates(self):
+        self.get()
+        self.client.force_authenticate(self.u1)
+        self.client.post("/api/identities/import/", {"items": [{"display_name": "Bulk"}]}, format="json")
+        self.client.force_authenticate(None)
+        body, _ = self.get()
+        self.assertEqual(body["count"], 2)
+
+    def test_deleted_user_is_404_again(self):
+        other = User.objects.create_user(username="gone", password="x")
+        self.assertEqual(self.client.get("/api/public/lookup/gone/").status_code, 200)
+        other.delete()
+        self.assertEqual(self.client.get("/api/public/lookup/gone/").status_code, 404)
+
+
+class AcceptLanguageParsingTests(SimpleTestCase):
+    def test_q_values_order_and_aliases(self):
+        prefs = compile_accept_language("zh;q=0.5, en-GB , English;q=0.8, fr;q=0, *;q=0.1")
+        self.assertEqual(prefs.tags, ["en-gb", "en", "zh", "*"])
+        self.assertEqual(prefs.primaries, {"en", "zh"})
+        self.assertGreater(prefs.wildcard, 0)
+
+    def test_bad_q_and_empty(self):
+        self.assertEqual(compile_accept_language("ta;q=abc").tags, ["ta"])
+        self.assertEqual(compile_accept_language("").tags, [])
+
+    def test_compiled_headers_are_memoised(self):
+        self.assertIs(compile_accept_language("en, zh;q=0.4"), compile_accept_language("en, zh;q=0.4"))
+
+    def test_region_fallbacks(self):
+        now = timezone.now()
+        rows = [
+            (1, "en-US", "en", "", now),
+            (2, "en-GB", "en", "", now),
+            (3, "en", "en", "", now),
+            (4, "zh", "zh", "", now),
+        ]
+        # exact region first, then the bare primary, then a sibling region
+        ranked = rank_candidates(rows, compile_accept_language("en-GB"), limit=4)
+        self.assertEqual([pk for pk, _ in ranked], [2, 3, 1, 4])
+        # a bare "en" range accepts every English variant equally; ties go to the lowest id
+        ranked = rank_candidates(rows, compile_accept_language("en"), limit=2)
+        self.assertEqual([pk for pk, _ in ranked], [3, 1])
+
+
+class RankedLookupTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        make = lambda name, ctx, lang: Identity.objects.create(
+            user=cls.u1, display_name=name, context=ctx, language=lang
+        )
+        cls.work_en = make("JT", "Work", "en")
+        cls.legal_gb = make("Jonathan Tan", "Legal", "en-GB")
+        cls.legal_zh = make("陈", "Legal", "zh")
+        cls.social_ta = make("Jon", "Social", "ta")
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def ranked(self, query="", **headers):
+        r = self.client.get(f"/api/public/lookup/user1/?mode=ranked{query}", **headers)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        body = r.json()
+        self.assertEqual(body["mode"], "ranked")
+        return body
+
+    def names(self, body):
+        return [x["display_name"] for x in body["results"]]
+
+    def test_uses_accept_language_header(self):
+        body = self.ranked(HTTP_ACCEPT_LANGUAGE="zh-TW,zh;q=0.9,en;q=0.5")
+        self.assertEqual(self.names(body)[0], "陈")
+        self.assertEqual(body["accept_language"], ["zh-tw", "zh", "en"])
+        self.assertNotIn("Jon", self.names(body))  # Tamil is not acceptable
+        self.assertIn("score", body["results"][0])
+
+    def test_query_param_overrides_header(self):
+        body = self.ranked("&al=ta", HTTP_ACCEPT_LANGUAGE="zh")
+        self.assertEqual(self.names(body), ["Jon"])
+
+    def test_context_outweighs_language_quality(self):
+        body = self.ranked("&context=legal&limit=2", HTTP_ACCEPT_LANGUAGE="en-GB,zh;q=0.3")
+        self.assertEqual(self.names(body), ["Jonathan Tan", "陈"])
+
+    def test_falls_back_when_no_language_matches(self):
+        body = self.ranked("&context=social", HTTP_ACCEPT_LANGUAGE="fr")
+        self.assertEqual(self.names(body)[0], "Jon")
+        self.assertEqual(body["count"], 4)
+
+    def test_unknown_user(self):
+        r = self.client.get("/api/public/lookup/nobody/?mode=ranked")
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PublicBatchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        for n in range(1, 4):
+            u = User.objects.create_user(username=f"user{n}", password="pass123")
+            cls.users[u.username] = u
+            Identity.objects.create(user=u, display_name=f"u{n} Legal", context="Legal", language="en")
+            Identity.objects.create(user=u, display_name=f"u{n} Work", context="Work", language="zh")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def batch(self, query):
+        r = self.client.get(f"/api/public/batch/?{query}")
+        self.assertEqual(r.status_code, status.HTTP_200_OK, r.content)
+        return r.json()
+
+    def test_matches_single_lookups(self):
+        body = self.batch("usernames=user1,user2&al=en&context=legal")
+        self.assertEqual(list(body["results"]), ["user1", "user2"])
+        for name in ("user1", "user2"):
+            single = self.client.get(f"/api/public/lookup/{name}/?al=en&context=legal").json()
+            profile = self.client.get(f"/api/profile/{name}/").json()
+            entry = body["results"][name]
+            self.assertEqual(entry["results"], single["results"])
+            self.assertEqual(entry["count"], single["count"])
+            self.assertEqual(entry["profile"], profile)
+
+    def test_best_picks_newest_per_user(self):
+        Identity.objects.create(user=self.users["user2"], display_name="u2 Newest", context="Social", language="ms")
+        body = self.batch("usernames=user1,user2")
+        self.assertEqual(body["results"]["user1"]["results"][0]["display_name"], "u1 Work")
+        self.assertEqual(body["results"]["user2"]["results"][0]["display_name"], "u2 Newest")
+        self.assertEqual(body["results"]["user2"]["count"], 1)
+
+    def test_list_mode(self):
+        body = self.batch("usernames=user3&mode=list")
+        self.assertEqual(
+            [r["display_name"] for r in body["results"]["user3"]["results"]], ["u3 Work", "u3 Legal"],
+        )
+
+    def test_unknown_username_is_null(self):
+        body = self.batch("usernames=user1,ghost")
+        self.assertIsNone(body["results"]["ghost"])
+        self.assertEqual(body["results"]["user1"]["count"], 1)
+
+    def test_fixed_query_count(self):
+        with CaptureQueriesContext(connection) as small:
+            self.batch("usernames=user1&mode=list")
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            self.batch("usernames=user1,user2,user3,ghost&mode=list")
+        self.assertEqual(len(small.captured_queries), 2)
+        self.assertEqual(len(large.captured_queries), 2)
+        # identities come from the lookup cache the second time
+        with CaptureQueriesContext(connection) as cached:
+            self.batch("usernames=user1,user2,user3,ghost&mode=list")
+        self.assertEqual(len(cached.captured_queries), 1)
+
+    def test_validation(self):
+        self.assertEqual(self.client.get("/api/public/batch/").status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(PUBLIC_BATCH_MAX_USERNAMES=2):
+            r = self.client.get("/api/public/batch/?usernames=user1,user2,user3")
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        r = self.client.get("/api/public/batch/?usernames=user1&mode=ranked")
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
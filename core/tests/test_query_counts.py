@@ -0,0 +1,110 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core.models import Identity
+
+
+class QueryBudgetMixin:
+    """
+    Query-count regression harness.
+
+    `assertQueryBudget` requests an endpoint, checks it stays within its
+    budget, then grows the data set and checks the count does not move.
+    """
+
+    auth_user_pk = None
+
+    def count_queries(self, url, **extra):
+        if self.auth_user_pk is not None:
+            # a fresh instance per request, like the auth backend would load
+            self.client.force_authenticate(User.objects.get(pk=self.auth_user_pk))
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(url, **extra)
+            if r.streaming:
+                # streamed bodies query while being consumed
+                b"".join(r.streaming_content)
+        return r, len(ctx.captured_queries), ctx.captured_queries
+
+    def assertQueryBudget(self, url, budget, grow=None, **extra):
+        r, n, queries = self.count_queries(url, **extra)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            n, budget,
+            f"{url} ran {n} queries (budget {budget}):\n" + "\n".join(q["sql"] for q in queries),
+        )
+        if grow is not None:
+            grow()
+            r, n_after, queries = self.count_queries(url, **extra)
+            self.assertEqual(r.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                n_after, n,
+                f"{url} query count grew with data ({n} -> {n_after}):\n"
+                + "\n".join(q["sql"] for q in queries),
+            )
+        return r
+
+
+class EndpointQueryCountTests(QueryBudgetMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.u2 = User.objects.create_user(username="user2", password="pass123")
+        cls.admin = User.objects.create_superuser(username="admin", password="adminpass", email="a@a.com")
+        for u in (cls.u1, cls.u2):
+            Identity.objects.create(user=u, display_name=f"{u.username} Legal", context="Legal", language="en")
+            Identity.objects.create(user=u, display_name=f"{u.username} Work", context="Work", language="zh")
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def login(self, user):
+        self.auth_user_pk = user.pk
+
+    def grow(self, *users, n=5):
+        def _grow():
+            for u in users:
+                for i in range(n):
+                    Identity.objects.create(user=u, display_name=f"extra {i}", context="Social", language="en")
+        return _grow
+
+    def test_identity_list_user(self):
+        self.login(self.u1)
+        # profile role + one page
+        self.assertQueryBudget("/api/identities/", 2, grow=self.grow(self.u1))
+
+    def test_identity_list_admin(self):
+        self.login(self.admin)
+        self.assertQueryBudget("/api/identities/", 2, grow=self.grow(self.u1, self.u2))
+
+    def test_identity_detail(self):
+        self.login(self.u1)
+        pk = Identity.objects.filter(user=self.u1).first().pk
+        self.assertQueryBudget(f"/api/identities/{pk}/", 2)
+
+    def test_export(self):
+        self.login(self.u1)
+        self.assertQueryBudget("/api/identities/export/", 1, grow=self.grow(self.u1))
+
+    def test_public_identity_lookup(self):
+        # a single joined query; the user is only looked up on its own when nothing matched
+        self.assertQueryBudget("/api/public/lookup/user1/?mode=all", 1, grow=self.grow(self.u1))
+
+    def test_my_profile(self):
+        self.login(self.u1)
+        self.assertQueryBudget("/api/me/profile/", 1)
+
+    def test_public_profile(self):
+        self.assertQueryBudget("/api/profile/user1/", 1)
+
+    def test_bootstrap(self):
+        self.login(self.u1)
+        # profile + one identity page
+        self.assertQueryBudget("/api/me/bootstrap/", 2, grow=self.grow(self.u1))
+
+    def test_bootstrap_admin(self):
+        self.login(self.admin)
+        self.assertQueryBudget("/api/me/bootstrap/", 2, grow=self.grow(self.u1, self.u2))
@@ -0,0 +1,146 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+from rest_framework.test import APITestCase, APIClient
+from core import metrics, ratelimit
+
+LOGIN_LIMIT = {"token_obtain_pair": {"methods": ["POST"], "username": (0.001, 2)}}
+LOOKUP_LIMIT = {"public_profile": {"ip": (0.001, 3)}}
+
+
+@override_settings(LAST_LOGIN_UPDATE="off")
+class RateLimitTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.u2 = User.objects.create_user(username="user2", password="pass123")
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        ratelimit.get_store().clear()
+
+    def login(self, username, **extra):
+        return self.client.post("/api/token/", {"username": username, "password": "pass123"}, format="json", **extra)
+
+    @override_settings(RATE_LIMITS=LOGIN_LIMIT)
+    def test_login_limited_per_username(self):
+        self.client = APIClient()  # middleware is loaded per client
+        self.assertEqual(self.login("user1").status_code, 200)
+        self.assertEqual(self.login("user1", REMOTE_ADDR="10.0.0.2").status_code, 200)
+        r = self.login("user1", REMOTE_ADDR="10.0.0.3")
+        self.assertEqual(r.status_code, 429)
+        self.assertGreater(int(r["Retry-After"]), 1)
+        self.assertEqual(self.login("user2").status_code, 200)
+
+        r = self.client.post("/api/token/", {"username": "user1", "password": "pass123"})  # form-encoded
+        self.assertEqual(r.status_code, 429)
+
+    @override_settings(RATE_LIMITS=LOGIN_LIMIT)
+    def test_refreshing_is_not_limited(self):
+        self.client = APIClient()
+        refresh = self.login("user1").json()["refresh"]
+        for _ in range(3):
+            self.assertEqual(self.client.post("/api/token/refresh/", {"refresh": refresh}).status_code, 200)
+
+    @override_settings(RATE_LIMITS={"token_obtain_pair": {"methods": ["POST"], "username": (10.0, 100), "concurrency": 1}})
+    def test_malformed_multipart_releases_the_slot(self):
+        self.client = APIClient()
+        for _ in range(3):
+            r = self.client.generic("POST", "/api/token/", b"username=user1", content_type="multipart/form-data")
+            self.assertEqual(r.status_code, 400)
+        self.assertEqual(self.login("user1").status_code, 200)
+
+    @override_settings(RATE_LIMITS=LOOKUP_LIMIT)
+    def test_lookups_limited_per_ip(self):
+        self.client = APIClient()
+        for _ in range(3):
+            self.assertEqual(self.client.get("/api/profile/user1/").status_code, 200)
+        self.assertEqual(self.client.get("/api/profile/user2/").status_code, 429)
+        self.assertEqual(self.client.get("/api/profile/user2/", REMOTE_ADDR="10.0.0.9").status_code, 200)
+
+    @override_settings(RATE_LIMITS=LOOKUP_LIMIT, RATE_LIMIT_IP_HEADER="HTTP_X_FORWARDED_FOR")
+    def test_ip_from_proxy_header(self):
+        self.client = APIClient()
+        for n in range(4):
+            # a spoofed first entry does not give a fresh bucket
+            r = self.client.get("/api/profile/user1/", HTTP_X_FORWARDED_FOR=f"6.6.6.{n}, 203.0.113.5")
+        self.assertEqual(r.status_code, 429)
+        r = self.client.get("/api/profile/user1/", HTTP_X_FORWARDED_FOR="6.6.6.0, 203.0.113.6")
+        self.assertEqual(r.status_code, 200)
+
+    @override_settings(RATE_LIMITS=LOOKUP_LIMIT)
+    async def test_async_stack(self):
+        client = AsyncClient()
+        statuses = [(await client.get("/api/profile/user1/")).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    @override_settings(RATE_LIMITS=LOOKUP_LIMIT, RATE_LIMIT_STORE="local")
+    def test_local_store(self):
+        self.client = APIClient()
+        statuses = [self.client.get("/api/profile/user1/").status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    @override_settings(RATE_LIMITS=LOOKUP_LIMIT)
+    def test_rejections_are_counted(self):
+        self.client = APIClient()
+        for _ in range(5):
+            self.client.get("/api/profile/user1/")
+        text = self.client.get("/metrics").content.decode()
+        self.assertIn('core_ratelimit_rejected_total{reason="ip",rule="public_profile"} 2', text)
+        self.assertIn('core_http_requests_total{view="public_profile",method="GET",status="429"} 2', text)
+
+
+@override_settings(RATE_LIMITS={"public_profile": {"concurrency": 1}})
+class LoadSheddingTests(SimpleTestCase):
+    def test_sheds_past_the_concurrency_limit(self):
+        factory = RequestFactory()
+        seen = []
+
+        def handle(request):
+            # what the handler does: resolve, then process_view, then the view
+            request.resolver_match = resolve(request.path_info)
+            refused = middleware.process_view(request, None, (), request.resolver_match.kwargs)
+            if refused is not None:
+                return refused
+            if request.path_info.endswith("user1/"):
+                # a second request arrives while this one holds the only slot
+                inner = middleware(factory.get("/api/profile/user2/"))
+                seen.append((inner.status_code, inner["Retry-After"]))
+            return HttpResponse("ok")
+
+        middleware = ratelimit.RateLimitMiddleware(handle)
+        self.assertEqual(middleware(factory.get("/api/profile/user1/")).status_code, 200)
+        self.assertEqual(seen, [(503, "1")])
+        # the slot was released
+        self.assertEqual(middleware(factory.get("/api/profile/user2/")).status_code, 200)
+
+
+class BucketStoreTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def check_store(self, store):
+        # 2 tokens/s, burst 3
+        taken = [store.take("k", 2, 3, now=100.0) for _ in range(4)]
+        self.assertEqual(taken[:3], [0, 0, 0])
+        self.assertAlmostEqual(taken[3], 0.5)
+        self.assertEqual(store.take("k", 2, 3, now=100.5), 0)   # refilled one
+        self.assertGreater(store.take("k", 2, 3, now=100.5), 0)
+        # a long idle spell refills up to the burst, not beyond
+        taken = [store.take("k", 2, 3, now=1000.0) for _ in range(4)]
+        self.assertEqual([t == 0 for t in taken], [True, True, True, False])
+
+    def test_local(self):
+        self.check_store(ratelimit.LocalBucketStore())
+
+    def test_cache(self):
+        self.check_store(ratelimit.CacheBucketStore())
+
+    def test_local_store_is_bounded(self):
+        store = ratelimit.LocalBucketStore(max_keys=2)
+        for key in "abc":
+            store.take(key, 1, 1, now=0.0)
+        self.assertEqual(list(store._buckets), ["b", "c"])
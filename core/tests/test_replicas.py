@@ -0,0 +1,107 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase, APIClient
+from core import routers
+from core.models import Identity
+from core.serializers import ClaimsTokenObtainPairSerializer
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(APITestCase):
+    """
+    Which alias each read is routed to. The routed reads are answered by
+    'default' (the test database has no replica), so only the choice is checked.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.u1 = User.objects.create_user(username="user1", password="pass123")
+        cls.u2 = User.objects.create_user(username="user2", password="pass123")
+        Identity.objects.create(user=cls.u1, display_name="u1 Legal", context="Legal", language="en")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.routed = []
+        real = routers.ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            self.routed.append(real(router, model, **hints))
+            return None
+        patcher = mock.patch.object(routers.ReplicaRouter, "db_for_read", spy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def settle(self):
+        """Age every owner's last change past the pin window."""
+        for name in ("user1", "user2"):
+            cache.set(f"user-mod:{name}", int(time.time()) - 3600, None)
+        self.routed.clear()
+
+    def test_public_reads_use_the_replica(self):
+        self.settle()
+        for url in ("/api/profile/user1/", "/api/public/lookup/user1/?mode=list", "/api/public/batch/?usernames=user1"):
+            with self.subTest(url=url):
+                self.routed.clear()
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertEqual(set(self.routed), {"replica"})
+
+    def test_private_reads_and_writes_stay_on_primary(self):
+        self.settle()
+        self.client.force_authenticate(self.u1)
+        self.client.get("/api/identities/")
+        self.client.post("/api/identities/", {"display_name": "x", "context": "Work"}, format="json")
+        self.assertEqual(set(self.routed), {None})
+
+    def test_recent_owner_change_reads_the_primary(self):
+        self.client.get("/api/profile/user1/")  # no settle: user-mod is "now"
+        self.assertEqual(set(self.routed), {None})
+
+    def test_writer_is_pinned_by_cookie(self):
+        self.client.force_authenticate(self.u1)
+        r = self.client.patch("/api/me/profile/", {"display_label": "Tan"})
+        self.assertEqual(r.cookies["replica_pin"]["max-age"], 10)
+        cache.delete(f"replica-pin:{self.u1.pk}")  # leave only the cookie
+        self.settle()
+        self.client.get("/api/profile/user2/")
+        self.assertEqual(set(self.routed), {None})
+
+    def test_token_client_is_pinned_without_cookies(self):
+        token = str(ClaimsTokenObtainPairSerializer.get_token(self.u2).access_token)
+        writer = APIClient()
+        writer.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        writer.post("/api/identities/", {"display_name": "x", "context": "Work"}, format="json")
+        writer.cookies.clear()
+        self.settle()
+
+        writer.get("/api/users/search/?q=user")
+        self.assertEqual(set(self.routed), {None})
+
+        other = APIClient()
+        other.force_authenticate(self.u1)
+        self.routed.clear()
+        other.get("/api/users/search/?q=user")
+        self.assertEqual(set(self.routed), {"replica"})
+
+    def test_failed_writes_do_not_pin(self):
+        r = self.client.post("/api/identities/", {}, format="json")
+        self.assertEqual(r.status_code, 401)
+        self.assertNotIn("replica_pin", r.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_no_pins(self):
+        self.client.force_authenticate(self.u1)
+        r = self.client.post("/api/identities/", {"display_name": "x", "context": "Work"}, format="json")
+        self.assertNotIn("replica_pin", r.cookies)
+
+    def test_replica_fills_expire_sooner(self):
+        self.settle()
+        with mock.patch.object(cache, "set", wraps=cache.set) as cache_set:
+            self.client.get("/api/public/lookup/user1/")
+        timeouts = [c.args[2] for c in cache_set.call_args_list if c.args[0].startswith("lookup:")]
+        self.assertEqual(timeouts, [60])
+
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from core import search
+from core.models import Identity
+
+
+class UserSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username="alice", password="pass123")
+        cls.bob = User.objects.create_user(username="bob", password="pass123")
+        cls.carol = User.objects.create_user(username="carol", password="pass123")
+        cls.bob.profile.display_label = "Alicia Keys fan"
+        cls.bob.profile.save()
+        Identity.objects.create(user=cls.carol, display_name="李伟明", context="Legal", language="zh")
+        Identity.objects.create(user=cls.carol, display_name="சுப்பிரமணியம்", context="Social", language="ta")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def search(self, q):
+        r = self.client.get("/api/users/search/", {"q": q})
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        return [u["username"] for u in r.json()["results"]]
+
+    def test_username_and_label_substring(self):
+        self.assertEqual(self.search("ALI")[0], "alice")  # username outranks the label match
+        self.assertIn("bob", self.search("ali"))
+        self.assertEqual(self.search("keys"), ["bob"])
+
+    def test_identity_display_names_in_any_script(self):
+        self.assertEqual(self.search("伟明"), ["carol"])  # two chars: the ORM fallback still sees identities
+        self.assertEqual(self.search("李伟明"), ["carol"])
+        self.assertEqual(self.search("பிரமணி"), ["carol"])
+
+    def test_short_query_uses_fallback(self):
+        self.assertEqual(self.search("bo"), ["bob"])
+        Identity.objects.create(user=self.carol, display_name="伟明 Li", context="Work", language="zh")
+        self.assertEqual(self.search("伟明"), ["carol"])  # one row per user
+
+    def test_quotes_and_operators_are_literal(self):
+        self.assertEqual(self.search('al" OR "b'), [])
+
+    def test_index_follows_changes(self):
+        ident = Identity.objects.create(user=self.bob, display_name="Robert Tan", context="Work", language="en")
+        self.assertEqual(self.search("robert"), ["bob"])
+        ident.display_name = "Bobby"
+        ident.save()
+        self.assertEqual(self.search("robert"), [])
+        ident.delete()
+        self.assertEqual(self.search("bobby"), [])
+
+        self.carol.username = "caroline"
+        self.carol.save()
+        self.assertEqual(self.search("caroline"), ["caroline"])
+        self.carol.delete()
+        self.assertEqual(self.search("李伟明"), [])
+
+    def test_import_is_indexed(self):
+        self.client.post(
+            "/api/identities/import/", {"items": [{"display_name": "Imported Nickname"}]}, format="json"
+        )
+        self.assertEqual(self.search("nickname"), ["alice"])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as c:
+            c.execute(f"DELETE FROM {search.USER_TABLE}")
+            c.execute(f"DELETE FROM {search.IDENTITY_TABLE}")
+        self.assertEqual(self.search("李伟明"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("李伟明"), ["carol"])
+        self.assertEqual(self.search("keys"), ["bob"])
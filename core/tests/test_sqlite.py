@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, override_settings
+from core import metrics, sqlite
+
+
+class SQLiteProfileTests(TestCase):
+    def pragma(self, conn, name):
+        return conn.connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def open_file_db(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="c3070-sqlite-"), "db.sqlite3")
+        wrapper = DatabaseWrapper({**connection.settings_dict, "NAME": path})
+        wrapper.ensure_connection()  # fires connection_created
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_file_database_runs_in_wal(self):
+        conn = self.open_file_db()
+        self.assertEqual(self.pragma(conn, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(conn, "synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma(conn, "busy_timeout"), 5000)
+        self.assertEqual(self.pragma(conn, "cache_size"), -65536)
+        self.assertEqual(self.pragma(conn, "mmap_size"), 256 * 1024 ** 2)
+
+    @override_settings(SQLITE_PRAGMAS={"busy_timeout": 250})
+    def test_overrides(self):
+        self.assertEqual(self.pragma(self.open_file_db(), "busy_timeout"), 250)
+
+    @override_settings(SQLITE_PROFILE="default")
+    def test_default_profile_leaves_sqlite_alone(self):
+        self.assertEqual(self.pragma(self.open_file_db(), "journal_mode"), "delete")
+
+    def test_pragmas_are_not_counted_as_queries(self):
+        stats = metrics.RequestStats()
+        token = metrics._current.set(stats)
+        try:
+            self.open_file_db()
+        finally:
+            metrics._current.reset(token)
+        self.assertEqual(stats.queries, 0)
+
+
+class SQLitePragmaValidationTests(SimpleTestCase):
+    @override_settings(SQLITE_PROFILE="turbo")
+    def test_unknown_profile(self):
+        with self.assertRaisesMessage(ValueError, "unknown SQLITE_PROFILE 'turbo'"):
+            sqlite.pragmas()
+
+    @override_settings(SQLITE_PRAGMAS={"journal_mode": "WAL; DROP TABLE core_identity"})
+    def test_rejects_injection(self):
+        with self.assertRaises(ValueError):
+            sqlite.pragmas()
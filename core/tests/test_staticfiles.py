@@ -0,0 +1,58 @@
+import re
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import AsyncClient, Client, SimpleTestCase, override_settings
+
+MANIFEST_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+
+
+class HashedStaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = Path(tempfile.mkdtemp())
+        cls.enterClassContext(override_settings(
+            STATIC_ROOT=cls.root,
+            STORAGES=MANIFEST_STORAGES,
+            # core/static only; the admin and drf_yasg files add nothing here
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+        ))
+        call_command("collectstatic", interactive=False, verbosity=0, stdout=StringIO())
+
+    def hashed_main_js(self):
+        html = Client().get("/api/login/").content.decode()
+        match = re.search(r'src="(/static/core/js/main\.[0-9a-f]{12}\.js)"', html)
+        self.assertIsNotNone(match, "the page should reference the hashed main.js")
+        return match.group(1)
+
+    def test_collectstatic_writes_hashed_compressed_copies(self):
+        url = self.hashed_main_js()
+        path = self.root / url.removeprefix("/static/")
+        for suffix in ("", ".gz", ".br"):
+            self.assertTrue(Path(f"{path}{suffix}").exists(), suffix)
+
+    def test_hashed_files_are_immutable(self):
+        r = Client().get(self.hashed_main_js(), headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Content-Encoding"], "br")
+        self.assertEqual(r["Cache-Control"], "max-age=315360000, public, immutable")
+        self.assertIn("Accept-Encoding", r["Vary"])
+
+        r = Client().get("/static/core/js/main.js")
+        self.assertEqual(r["Cache-Control"], "max-age=60, public")
+
+    async def test_async_stack(self):
+        url = await self.async_hashed_main_js()
+        r = await AsyncClient().get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(r["Content-Encoding"], "gzip")
+        self.assertIn("immutable", r["Cache-Control"])
+
+    async def async_hashed_main_js(self):
+        html = (await AsyncClient().get("/api/login/")).content.decode()
+        return re.search(r'src="(/static/core/js/main\.[0-9a-f]{12}\.js)"', html).group(1)
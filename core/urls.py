@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
@@ -11,15 +12,21 @@ from .views import (
     register_user,
     register_page,
     user_info,
+    me_bootstrap,
     my_profile, public_profile, search_users,
     # add these page views:
     me_profile_page, public_profile_page,
     public_identity_lookup,
     public_identity_lookup_page,
+    public_batch,
     export_identities,
     import_identities,
 )
 
+if getattr(settings, 'ASYNC_READ_VIEWS', False):
+    # ASGI: the same endpoints without a thread hop per request
+    from .async_views import public_identity_lookup, public_profile, search_users  # noqa: F811
+
 router = DefaultRouter()
 router.register(r'identities', IdentityViewSet, basename='identity')
 
@@ -45,6 +52,7 @@ urlpatterns = [
     # JSON APIs
     path('user-info/', user_info, name='user_info'),
     path('me/profile/', my_profile, name='my_profile'),
+    path('me/bootstrap/', me_bootstrap, name='me_bootstrap'),
     path('profile/<str:username>/', public_profile, name='public_profile'),
     path('users/search/', search_users, name='search_users'),
 
@@ -52,6 +60,7 @@ urlpatterns = [
     path('my-profile-page/', me_profile_page, name='my_profile_page'),
     path('profile-page/<str:username>/', public_profile_page, name='public_profile_page'),
     path('public/lookup/<str:username>/', public_identity_lookup, name='public_identity_lookup'),
+    path('public/batch/', public_batch, name='public_batch'),
     path('public/lookup-page/<str:username>/', public_identity_lookup_page, name='public_identity_lookup_page'),
 
     
@@ -1,20 +1,59 @@
 import json
+from itertools import islice
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
 from django.shortcuts import get_object_or_404,render
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.urls import reverse
+from django.http import Http404, HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
-from django.db.models.functions import Lower
+from django.db.models import F, Q, Window
+from django.db.models.functions import Lower, RowNumber
 
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes, renderer_classes
 from rest_framework.parsers import MultiPartParser, FormParser,JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
+
+from . import avatars, live, search
+from .authentication import ClaimsUser
+from .cache import (
+    ALL_USERS, bump_user_version, get_user_version, get_user_versions, lookup_cache_key, lookup_cache_timeout,
+)
+from .conditional import not_modified, validators_for, with_validators
+from .hashers import HashingUnavailable
+from .jsonstream import InvalidJSON, NoItemsArray, iter_json_items
+from .languages import norm_lang
+from .models import Identity, Profile
+from .pagination import IdentityCursorPagination
+from .ranking import compile_accept_language, rank_candidates
+from .renderers import NDJSONRenderer, dumps_compact
+from .routers import replica_reads
+from .serializers import IDENTITY_VALUES, IdentitySerializer, ProfileSerializer, identity_row
+
+def _user_role(user, default='user'):
+    """Role of the request user, resolved once and memoised on the user object."""
+    if isinstance(user, ClaimsUser):
+        return user.role  # straight from the token
+    role = getattr(user, '_cached_role', None)
+    if role is None:
+        try:
+            role = user.profile.role
+        except (AttributeError, ObjectDoesNotExist):
+            return default
+        user._cached_role = role
+    return role
 
-from .models import Identity
-from .serializers import IdentitySerializer,ProfileSerializer
+def _compact_json_accepted(request):
+    """Whether the response is JSONRenderer's default output, which dumps_compact reproduces."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return isinstance(renderer, JSONRenderer) and renderer.get_indent(request.accepted_media_type, {}) is None
 
 # ---------------------------
 # API: Identity ViewSet
@@ -24,10 +63,30 @@ class IdentityViewSet(viewsets.ModelViewSet):
     queryset = Identity.objects.all()
     serializer_class = IdentitySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IdentityCursorPagination
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        # admins see every user's rows, so they validate against the global counter
+        owner = ALL_USERS if _user_role(request.user) == 'admin' else request.user.username
+        etag, modified = validators_for(request, owner, request.user.id, request.accepted_renderer.format)
+        cached = not_modified(request, etag, modified)
+        if cached is not None:
+            return cached
+        if _compact_json_accepted(request):
+            response = self._list_rows(request)
+        else:
+            response = super().list(request, *args, **kwargs)  # browsable API, indented JSON
+        return with_validators(response, etag, modified, private=True)
+
+    def _list_rows(self, request):
+        # same bytes as the serializer + JSONRenderer, built from .values() rows
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()).values(*IDENTITY_VALUES))
+        body = {'next': self.paginator.get_next_link(), 'results': [identity_row(v) for v in page]}
+        return HttpResponse(dumps_compact(body), content_type='application/json')
+
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Identity.objects.none()
@@ -36,12 +95,10 @@ class IdentityViewSet(viewsets.ModelViewSet):
         if not user.is_authenticated:
             return Identity.objects.none()
 
-        try:
-            role = user.profile.role
-        except AttributeError:
-            role = 'user'  # fallback
-
-        return Identity.objects.all() if role == 'admin' else Identity.objects.filter(user=user)
+        # username/role are serialized per row; join them in instead of 2 queries per identity
+        qs = Identity.objects.select_related('user__profile')
+        # filter on the id: on reads request.user is a token-backed ClaimsUser
+        return qs if _user_role(user) == 'admin' else qs.filter(user_id=user.id)
 
 # ---------------------------
 # API: Auth & Profile
@@ -58,7 +115,12 @@ def register_user(request):
         if User.objects.filter(username=username).exists():
             return JsonResponse({'error': 'Username already exists'}, status=400)
 
-        User.objects.create_user(username=username, email=email, password=password)
+        try:
+            User.objects.create_user(username=username, email=email, password=password)
+        except HashingUnavailable as exc:
+            response = JsonResponse({'error': str(exc.detail)}, status=exc.status_code)
+            response['Retry-After'] = str(exc.wait)
+            return response
         return JsonResponse({'message': 'User registered successfully'}, status=201)
 
     return JsonResponse({'error': 'Invalid request'}, status=400)
@@ -67,13 +129,54 @@ def register_user(request):
 @permission_classes([IsAuthenticated])
 def user_info(request):
     user = request.user
-    profile = getattr(user, 'profile', None)
 
     return JsonResponse({
         'username': user.username,
-        'role': profile.role if profile else 'unknown'
+        'role': _user_role(user, default='unknown')
     })
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def me_bootstrap(request):
+    """
+    Everything the home page needs on load: user info, own profile and the
+    first identity page (its `next` continues at /api/identities/). Two
+    queries, and a 304 while nothing the page shows has changed.
+    """
+    user = request.user
+    profiles = Profile.objects.select_related('user', 'preferred_identity').filter(user_id=user.id)
+    prof = None
+    if not isinstance(user, ClaimsUser):
+        # the role decides which counter validates; load the profile once for both
+        prof = profiles.first()
+        user._cached_role = prof.role if prof else 'unknown'
+    owner = ALL_USERS if _user_role(user) == 'admin' else user.username
+    etag, modified = validators_for(request, owner, user.id)
+    cached = not_modified(request, etag, modified)
+    if cached is not None:
+        return cached
+    if prof is None:
+        prof = profiles.first()
+
+    qs = Identity.objects.select_related('user__profile')
+    if _user_role(user) != 'admin':
+        qs = qs.filter(user_id=user.id)
+    paginator = IdentityCursorPagination()
+    paginator.base_url = request.build_absolute_uri(reverse('identity-list'))
+    page_size = request.query_params.get(paginator.page_size_query_param)
+    if page_size:
+        paginator.base_url = replace_query_param(paginator.base_url, paginator.page_size_query_param, page_size)
+    page = paginator.paginate_queryset(qs, request)
+
+    return with_validators(JsonResponse({
+        'user': {'username': user.username, 'role': _user_role(user, default='unknown')},
+        'profile': ProfileSerializer(prof, context={'request': request}).data if prof else None,
+        'identities': {
+            'next': paginator.get_next_link(),
+            'results': IdentitySerializer(page, many=True, context={'request': request}).data,
+        },
+    }), etag, modified, private=True)
+
 # ---------------------------
 # API: Individual Profile Page
 # ---------------------------
@@ -82,90 +185,201 @@ def user_info(request):
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser,JSONParser])
 def my_profile(request):
-    prof = request.user.profile
+    if request.method == 'GET':
+        etag, modified = validators_for(request, request.user.username, request.user.id)
+        cached = not_modified(request, etag, modified)
+        if cached is not None:
+            return cached
+    prof = get_object_or_404(
+        Profile.objects.select_related('user', 'preferred_identity'), user_id=request.user.id
+    )
     if request.method in ['PUT','PATCH']:
         serializer = ProfileSerializer(prof, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
+            old_avatar, old_renditions = prof.avatar.name, prof.avatar_renditions
             serializer.save()
+            if prof.avatar.name != old_avatar:
+                # resized off the request; avatar_urls fills in once they are written
+                avatars.schedule_renditions(prof, stale=old_renditions)
             return JsonResponse(serializer.data, status=200)
         return JsonResponse(serializer.errors, status=400)
     serializer = ProfileSerializer(prof, context={'request': request})
-    return JsonResponse(serializer.data, status=200)
+    return with_validators(JsonResponse(serializer.data, status=200), etag, modified, private=True)
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_profile(request, username):
-    user = get_object_or_404(User, username=username)
-    serializer = ProfileSerializer(user.profile, context={'request': request})
-    return JsonResponse(serializer.data, status=200)
+    etag, modified = validators_for(request, username)
+    cached = not_modified(request, etag, modified)
+    if cached is not None:
+        return cached
+    prof = get_object_or_404(
+        Profile.objects.select_related('user', 'preferred_identity'), user__username=username
+    )
+    serializer = ProfileSerializer(prof, context={'request': request})
+    return with_validators(JsonResponse(serializer.data, status=200), etag, modified)
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def search_users(request):
     q = (request.GET.get('q') or '').strip().lower()
+    if len(q) >= search.MIN_QUERY_LENGTH and search.fts_available():
+        # ranked FTS5 match over usernames, labels and identity names
+        ids = search.search_user_ids(q, limit=20)
+        found = User.objects.select_related('profile').in_bulk(ids)
+        users = [found[i] for i in ids if i in found]
+    else:
+        users = _search_queryset(q)[:20]
+
+    return _search_response(users)
+
+
+def _search_queryset(q):
+    """The ORM search: short queries, which trigrams can't match, and non-SQLite databases."""
     qs = User.objects.select_related('profile').all()
     if q:
-        qs = qs.filter(Q(username__icontains=q) | Q(profile__display_label__icontains=q))
+        qs = qs.filter(
+            Q(username__icontains=q)
+            | Q(profile__display_label__icontains=q)
+            | Q(identities__display_name__icontains=q)
+        ).distinct()
+    return qs
 
+
+def _search_response(users):
     data = [{
         'username': u.username,
         'display_label': getattr(u.profile, 'display_label', '') or ''
-    } for u in qs[:20]]
+    } for u in users]
     return JsonResponse({'results': data}, status=200)
 
-# def _parse_accept_language(header_value: str):
-#     if not header_value:
-#         return []
-#     langs = []
-#     for part in header_value.split(","):
-#         item = part.strip()
-#         if not item:
-#             continue
-#         if ";q=" in item:
-#             lang, q = item.split(";q=", 1)
-#             try:
-#                 qv = float(q)
-#             except ValueError:
-#                 qv = 1.0
-#         else:
-#             lang, qv = item, 1.0
-#         langs.append((lang.strip().lower(), qv))
-#     langs.sort(key=lambda x: x[1], reverse=True)
-#     return langs
-
-# def _primary(lang: str):
-#     return (lang or "").split("-", 1)[0].lower()
-
-# def _score_identity(identity, want_ctx: str, accept_langs):
-#     score = 0.0
-#     if want_ctx and identity.context and identity.context.lower() == want_ctx.lower():
-#         score += 100
-#     if accept_langs:
-#         id_lang = (identity.language or "").lower()
-#         id_primary = _primary(id_lang)
-#         for idx, (al, q) in enumerate(accept_langs):
-#             weight = max(q, 0.1)
-#             if id_lang and id_lang == al:
-#                 score += 20 * weight / (1 + idx*0.1)
-#                 break
-#             if id_primary and id_primary == _primary(al):
-#                 score += 8 * weight / (1 + idx*0.1)
-#     try:
-#         score += (identity.updated_at.timestamp() % 1)
-#     except Exception:
-#         pass
-#     return score
+def _lookup_queryset(username, ctx, requested_primary, mode_out):
+    # One indexed query: owner by username, gates on context/language_key,
+    # newest first (ties by id), LIMIT 1 in best mode.
+    qs = Identity.objects.filter(user__username=username)
+    if ctx:
+        qs = qs.filter(context__icontains=ctx)
+    if requested_primary:
+        qs = qs.filter(language_key__in=requested_primary)
+    qs = qs.order_by('-updated_at', 'id').values(*IDENTITY_VALUES)
+    return qs[:1] if mode_out == 'best' else qs
+
 
+def _owner_queryset(username):
+    # nothing matched: only then pay for telling "no match" from "no such user"
+    return User.objects.filter(username=username).values_list('username', flat=True)
+
+
+def _lookup_identities(username, ctx, requested_primary, mode_out):
+    """Run the lookup query; returns (owner username, serialized rows)."""
+    values = list(_lookup_queryset(username, ctx, requested_primary, mode_out))
+    if values:
+        owner = values[0]['user__username']
+    else:
+        owner = _owner_queryset(username).first()
+        if owner is None:
+            raise Http404("No User matches the given query.")
+    return owner, [identity_row(v) for v in values]
+
+
+def _rank_identities(username, ctx, prefs, limit):
+    """Score the user's identities against prefs; returns (owner, rows with score)."""
+    fields = ('id', 'language', 'language_key', 'context', 'updated_at')
+    base = Identity.objects.filter(user__username=username)
+
+    # pre-filter in SQL to the acceptable primary languages, unless "*" was sent
+    filtered = bool(prefs.primaries) and not prefs.wildcard
+    candidates = base.filter(language_key__in=prefs.primaries) if filtered else base
+    top = rank_candidates(candidates.values_list(*fields).iterator(chunk_size=2000), prefs, ctx, limit)
+    if not top and filtered:
+        # nothing in an acceptable language: fall back to context + recency
+        top = rank_candidates(base.values_list(*fields).iterator(chunk_size=2000), prefs, ctx, limit)
+
+    if not top:
+        owner = _owner_queryset(username).first()
+        if owner is None:
+            raise Http404("No User matches the given query.")
+        return owner, []
+
+    found = {v['id']: v for v in Identity.objects.filter(pk__in=[pk for pk, _ in top]).values(*IDENTITY_VALUES)}
+    data = []
+    for pk, score in top:
+        row = identity_row(found[pk])
+        row['score'] = round(score, 3)
+        data.append(row)
+    return found[top[0][0]]['user__username'], data
+
+
+def _ranked_params(request, username, ctx, raw_lang, version):
+    """(prefs, limit, cache key) for a ranked lookup of `username` at `version`."""
+    # explicit ?accept_language= / ?al= wins over the browser's header
+    prefs = compile_accept_language(raw_lang or request.META.get('HTTP_ACCEPT_LANGUAGE', ''))
+    default_limit = getattr(settings, 'PUBLIC_LOOKUP_RANKED_LIMIT', 10)
+    try:
+        limit = int(request.GET.get('limit') or default_limit)
+    except ValueError:
+        limit = default_limit
+    limit = min(max(limit, 1), 100)
+
+    key = lookup_cache_key(username, version, ctx, [], 'ranked', extra=f'{prefs.cache_token}|{limit}')
+    return prefs, limit, key
+
+
+def _lookup_response(owner, ctx, languages, mode, data):
+    return JsonResponse({
+        "username": owner,
+        "applied_context": ctx or None,
+        "accept_language": languages,
+        "mode": mode,
+        "count": len(data),
+        "results": data,
+    }, status=200)
+
+
+def _ranked_lookup(request, username, ctx, raw_lang):
+    prefs, limit, key = _ranked_params(request, username, ctx, raw_lang, get_user_version(username))
+    hit = cache.get(key)
+    if hit is None:
+        hit = _rank_identities(username, ctx, prefs, limit)
+        cache.set(key, hit, lookup_cache_timeout())
+    owner, data = hit
+    # normalised tags, best first
+    return _lookup_response(owner, ctx, prefs.tags, "ranked", data)
+
+
+def _lookup_variant(request):
+    """(mode, vary, variant) for a lookup request's validators."""
+    # ranked mode falls back to the Accept-Language header, so that is part of
+    # the tag and of Vary (shared caches key on the header, not the tag)
+    mode = (request.GET.get('mode') or 'best').strip().lower()
+    vary = ['Accept-Language'] if mode == 'ranked' else []
+    return mode, vary, request.META.get('HTTP_ACCEPT_LANGUAGE', '') if vary else ''
+
+
+def _lookup_validators(request, username):
+    """(mode, etag, last_modified, vary) for a lookup request."""
+    mode, vary, variant = _lookup_variant(request)
+    etag, modified = validators_for(request, username, variant)
+    return mode, etag, modified, vary
+
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_identity_lookup(request, username):
-    user = get_object_or_404(User, username=username)
-    qs = Identity.objects.filter(user=user)
+    mode, etag, modified, vary = _lookup_validators(request, username)
+    cached = not_modified(request, etag, modified)
+    if cached is not None:
+        return cached
+    return with_validators(_public_identity_lookup(request, username, mode), etag, modified, vary=vary)
 
+
+def _lookup_params(request):
+    """(context, raw language value, language tokens, primary languages) from the query."""
     # --- Context: fuzzy, case-insensitive ---
     ctx = (request.GET.get('context') or '').strip()
-    if ctx:
-        qs = qs.filter(context__icontains=ctx)
 
     # --- Language: strict gate (Option B) with normalisation & aliases ---
     raw_lang = (
@@ -173,151 +387,281 @@ def public_identity_lookup(request, username):
         or (request.GET.get('al') or '').strip()
     )
 
-    def norm_lang(s: str) -> str:
-
-        if not s:
-            return ''
-        s = s.strip().lower()
-
-        # Common word aliases
-        word_alias = {
-            'english': 'en',
-            'chinese': 'zh',
-            'mandarin': 'zh',
-            'malay': 'ms',
-            'tamil': 'ta',
-        }
-        if s in word_alias:
-            return word_alias[s]
-
-        # If looks like a tag, reduce to primary (en, zh, ms, ta...)
-        if '-' in s:
-            s = s.split('-', 1)[0]
-
-        # if they typed 'en' / 'zh' already, keep it
-        if len(s) in (2, 3):  # crude but fine for our set
-            return s
-        return ''
-
     # Parse a comma-separated list (or Accept-Language-esque)
     requested_langs = [p.split(';', 1)[0].strip() for p in raw_lang.split(',') if p.strip()]
     requested_primary = [norm_lang(p) for p in requested_langs]
     requested_primary = [p for p in requested_primary if p]  # drop unknowns
+    return ctx, raw_lang, requested_langs, requested_primary
 
-    items = list(qs)
-
-    if requested_primary:
-        def lang_matches(code: str) -> bool:
-
-            c = norm_lang(code or '')
-            return bool(c) and (c in requested_primary)
-
-        items = [i for i in items if lang_matches(i.language)]
 
-    # Sort: newest first (stable)
-    def ts(x):
-        return (x.updated_at or x.created_at)
-    items.sort(key=ts, reverse=True)
+def _public_identity_lookup(request, username, mode):
+    ctx, raw_lang, requested_langs, requested_primary = _lookup_params(request)
 
     # Mode handling (always return results array)
+    if mode == 'ranked':
+        return _ranked_lookup(request, username, ctx, raw_lang)
+    mode_out = 'best' if mode == 'best' else 'list'
+
+    # Cached per (username, version, normalised params); any identity/profile
+    # change bumps the version, so hits are never stale.
+    key = lookup_cache_key(username, get_user_version(username), ctx, requested_primary, mode_out)
+    hit = cache.get(key)
+    if hit is None:
+        hit = _lookup_identities(username, ctx, requested_primary, mode_out)
+        cache.set(key, hit, lookup_cache_timeout())
+    owner, data = hit
+    # original tokens user typed
+    return _lookup_response(owner, ctx, requested_langs, mode_out, data)
+
+
+def _batch_lookup_identities(owners, ctx, requested_primary, mode_out):
+    """
+    _lookup_identities for many owners ({username: user id}) in one query;
+    returns {username: serialized rows}.
+    """
+    qs = Identity.objects.filter(user_id__in=owners.values())
+    if ctx:
+        qs = qs.filter(context__icontains=ctx)
+    if requested_primary:
+        qs = qs.filter(language_key__in=requested_primary)
+    if mode_out == 'best':
+        # newest per user (ties by id), picked in SQL
+        qs = qs.annotate(rank=Window(
+            RowNumber(), partition_by=F('user_id'), order_by=[F('updated_at').desc(), F('id').asc()],
+        )).filter(rank=1)
+    by_user = {user_id: [] for user_id in owners.values()}
+    for values in qs.order_by('-updated_at', 'id').values(*IDENTITY_VALUES, 'user_id'):
+        by_user[values['user_id']].append(identity_row(values))
+    return {username: by_user[user_id] for username, user_id in owners.items()}
+
+
+@replica_reads
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def public_batch(request):
+    """
+    Public profiles and identity lookups for many users at once.
+
+    `?usernames=a,b,c` (at most PUBLIC_BATCH_MAX_USERNAMES) plus the lookup's
+    `context`, `accept_language`/`al` and `mode` (best or list). Unknown
+    usernames map to null instead of a 404. Two queries whatever the count:
+    one for the profiles, one for the identities (skipped on a full cache hit).
+    """
+    raw = request.GET.get('usernames') or ''
+    usernames = list(dict.fromkeys(u.strip() for u in raw.split(',') if u.strip()))
+    max_usernames = getattr(settings, 'PUBLIC_BATCH_MAX_USERNAMES', 50)
+    if not usernames:
+        return JsonResponse({'error': 'usernames is required'}, status=400)
+    if len(usernames) > max_usernames:
+        return JsonResponse({'error': f'At most {max_usernames} usernames per request'}, status=400)
+
+    ctx, _, requested_langs, requested_primary = _lookup_params(request)
     mode = (request.GET.get('mode') or 'best').strip().lower()
-    if mode == 'best':
-        items = items[:1]  # single best
-        mode_out = 'best'
-    else:
-        mode_out = 'list'
+    if mode == 'ranked':
+        return JsonResponse({'error': 'mode=ranked is not supported in batch lookups'}, status=400)
+    mode_out = 'best' if mode == 'best' else 'list'
+
+    profiles = {
+        p.user.username: p for p in
+        Profile.objects.select_related('user', 'preferred_identity').filter(user__username__in=usernames)
+    }
+    owners = {username: profiles[username].user_id for username in usernames if username in profiles}
+
+    # same cache entries as public_identity_lookup: (owner, rows) per user and version
+    versions = get_user_versions(list(owners))
+    keys = {
+        username: lookup_cache_key(username, versions[username], ctx, requested_primary, mode_out)
+        for username in owners
+    }
+    hits = cache.get_many(list(keys.values()))
+    lookups = {username: hits[key][1] for username, key in keys.items() if key in hits}
+    missing = {username: user_id for username, user_id in owners.items() if username not in lookups}
+    if missing:
+        fresh = _batch_lookup_identities(missing, ctx, requested_primary, mode_out)
+        cache.set_many(
+            {keys[username]: (username, data) for username, data in fresh.items()}, lookup_cache_timeout()
+        )
+        lookups.update(fresh)
 
-    data = IdentitySerializer(items, many=True, context={'request': request}).data
+    serializer = ProfileSerializer(context={'request': request})
+    results = {}
+    for username in usernames:
+        if username not in owners:
+            results[username] = None
+            continue
+        data = lookups[username]
+        results[username] = {
+            "profile": serializer.to_representation(profiles[username]),
+            "count": len(data),
+            "results": data,
+        }
     return JsonResponse({
-        "username": user.username,
         "applied_context": ctx or None,
-        "accept_language": requested_langs,   # original tokens user typed
+        "accept_language": requested_langs,
         "mode": mode_out,
-        "count": len(data),
-        "results": data,
+        "results": results,
     }, status=200)
 
 
+def _stream_identities(qs, ndjson, chunk_size):
+    """
+    Yield the export body a few hundred rows at a time.
+
+    Rows are built from .values() (identity_row) and read with a chunked
+    iterator, so nothing is held beyond one chunk. The JSON mode reproduces
+    JsonResponse's `{"items": [...]}` bytes exactly: one json.dumps per batch
+    of rows, list brackets trimmed. NDJSON lines come from
+    NDJSONRenderer.dumps_line (orjson when installed).
+    """
+    rows = qs.values(*IDENTITY_VALUES).iterator(chunk_size=chunk_size)
+    if not ndjson:
+        yield b'{"items": ['
+    first = True
+    while True:
+        batch = [identity_row(v) for v in islice(rows, 200)]
+        if not batch:
+            break
+        if ndjson:
+            yield b''.join(NDJSONRenderer.dumps_line(row) for row in batch)
+        else:
+            body = json.dumps(batch, ensure_ascii=False)[1:-1]
+            yield (body if first else ', ' + body).encode('utf-8')
+            first = False
+    if not ndjson:
+        yield b']}'
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, NDJSONRenderer])
 def export_identities(request):
     """
-    Download the current user's identities as JSON.
+    Download the current user's identities as JSON (`{"items": [...]}`),
+    or as NDJSON with `?format=ndjson`. The body is streamed.
     """
-    qs = Identity.objects.filter(user=request.user).order_by('id')
+    qs = Identity.objects.filter(user_id=request.user.id).order_by('id')
+    ndjson = request.accepted_renderer.format == NDJSONRenderer.format
     # Full records (handy for backup)
-    data = IdentitySerializer(qs, many=True, context={'request': request}).data
-    payload = {"items": data}
+    chunk_size = getattr(settings, 'IDENTITY_EXPORT_CHUNK_SIZE', 2000)
 
-    resp = JsonResponse(payload, status=200, json_dumps_params={"ensure_ascii": False})
-    resp["Content-Disposition"] = 'attachment; filename="identities-export.json"'
+    if ndjson:
+        resp = StreamingHttpResponse(
+            _stream_identities(qs, True, chunk_size),
+            content_type='application/x-ndjson; charset=utf-8',
+        )
+        resp["Content-Disposition"] = 'attachment; filename="identities-export.ndjson"'
+    else:
+        resp = StreamingHttpResponse(
+            _stream_identities(qs, False, chunk_size),
+            content_type='application/json',
+        )
+        resp["Content-Disposition"] = 'attachment; filename="identities-export.json"'
     return resp
 
 
+def _undo_import(user, ids):
+    """
+    Delete the rows a failed import already committed, in one transaction.
+
+    A queryset delete() would send post_delete per row (owner query, version
+    bumps, search unindex, live push) while holding the write lock; the
+    caller bumps the version and resets live clients once instead.
+    """
+    chunk_size = getattr(settings, 'IDENTITY_IMPORT_BATCH_SIZE', 1000)
+    with transaction.atomic():
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            # on_delete=SET_NULL, done by hand: _raw_delete skips the collector
+            Profile.objects.filter(user=user, preferred_identity__in=chunk).update(preferred_identity=None)
+            Identity.objects.filter(pk__in=chunk)._raw_delete(router.db_for_write(Identity))
+        search.unindex_identities(ids)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def import_identities(request):
 
-    # ---- parse body or uploaded file ----
-    try:
-        if "file" in request.FILES:
-            raw = request.FILES["file"].read().decode("utf-8", errors="ignore")
-            body = json.loads(raw or "{}")
-        else:
-            if isinstance(request.data, (dict, list)):
-                body = request.data
-            else:
-                body = json.loads(request.body or "{}")
-    except Exception:
-        return HttpResponseBadRequest("Invalid JSON")
-
-    # ---- normalise to a list of items ----
-    items = None
-    if isinstance(body, list):
-        items = body
-    elif isinstance(body, dict):
-        if isinstance(body.get("items"), list):
-            items = body["items"]
-        elif isinstance(body.get("results"), list):
-            items = body["results"]
-
-    if not isinstance(items, list):
-        return HttpResponseBadRequest(
-            'Expected an array or {"items": [...]}.'
-        )
+    # ---- pick the source: uploaded file or raw body, both read incrementally ----
+    media_type = (request.content_type or '').split(';', 1)[0].strip().lower()
+    if media_type in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+        if "file" not in request.FILES:
+            return HttpResponseBadRequest(
+                'Expected an array or {"items": [...]}.'
+            )
+        items = iter_json_items(request.FILES["file"])
+    else:
+        items = iter_json_items(request.stream)
 
-    created = 0
+    batch_size = getattr(settings, 'IDENTITY_IMPORT_BATCH_SIZE', 1000)
+    created_ids = []
+    received = 0
     errors = []
+    batch = []
 
-    # ---- import loop ----
-    for idx, rec in enumerate(items, start=1):
-        if not isinstance(rec, dict):
-            errors.append(f"Item {idx}: not an object")
-            continue
-
-        dn = (rec.get("display_name") or rec.get("name") or rec.get("displayName") or "").strip()
-        ctx = (rec.get("context") or rec.get("use_context") or "").strip()
-        lng = (rec.get("language") or rec.get("lang") or "").strip()
+    def write(batch):
+        # one short transaction per batch: with BEGIN IMMEDIATE the SQLite write
+        # lock is held for the INSERTs, not while the upload is being read
+        with transaction.atomic():
+            rows = Identity.objects.bulk_create(batch)
+            search.index_identities(rows)
+        created_ids.extend(row.pk for row in rows)
 
-        if not dn:
-            errors.append(f"Item {idx}: 'display_name' / 'name' is required")
-            continue
-
-        Identity.objects.create(
-            user=request.user,
-            display_name=dn,
-            context=ctx,
-            language=lng,
+    # ---- import loop: parse as the body arrives, commit per batch ----
+    try:
+        try:
+            for idx, rec in enumerate(items, start=1):
+                received = idx
+                if not isinstance(rec, dict):
+                    errors.append(f"Item {idx}: not an object")
+                    continue
+
+                dn = (rec.get("display_name") or rec.get("name") or rec.get("displayName") or "").strip()
+                ctx = (rec.get("context") or rec.get("use_context") or "").strip()
+                lng = (rec.get("language") or rec.get("lang") or "").strip()
+
+                if not dn:
+                    errors.append(f"Item {idx}: 'display_name' / 'name' is required")
+                    continue
+
+                # bulk_create skips Identity.save(), so fill language_key here
+                batch.append(Identity(
+                    user=request.user,
+                    display_name=dn,
+                    context=ctx,
+                    language=lng,
+                    language_key=norm_lang(lng),
+                ))
+                if len(batch) >= batch_size:
+                    write(batch)
+                    batch = []
+
+            if batch:
+                write(batch)
+        except (InvalidJSON, NoItemsArray):
+            # malformed input anywhere in the stream undoes the whole import
+            if created_ids:
+                _undo_import(request.user, created_ids)
+            raise
+        finally:
+            if created_ids:
+                # bulk_create sends no post_save, so invalidate (and index, above) by hand
+                bump_user_version(request.user.username)
+                live.identities_reset(request.user.id)
+    except InvalidJSON:
+        return HttpResponseBadRequest("Invalid JSON")
+    except NoItemsArray:
+        return HttpResponseBadRequest(
+            'Expected an array or {"items": [...]}.'
         )
-        created += 1
 
+    created = len(created_ids)
     # 201 = all good, 207 = partial, 400 = none
     status_code = 201 if created and not errors else (207 if created and errors else 400)
     return JsonResponse(
         {
             "created_count": created,
             "errors": errors,
-            "total_received": len(items),
+            "total_received": received,
         },
         status=status_code
     )